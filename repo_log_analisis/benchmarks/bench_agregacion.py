@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de escalado de la agregación de generar_metricas.
+
+Compara el bucle anterior por grupo (filtros booleanos + unique() por cada
+(etiqueta, fase) y sum() de listas para las tecnologías) con
+calcular_metricas() vectorizado, sobre tablas de eventos sintéticas de 1k a
+1M eventos. Comprueba que las cuatro hojas son idénticas mientras el bucle
+anterior se ejecute (por defecto hasta 100k eventos, después tarda minutos).
+
+Uso:
+    python benchmarks/bench_agregacion.py [--eventos 1000 10000 ...] [--max-anterior 100000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from logparser.generar_metricas import calcular_metricas, format_duration  # noqa: E402
+
+TECNOLOGIAS = ["JAVA", "COBOL", "SQL", "AS400", "NET", "ORACLE", "DB2", "BATCH"]
+FASES = ["BUILD", "DEPLOY"]
+
+
+def generar_eventos(n_eventos: int, semilla: int = 7) -> pd.DataFrame:
+    """Eventos STARTED/ENDED para n_eventos/4 etiquetas con dos fases cada una."""
+    rnd = np.random.default_rng(semilla)
+    n_etiquetas = max(1, n_eventos // 4)
+    tipos = rnd.choice(["CR", "PF", "RQ"], n_etiquetas)
+    etiquetas = np.char.add(np.char.add(tipos, "-"), np.arange(n_etiquetas).astype(str))
+    tecnologia = rnd.choice(TECNOLOGIAS, n_etiquetas)
+    base = pd.Timestamp("2024-01-01 06:00:00")
+    inicio = base + pd.to_timedelta(rnd.integers(0, 12 * 3600, n_etiquetas), unit="s")
+    filas = []
+    for i, fase in enumerate(FASES):
+        dur = pd.to_timedelta(rnd.integers(1, 1800, n_etiquetas), unit="s")
+        ini = inicio + pd.Timedelta(seconds=3600 * i)
+        for evento, fecha in (("STARTED", ini), ("ENDED", ini + dur)):
+            filas.append(pd.DataFrame({
+                "fecha": fecha, "evento": evento, "etiqueta": etiquetas,
+                "tecnologia": tecnologia, "fase": fase,
+            }))
+    df = pd.concat(filas, ignore_index=True).sort_values("fecha", kind="stable")
+    # Algunas etiquetas ejecutan la misma fase en una segunda tecnología
+    extra = df.sample(frac=0.05, random_state=semilla).assign(tecnologia="SQL")
+    return pd.concat([df, extra], ignore_index=True).sort_values("fecha", kind="stable").reset_index(drop=True)
+
+
+def calcular_metricas_anterior(df_eventos, errores_etiqueta):
+    """Implementación previa (bucle por grupo), conservada como referencia."""
+    filas = []
+    for (etiqueta, fase), grupo in df_eventos.groupby(["etiqueta", "fase"]):
+        fecha_ini = grupo[grupo["evento"] == "STARTED"]["fecha"].min()
+        fecha_fin = grupo[grupo["evento"] == "ENDED"]["fecha"].max()
+        tecnologias = grupo["tecnologia"].unique()
+        if pd.notnull(fecha_ini) and pd.notnull(fecha_fin) and fecha_fin > fecha_ini:
+            duracion_ms = int((fecha_fin - fecha_ini).total_seconds() * 1000)
+            filas.append({
+                "etiqueta": etiqueta, "tecnologia": ", ".join(tecnologias), "fase": fase,
+                "inicio": fecha_ini, "fin": fecha_fin,
+                "duracion_ms": duracion_ms, "duracion_hms": format_duration(duracion_ms),
+            })
+    df_global = pd.DataFrame(filas)
+    df_tiempos = df_global.groupby("tecnologia").agg(
+        inicio=("inicio", "min"), fin=("fin", "max"), duracion_ms=("duracion_ms", "sum")
+    ).reset_index()
+    df_tiempos["duracion_hms"] = df_tiempos["duracion_ms"].apply(format_duration)
+    df_etiquetas = df_global.groupby("etiqueta").agg(
+        tecnologia=("tecnologia", lambda x: ", ".join(sorted(set(sum((s.split(", ") for s in x), []))))),
+        inicio=("inicio", "min"), fin=("fin", "max")
+    ).reset_index()
+    df_etiquetas["duracion_ms"] = (df_etiquetas["fin"] - df_etiquetas["inicio"]).dt.total_seconds() * 1000
+    df_etiquetas["duracion_ms"] = df_etiquetas["duracion_ms"].astype(int)
+    df_etiquetas["duracion_hms"] = df_etiquetas["duracion_ms"].apply(format_duration)
+    df_etiquetas["comentarios"] = df_etiquetas["etiqueta"].map(errores_etiqueta).fillna("")
+    df_medias = df_global.groupby("tecnologia").agg(
+        numero_etiquetas=("etiqueta", "count"), suma_total_ms=("duracion_ms", "sum")
+    ).reset_index()
+    df_medias["media_ms"] = (df_medias["suma_total_ms"] / df_medias["numero_etiquetas"]).astype(int)
+    df_medias["media_hms"] = df_medias["media_ms"].apply(format_duration)
+    return {"GlobalData": df_global, "Tiempos": df_tiempos,
+            "Etiquetas": df_etiquetas, "Medias Tecnologia": df_medias}
+
+
+def _iguales(a: dict, b: dict) -> bool:
+    for hoja in a:
+        try:
+            pd.testing.assert_frame_equal(a[hoja], b[hoja], check_dtype=False)
+        except AssertionError as e:
+            print(f"    [DIFERENCIA] {hoja}: {str(e).splitlines()[0]}")
+            return False
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--eventos", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    ap.add_argument("--max-anterior", type=int, default=100_000,
+                    help="No ejecuta el bucle anterior por encima de este número de eventos")
+    args = ap.parse_args()
+
+    print(f"{'eventos':>10} {'etiquetas':>10} {'anterior (s)':>13} {'vectorizado (s)':>16} {'mejora':>8}")
+    for n in args.eventos:
+        df = generar_eventos(n)
+        errores = {e: "error" for e in df["etiqueta"].unique()[::50]}
+        t0 = time.perf_counter()
+        nuevo = calcular_metricas(df, errores)
+        t_nuevo = time.perf_counter() - t0
+        t_ant, mejora = float("nan"), ""
+        if n <= args.max_anterior:
+            t0 = time.perf_counter()
+            anterior = calcular_metricas_anterior(df, errores)
+            t_ant = time.perf_counter() - t0
+            mejora = f"x{t_ant / t_nuevo:.1f}" if _iguales(anterior, nuevo) else "DISTINTO"
+        print(f"{len(df):>10} {df['etiqueta'].nunique():>10} {t_ant:>13.3f} {t_nuevo:>16.3f} {mejora:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de memoria por evento del almacén columnar (logparser.almacen).
+
+Genera eventos como los que salen del parseo (cada campo es un str nuevo,
+igual que los grupos de una expresión regular) y compara la memoria que
+ocupan guardados como:
+  * lista de dicts (como se acumulaban antes las filas de procesos)
+  * DataFrame con columnas de objetos str y con el dtype str de pandas
+  * AlmacenEventos (arrays tipados + diccionarios)
+  * el DataFrame categórico que devuelve AlmacenEventos.a_dataframe()
+comprobando que el DataFrame del almacén tiene los mismos datos.
+
+Uso:
+    python benchmarks/bench_almacen.py [--eventos 500000] [--etiquetas 5000] [--tecnologias 20]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import pandas as pd  # noqa: E402
+
+from logparser.almacen import AlmacenEventos  # noqa: E402
+from logparser.fechas import a_datetime64  # noqa: E402
+
+ESQUEMA = {"fecha": "fecha", "evento": "categoria", "etiqueta": "categoria", "tecnologia": "categoria",
+           "fase": "categoria"}
+FASES = ("BUILD", "DEPLOY", "TEST", "SETUP")
+
+
+def _eventos(n, etiquetas, tecnologias):
+    rnd = random.Random(1)
+    inicio = 1_714_550_400  # 2024-05-01
+    # "".join crea un str nuevo por campo, como match.groups()
+    return [(inicio + i, "".join(rnd.choice(("STARTED", "ENDED"))), "".join(f"CR-{rnd.randrange(etiquetas)}"),
+             "".join(f"tec{rnd.randrange(tecnologias)}"), "".join(rnd.choice(FASES)))
+            for i in range(n)]
+
+
+def _tamano_dicts(filas):
+    # Cada dict más cada objeto distinto al que apunta (los str repetidos del log son objetos distintos)
+    vistos = {}
+    for fila in filas:
+        for valor in fila.values():
+            vistos[id(valor)] = valor
+    return sys.getsizeof(filas) + sum(map(sys.getsizeof, filas)) + sum(map(sys.getsizeof, vistos.values()))
+
+
+def _dicts(eventos):
+    return [dict(zip(ESQUEMA, e)) for e in eventos]
+
+
+def _dataframe(eventos):
+    df = pd.DataFrame(eventos, columns=list(ESQUEMA))
+    df["fecha"] = a_datetime64(df["fecha"].to_numpy())
+    return df
+
+
+def _almacen(eventos):
+    almacen = AlmacenEventos(ESQUEMA)
+    for evento in eventos:
+        almacen.agregar(*evento)
+    return almacen
+
+
+def _medir(funcion, *args):
+    t0 = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--eventos", type=int, default=500_000)
+    ap.add_argument("--etiquetas", type=int, default=5000)
+    ap.add_argument("--tecnologias", type=int, default=20)
+    args = ap.parse_args()
+
+    eventos = _eventos(args.eventos, args.etiquetas, args.tecnologias)
+    print(f"\n== {args.eventos} eventos, {args.etiquetas} etiquetas, {args.tecnologias} tecnologías ==")
+    filas, t_dicts = _medir(_dicts, eventos)
+    texto, t_texto = _medir(_dataframe, eventos)
+    almacen, t_almacen = _medir(_almacen, eventos)
+    categorico, t_categorico = _medir(almacen.a_dataframe)
+    objetos = texto.astype({c: object for c, t in ESQUEMA.items() if t == "categoria"})
+    medidas = {
+        "lista de dicts": (_tamano_dicts(filas), t_dicts),
+        "DataFrame objetos": (objetos.memory_usage(deep=True).sum(), None),
+        "DataFrame str": (texto.memory_usage(deep=True).sum(), t_texto),
+        "AlmacenEventos": (almacen.memoria(), t_almacen),
+        "-> a_dataframe()": (categorico.memory_usage(deep=True).sum(), t_categorico),
+    }
+    base = medidas["lista de dicts"][0]
+    for nombre, (tamano, segundos) in medidas.items():
+        tiempo = f"{segundos:6.2f} s" if segundos is not None else ""
+        print(f"  {nombre:<20} {tamano / args.eventos:8.1f} B/evento  ({base / tamano:5.1f}x menos que los dicts)  {tiempo}")
+    igual = "OK" if categorico.astype(texto.dtypes.to_dict()).equals(texto) else "DIFERENTE"
+    print(f"  mismos datos que el DataFrame de texto: [{igual}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la lectura de consolas planas, comprimidas y en zip (logparser.entradas).
+
+Sobre una consola de promoción sintética mide la extracción completa
+(EscanerPromocion) leyendo:
+  * el fichero plano con read() por bloques y con mmap
+  * el .gz descomprimiendo antes a disco (el flujo anterior) y en streaming
+  * el miembro de un zip en streaming
+comprobando que todas las variantes extraen lo mismo.
+
+Uso:
+    python benchmarks/bench_entradas.py [--etiquetas 20000] [--ruido 20]
+"""
+import argparse
+import gzip
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from logparser import entradas  # noqa: E402
+from logparser.generar_metricas import escanear_log  # noqa: E402
+from logparser.sintetico import generar_consola_promocion  # noqa: E402
+
+
+def _firma(escaner):
+    return escaner.n_eventos, escaner.tecnologias, escaner.errores, escaner.df_procesos().to_dict("records")
+
+
+def _plano_read(ruta: Path):
+    umbral, entradas._UMBRAL_MMAP = entradas._UMBRAL_MMAP, float("inf")
+    try:
+        return escanear_log(ruta)
+    finally:
+        entradas._UMBRAL_MMAP = umbral
+
+
+def _plano_mmap(ruta: Path):
+    umbral, entradas._UMBRAL_MMAP = entradas._UMBRAL_MMAP, 0
+    try:
+        return escanear_log(ruta)
+    finally:
+        entradas._UMBRAL_MMAP = umbral
+
+
+def _gz_a_disco(ruta: Path):
+    destino = ruta.with_suffix("")  # x.html.gz -> x.html
+    with gzip.open(ruta, "rb") as origen, open(destino, "wb") as f:
+        shutil.copyfileobj(origen, f, 1 << 20)
+    try:
+        return escanear_log(destino)
+    finally:
+        destino.unlink()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--etiquetas", type=int, default=20_000)
+    ap.add_argument("--ruido", type=int, default=20)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plano = generar_consola_promocion(Path(tmp) / "consola.html", etiquetas=args.etiquetas, ruido=args.ruido)
+        comprimido = Path(tmp) / "comprimido" / "consola.html.gz"
+        comprimido.parent.mkdir()
+        with open(plano, "rb") as origen, gzip.open(comprimido, "wb", compresslevel=6) as f:
+            shutil.copyfileobj(origen, f, 1 << 20)
+        archivo = Path(tmp) / "consolas.zip"
+        with zipfile.ZipFile(archivo, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.write(plano, "consola.html")
+
+        mb = plano.stat().st_size / 1e6
+        print(f"\n== {mb:.1f} MB | .gz {comprimido.stat().st_size / 1e6:.1f} MB "
+              f"| .zip {archivo.stat().st_size / 1e6:.1f} MB ==")
+        variantes = {
+            "plano read()": (_plano_read, plano),
+            "plano mmap": (_plano_mmap, plano),
+            "gz a disco": (_gz_a_disco, comprimido),
+            "gz streaming": (escanear_log, comprimido),
+            "zip streaming": (escanear_log, archivo / "consola.html"),
+        }
+        referencia = None
+        for nombre, (funcion, ruta) in variantes.items():
+            t0 = time.perf_counter()
+            resultado = _firma(funcion(ruta))
+            segundos = time.perf_counter() - t0
+            if referencia is None:
+                referencia = resultado
+            igual = "OK" if resultado == referencia else "DIFERENTE"
+            print(f"  {nombre:<14} {segundos:8.2f} s  {mb / segundos:7.1f} MB/s  [{igual}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la decodificación de marcas de tiempo ("AAAA.MM.DD hh:mm:ss").
+
+Extrae las marcas de tiempo de una consola sintética (en el orden del log,
+con sus repeticiones del mismo segundo) y compara:
+  * datetime.strptime por marca (el camino anterior de los parsers)
+  * pandas.to_datetime con formato fijo sobre la columna completa
+  * logparser.fechas.segundos por marca + a_datetime64 vectorizado
+comprobando que las tres dan las mismas fechas.
+
+Uso:
+    python benchmarks/bench_fechas.py [--tablas 20000] [--ruido 20]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import pandas as pd  # noqa: E402
+
+from logparser.fechas import FORMATO, DecodificadorFechas, a_datetime64  # noqa: E402
+from logparser.parser_table_download import _TS_RE  # noqa: E402
+from logparser.sintetico import generar_consola_table_download  # noqa: E402
+
+
+def _strptime(marcas):
+    return pd.Series([datetime.strptime(m, FORMATO) for m in marcas]).astype("datetime64[us]")
+
+
+def _pandas(marcas):
+    return pd.to_datetime(pd.Series(marcas), format=FORMATO).astype("datetime64[us]")
+
+
+def _decodificador(marcas):
+    segundos = DecodificadorFechas().segundos
+    return pd.Series(a_datetime64([segundos(m) for m in marcas]))
+
+
+VARIANTES = {"strptime": _strptime, "pandas": _pandas, "decodificador": _decodificador}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tablas", type=int, default=20_000)
+    ap.add_argument("--ruido", type=int, default=20)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generar_consola_table_download(Path(tmp) / "consola.html", tablas=args.tablas, ruido=args.ruido)
+        marcas = _TS_RE.findall(path.read_text(encoding="utf-8"))
+    distintas = len(set(marcas))
+    print(f"\n== {len(marcas)} marcas de tiempo ({distintas} distintas) ==")
+    referencia = None
+    for nombre, funcion in VARIANTES.items():
+        t0 = time.perf_counter()
+        resultado = funcion(marcas)
+        segundos = time.perf_counter() - t0
+        if referencia is None:
+            referencia = resultado
+        igual = "OK" if resultado.equals(referencia) else "DIFERENTE"
+        print(f"  {nombre:<14} {segundos:8.3f} s  {len(marcas) / segundos:12.0f} marcas/s  [{igual}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la descarga de consolas de Jenkins (logparser.jenkins).
+
+Levanta un Jenkins simulado (tests/jenkins_simulado.py) con N consolas de
+promoción sintéticas y una latencia por petición, y mide la extracción de
+todas las builds:
+  * secuencial: urllib por build (una conexión cada vez), HTML a disco y
+    parseo del fichero (el flujo de descargar con el navegador)
+  * logparser.jenkins: peticiones concurrentes sobre el pool de conexiones,
+    alimentando el escáner en streaming
+comprobando que ambas extraen lo mismo. Después repite la descarga con
+checkpoints sobre builds en curso (cada consola aparece en dos mitades) y
+cuenta los bytes transferidos en cada pasada.
+
+Uso:
+    python benchmarks/bench_jenkins.py [--builds 40] [--etiquetas 500] [--retardo 0.05] [--concurrencia 8]
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tests"))
+
+from logparser import jenkins  # noqa: E402
+from logparser.cache import CacheParseo  # noqa: E402
+from logparser.generar_metricas import escanear_log  # noqa: E402
+from logparser.incremental import Checkpoints  # noqa: E402
+from logparser.sintetico import generar_consola_promocion  # noqa: E402
+from jenkins_simulado import ServidorJenkins  # noqa: E402
+
+JOB = "PROYECTO"
+
+
+def _firma(tablas):
+    return tablas["eventos"].to_dict("records"), tablas["procesos"].to_dict("records")
+
+
+def _secuencial(url: str, builds, tmp: Path):
+    firmas = []
+    for n in builds:
+        with urllib.request.urlopen(f"{url}/job/{JOB}/{n}/logText/progressiveHtml") as respuesta:
+            destino = tmp / f"{JOB}_{n}.html"
+            destino.write_bytes(jenkins.PREFIJO_CONSOLA + respuesta.read())
+        escaner = escanear_log(destino)
+        firmas.append(_firma({"eventos": escaner.df_eventos(), "procesos": escaner.df_procesos()}))
+    return firmas
+
+
+async def _concurrente(url: str, builds, concurrencia: int, checkpoints=None):
+    cliente = jenkins.ClienteHTTP(url, concurrencia)
+    try:
+        resultados = await asyncio.gather(*(jenkins.descargar_build(cliente, JOB, n, "metricas", checkpoints)
+                                            for n in builds))
+    finally:
+        await cliente.cerrar()
+    # Las builds ya terminadas en el checkpoint no devuelven tablas
+    return [_firma(r[0]) if r[0] is not None else None for r in resultados], cliente
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--builds", type=int, default=40)
+    ap.add_argument("--etiquetas", type=int, default=500)
+    ap.add_argument("--retardo", type=float, default=0.05, help="Latencia simulada por petición (s)")
+    ap.add_argument("--concurrencia", type=int, default=8)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        builds = list(range(1, args.builds + 1))
+        (tmp / "raiz" / JOB).mkdir(parents=True)
+        for n in builds:
+            generar_consola_promocion(tmp / "raiz" / JOB / f"{n}.html", etiquetas=args.etiquetas, semilla=n)
+        descargas = tmp / "descargas"
+        descargas.mkdir()
+        mb = sum(p.stat().st_size for p in (tmp / "raiz" / JOB).iterdir()) / 1e6
+        print(f"\n== {args.builds} builds, {mb:.1f} MB, latencia {args.retardo * 1000:.0f} ms ==")
+
+        with ServidorJenkins(tmp / "raiz", retardo=args.retardo) as servidor:
+            t0 = time.perf_counter()
+            referencia = _secuencial(servidor.url, builds, descargas)
+            t_sec = time.perf_counter() - t0
+            print(f"  secuencial (urllib + disco)  {t_sec:7.2f} s  {servidor.conexiones:4d} conexiones")
+
+            conexiones = servidor.conexiones
+            t0 = time.perf_counter()
+            firmas, cliente = asyncio.run(_concurrente(servidor.url, builds, args.concurrencia))
+            t_con = time.perf_counter() - t0
+            igual = "OK" if firmas == referencia else "DIFERENTE"
+            print(f"  logparser.jenkins (x{args.concurrencia})     {t_con:7.2f} s  "
+                  f"{servidor.conexiones - conexiones:4d} conexiones  x{t_sec / t_con:.1f}  [{igual}]")
+
+        # Builds en curso: la primera pasada ve media consola, la segunda solo pide
+        # el resto y la tercera no pide nada (todas terminadas en el checkpoint)
+        checkpoints = Checkpoints(CacheParseo(tmp / "cache"))
+        with ServidorJenkins(tmp / "raiz", pasos=2, retardo=args.retardo) as servidor:
+            for pasada in (1, 2, 3):
+                peticiones = servidor.peticiones
+                firmas, cliente = asyncio.run(_concurrente(servidor.url, builds, args.concurrencia, checkpoints))
+                igual = ""
+                if pasada == 2:
+                    igual = "  [OK]" if firmas == referencia else "  [DIFERENTE]"
+                print(f"  pasada {pasada} con checkpoints      {cliente.bytes_recibidos / 1e6:7.2f} MB recibidos (gzip) "
+                      f"{servidor.peticiones - peticiones:4d} peticiones{igual}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de extremo a extremo sobre consolas sintéticas (logparser.sintetico).
+
+Mide por etapa (lectura, extracción, agregación, Excel, gráficas) el tiempo,
+el throughput y el pico de memoria de:
+  * generar_metricas       (consola de promoción)
+  * parser_table_download  (consola table download)
+  * generar_graficas       (a partir del Excel de métricas)
+
+Los resultados se guardan en benchmarks/resultados/<fecha>.json y se comparan
+con la ejecución anterior (o con --comparar FICHERO): las etapas que empeoran
+más del umbral se marcan como regresión y el script termina con código 1.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--etiquetas 5000] [--tablas 20000] [--concurrencia 8]
+                                        [--repeticiones 3] [--sin-memoria] [--comparar FICHERO]
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import pandas as pd  # noqa: E402
+
+from logparser import generar_graficas, generar_metricas, parser_table_download, sintetico  # noqa: E402
+
+DIR_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+
+def _contar_lineas(path: Path) -> int:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return sum(1 for _ in f)
+
+
+def medir(funcion, repeticiones: int, memoria: bool):
+    """Devuelve (resultado, mejor tiempo en s, pico de memoria en MB o None)."""
+    mejor = float("inf")
+    resultado = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return resultado, mejor, pico
+
+
+def _etapa(nombre, funcion, args, **extra):
+    resultado, segundos, pico = medir(funcion, args.repeticiones, not args.sin_memoria)
+    fila = {"etapa": nombre, "segundos": round(segundos, 4), "pico_mb": None if pico is None else round(pico, 2)}
+    if "lineas" in extra:
+        fila["lineas_s"] = round(extra.pop("lineas") / segundos) if segundos else None
+    fila.update(extra)
+    print(f"  {nombre:<28} {segundos:8.3f} s" + (f"  pico {pico:8.1f} MB" if pico is not None else "")
+          + "".join(f"  {k}={v}" for k, v in fila.items() if k not in ("etapa", "segundos", "pico_mb")))
+    return resultado, fila
+
+
+def bench_metricas(tmp: Path, args) -> list:
+    log = sintetico.generar_consola_promocion(tmp / "promocion.html", etiquetas=args.etiquetas,
+                                              concurrencia=args.concurrencia, ruido=args.ruido)
+    n_lineas = _contar_lineas(log)
+    print(f"\n== generar_metricas: {log.stat().st_size / 1e6:.1f} MB, {n_lineas} líneas ==")
+    filas = []
+
+    def leer():
+        with open(log, "r", encoding="utf-8") as f:
+            for _ in f:
+                pass
+    filas.append(_etapa("metricas.lectura", leer, args, lineas=n_lineas)[1])
+
+    escaner, fila = _etapa("metricas.extraccion", lambda: generar_metricas.escanear_log(log), args, lineas=n_lineas)
+    fila["eventos"] = escaner.n_eventos
+    filas.append(fila)
+
+    df_eventos = escaner.df_eventos()
+    hojas, fila = _etapa("metricas.agregacion",
+                         lambda: generar_metricas.calcular_metricas(df_eventos, escaner.errores, escaner.bloques_error), args)
+    filas.append(fila)
+    hojas["Procesos"] = escaner.df_procesos()
+
+    xlsx = tmp / "promocion_METRICAS.xlsx"
+    filas.append(_etapa("metricas.excel", lambda: generar_metricas.escribir_excel(xlsx, hojas), args,
+                        filas_excel=sum(len(df) for df in hojas.values()))[1])
+    return filas, xlsx
+
+
+def bench_table_download(tmp: Path, args) -> list:
+    log = sintetico.generar_consola_table_download(tmp / "td.html", tablas=args.tablas,
+                                                   concurrencia=args.concurrencia, ruido=args.ruido)
+    n_lineas = _contar_lineas(log)
+    print(f"\n== parser_table_download: {log.stat().st_size / 1e6:.1f} MB, {n_lineas} líneas ==")
+    filas = []
+
+    def leer():
+        for _ in parser_table_download._leer_en_bloques(log):
+            pass
+    filas.append(_etapa("table_download.lectura", leer, args, lineas=n_lineas)[1])
+
+    (df, inicio, fin), fila = _etapa(
+        "table_download.extraccion",
+        lambda: parser_table_download.parse_table_download_console(parser_table_download._leer_en_bloques(log)),
+        args, lineas=n_lineas)
+    fila["eventos"] = len(df)
+    filas.append(fila)
+
+    hojas, fila = _etapa("table_download.agregacion",
+                         lambda: parser_table_download._build_sheets(df, inicio, fin), args)
+    filas.append(fila)
+    filas.append(_etapa("table_download.excel",
+                        lambda: parser_table_download._write_excel(log, hojas), args)[1])
+    return filas
+
+
+def bench_graficas(tmp: Path, xlsx: Path, args) -> list:
+    print("\n== generar_graficas ==")
+    filas = []
+
+    def leer():
+        return (pd.read_excel(xlsx, sheet_name="Tiempos", engine="openpyxl"),
+                pd.read_excel(xlsx, sheet_name="Etiquetas", engine="openpyxl"))
+    (df_tiempos, df_etiquetas), fila = _etapa("graficas.lectura_excel", leer, args)
+    filas.append(fila)
+
+    def render():
+        generar_graficas.figura_tiempos(df_tiempos).write_html(tmp / "tiempos.html")
+        generar_graficas.figura_etiquetas(df_etiquetas).write_html(tmp / "etiquetas.html")
+    filas.append(_etapa("graficas.render", render, args, barras=len(df_etiquetas))[1])
+    return filas
+
+
+def comparar(actual: dict, anterior: dict, umbral: float) -> int:
+    previas = {f["etapa"]: f for f in anterior["etapas"]}
+    regresiones = 0
+    print(f"\n== Comparación con {anterior['fecha']} (umbral {umbral:.0%}) ==")
+    for fila in actual["etapas"]:
+        previa = previas.get(fila["etapa"])
+        if not previa or not previa["segundos"]:
+            continue
+        ratio = fila["segundos"] / previa["segundos"]
+        marca = "REGRESIÓN" if ratio > 1 + umbral else ("mejora" if ratio < 1 - umbral else "")
+        regresiones += marca == "REGRESIÓN"
+        print(f"  {fila['etapa']:<28} {previa['segundos']:8.3f} s -> {fila['segundos']:8.3f} s  x{ratio:5.2f} {marca}")
+    return regresiones
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--etiquetas", type=int, default=5000)
+    ap.add_argument("--tablas", type=int, default=20000)
+    ap.add_argument("--concurrencia", type=int, default=8)
+    ap.add_argument("--ruido", type=int, default=10)
+    ap.add_argument("--repeticiones", type=int, default=3)
+    ap.add_argument("--sin-memoria", action="store_true", help="No mide el pico de memoria (más rápido)")
+    ap.add_argument("--comparar", type=Path, default=None, help="Resultado previo (por defecto: el último guardado)")
+    ap.add_argument("--umbral", type=float, default=0.10, help="Empeoramiento relativo considerado regresión")
+    ap.add_argument("--no-guardar", action="store_true")
+    args = ap.parse_args()
+
+    etapas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        filas, xlsx = bench_metricas(tmp, args)
+        etapas += filas
+        etapas += bench_table_download(tmp, args)
+        etapas += bench_graficas(tmp, xlsx, args)
+
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "parametros": {k: v for k, v in vars(args).items() if k in ("etiquetas", "tablas", "concurrencia", "ruido", "repeticiones")},
+        "etapas": etapas,
+    }
+
+    previo = args.comparar
+    if previo is None and DIR_RESULTADOS.exists():
+        existentes = sorted(DIR_RESULTADOS.glob("*.json"))
+        previo = existentes[-1] if existentes else None
+    regresiones = 0
+    if previo is not None:
+        anterior = json.loads(Path(previo).read_text(encoding="utf-8"))
+        if anterior.get("parametros") != resultado["parametros"]:
+            print(f"\n[WARN] {previo} usa otros parámetros; la comparación es orientativa.")
+        regresiones = comparar(resultado, anterior, args.umbral)
+
+    if not args.no_guardar:
+        DIR_RESULTADOS.mkdir(exist_ok=True)
+        salida = DIR_RESULTADOS / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+        salida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n[OK] Resultados guardados en {salida}")
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del prefiltro de literales (logparser.reglas) en los escáneres.
+
+Compara, sobre consolas sintéticas con cada vez más ruido, el recorrido
+anterior (todas las expresiones regulares sobre cada línea, en Python) con
+el escáner actual (prefiltro sobre el bloque completo y expresiones solo en
+las líneas candidatas). Para cada variante mide tiempo y throughput (MB/s,
+líneas/s) y comprueba que ambas extraen exactamente lo mismo.
+
+Uso:
+    python benchmarks/bench_reglas.py [--etiquetas 2000] [--tablas 5000] [--ruido 10 50 200]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from logparser import parser_table_download as td  # noqa: E402
+from logparser.fechas import a_datetime  # noqa: E402
+from logparser.generar_metricas import EscanerPromocion, escanear_log  # noqa: E402
+from logparser.sintetico import generar_consola_promocion, generar_consola_table_download  # noqa: E402
+
+
+def _promocion_sin_prefiltro(path: Path):
+    escaner = EscanerPromocion()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            escaner.procesar(line.rstrip("\n"))
+    return escaner
+
+
+def _firma_promocion(escaner):
+    return escaner.inicios, escaner.fines, escaner.tecnologias, escaner.df_procesos().to_dict("records"), escaner.errores
+
+
+def _table_download_sin_prefiltro(path: Path):
+    # Bucle por línea anterior a logparser.reglas
+    events, log_start, log_end = {}, None, None
+    for line in td._iter_console_lines(td._leer_en_bloques(path)):
+        m_ts = td._TS_RE.search(line)
+        if m_ts:
+            ts = datetime.strptime(m_ts.group(1), "%Y.%m.%d %H:%M:%S")
+            if log_start is None or ts < log_start:
+                log_start = ts
+            if log_end is None or ts > log_end:
+                log_end = ts
+            for m in (td._TO_PATH_RE.search(line), td._DL_ECHO_RE.search(line)):
+                if m:
+                    e = events.get(m.group(1))
+                    events[m.group(1)] = (ts, ts) if e is None else (min(e[0], ts), max(e[1], ts))
+    return events, log_start, log_end
+
+
+def _table_download_con_prefiltro(path: Path):
+    events, log_start, log_end = td._extraer_eventos(td._iter_console_lines(td._leer_en_bloques(path)))
+    # Los escáneres guardan segundos desde la época (logparser.fechas)
+    return {t: (a_datetime(i), a_datetime(f)) for t, (i, f) in events.items()}, log_start, log_end
+
+
+def _medir(funcion, path: Path):
+    t0 = time.perf_counter()
+    resultado = funcion(path)
+    return resultado, time.perf_counter() - t0
+
+
+def _comparar(titulo, path: Path, variantes, firma=lambda r: r):
+    mb = path.stat().st_size / 1e6
+    with open(path, "rb") as f:
+        n = sum(1 for _ in f)
+    print(f"\n== {titulo}: {n} líneas ({mb:.1f} MB) ==")
+    referencia = None
+    for nombre, funcion in variantes.items():
+        resultado, segundos = _medir(funcion, path)
+        resultado = firma(resultado)
+        if referencia is None:
+            referencia = resultado
+        igual = "OK" if resultado == referencia else "DIFERENTE"
+        print(f"  {nombre:<16} {segundos:8.2f} s  {mb / segundos:7.1f} MB/s  {n / segundos:10.0f} líneas/s  [{igual}]")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--etiquetas", type=int, default=2000)
+    ap.add_argument("--tablas", type=int, default=5000)
+    ap.add_argument("--ruido", type=int, nargs="+", default=[10, 50, 200], help="Líneas de ruido por fase/tabla")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ruido in args.ruido:
+            path = generar_consola_promocion(Path(tmp) / f"promocion_{ruido}.html", etiquetas=args.etiquetas,
+                                             ruido=ruido)
+            _comparar(f"promoción, ruido {ruido}", path,
+                      {"sin prefiltro": _promocion_sin_prefiltro, "prefiltro": escanear_log}, _firma_promocion)
+            path = generar_consola_table_download(Path(tmp) / f"td_{ruido}.html", tablas=args.tablas, ruido=ruido)
+            _comparar(f"table download, ruido {ruido}", path,
+                      {"sin prefiltro": _table_download_sin_prefiltro, "prefiltro": _table_download_con_prefiltro})
+
+
+if __name__ == "__main__":
+    main()
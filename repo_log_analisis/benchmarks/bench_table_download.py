@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de extracción de la consola en parser_table_download.
+
+Compara el camino anterior (HTML completo en memoria + BeautifulSoup +
+get_text + splitlines) con el extractor en streaming sobre consolas
+sintéticas de distintos tamaños. Para cada variante mide:
+  * tiempo y throughput (MB/s, líneas/s)
+  * pico de memoria Python (tracemalloc, en una segunda pasada para no
+    penalizar el tiempo)
+y comprueba que ambas producen exactamente los mismos eventos.
+
+Uso:
+    python benchmarks/bench_table_download.py [--tablas 10000 50000 ...]
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from logparser.parser_table_download import (  # noqa: E402
+    _extraer_eventos,
+    _iter_console_lines,
+    _leer_en_bloques,
+)
+from logparser.sintetico import generar_consola_table_download  # noqa: E402
+
+
+def _legacy(path: Path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        html_text = f.read()
+    soup = BeautifulSoup(html_text, "html.parser")
+    pre = soup.find("pre") or soup.select_one("#main-panel pre, #main-panel #out")
+    text = pre.get_text("\n") if pre else soup.get_text("\n")
+    return _extraer_eventos(text.splitlines())
+
+
+def _streaming(path: Path):
+    return _extraer_eventos(_iter_console_lines(_leer_en_bloques(path)))
+
+
+VARIANTES = {"bs4 (anterior)": _legacy, "streaming": _streaming}
+
+
+def medir(funcion, path: Path):
+    t0 = time.perf_counter()
+    resultado = funcion(path)
+    segundos = time.perf_counter() - t0
+    tracemalloc.start()
+    funcion(path)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, segundos, pico
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tablas", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for tablas in args.tablas:
+            path = generar_consola_table_download(Path(tmp) / f"consola_{tablas}.html", tablas=tablas)
+            mb = path.stat().st_size / 1e6
+            with open(path, "r", encoding="utf-8") as f:
+                n = sum(1 for _ in f)
+            print(f"\n== {tablas} tablas, {n} líneas ({mb:.1f} MB) ==")
+            referencia = None
+            for nombre, funcion in VARIANTES.items():
+                resultado, segundos, pico = medir(funcion, path)
+                if referencia is None:
+                    referencia = resultado
+                igual = "OK" if resultado == referencia else "DIFERENTE"
+                print(f"  {nombre:<16} {segundos:8.2f} s  {mb / segundos:7.1f} MB/s  "
+                      f"{n / segundos:10.0f} líneas/s  pico {pico / 1e6:8.1f} MB  [{igual}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+@echo off
+SETLOCAL
+
+:: Ruta base
+SET "BASE_DIR=C:\RepositorioLocal\LABORATORIO\Analisis_logs_Jenkins"
+SET "METRICAS_DIR=%BASE_DIR%\METRICAS"
+
+:: Descarga las consolas de un rango de builds directamente desde Jenkins y
+:: genera METRICAS\<PROYECTO>\<PROYECTO>_<n>.html_METRICAS.xlsx y sus gráficas,
+:: sin guardar ni renombrar los HTML a mano. Al repetirlo solo se descarga lo nuevo.
+:: El token de API se lee de la variable JENKINS_TOKEN.
+echo === Descarga de consolas desde Jenkins ===
+set /p JENKINS_URL=URL de Jenkins (https://...): 
+set /p JOB=Job (carpeta/PROYECTO): 
+set /p BUILDS=Builds (ej. 120-150 160): 
+set /p JENKINS_USER=Usuario: 
+IF "%JENKINS_TOKEN%"=="" set /p JENKINS_TOKEN=Token de API: 
+
+FOR %%P IN ("%JOB:/=\%") DO SET "PROYECTO=%%~nxP"
+
+SET "PYTHONPATH=%~dp0..\src;%PYTHONPATH%"
+python -m logparser.jenkins "%JENKINS_URL%" --job "%JOB%" --builds %BUILDS% --salida "%METRICAS_DIR%\%PROYECTO%"
+
+echo Proceso completado.
+PAUSE
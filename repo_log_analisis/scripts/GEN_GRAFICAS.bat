@@ -19,9 +19,10 @@ echo Procesando: !XLSX_FILE!
 echo Trazas guardadas en: !LOG_TRACE!
 
 :: Ejecutar script y redirigir su salida
+SET "PYTHONPATH=%~dp0..\src;%PYTHONPATH%"
 echo === GRAFICA TRZ: %DATE% %TIME% === >> "!LOG_TRACE!"
-echo Ejecutando: generar_graficas.py "!XLSX_FILE!" >> "!LOG_TRACE!"
-python generar_graficas.py "!XLSX_FILE!" >> "!LOG_TRACE!" 2>&1
+echo Ejecutando: logparser.generar_graficas "!XLSX_FILE!" >> "!LOG_TRACE!"
+python -m logparser.generar_graficas "!XLSX_FILE!" >> "!LOG_TRACE!" 2>&1
 
 :: Registrar estado de ejecución
 IF ERRORLEVEL 1 (
@@ -23,10 +23,9 @@ IF EXIST "!RENAMED_HTML!" (
     echo 🔁 Archivo renombrado a: !RENAMED_HTML!
 )
 
-:: Ejecutar scripts con nombre limpio
-python generar_metricas.py "!RENAMED_HTML!"
-SET "METRICAS_NAME=!RENAMED_HTML:.html=_METRICAS.xlsx!"
-python generar_graficas.py "!METRICAS_NAME!"
+:: Métricas y gráficas en un solo proceso (sin releer el Excel generado)
+SET "PYTHONPATH=%~dp0..\src;%PYTHONPATH%"
+python -m logparser "!RENAMED_HTML!"
 
 echo Proceso completado.
 PAUSE
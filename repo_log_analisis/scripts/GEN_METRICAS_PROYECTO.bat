@@ -29,23 +29,20 @@ echo Procesando archivos en: !RUTA_LOGS_PROY!
 echo Guardando métricas en:  !RUTA_METRICAS_PROY!
 echo.
 
-:: Recorre todos los archivos .html en la carpeta seleccionada
-FOR %%F IN ("!RUTA_LOGS_PROY!\*.html") DO (
-    echo ▸ Generando métricas para: %%~nxF
-    python generar_metricas.py "%%~fF"
-
-    :: Detectar nombre del Excel generado
-    SET "NOMBRE_LOG=%%~nxF"
-    SET "NOMBRE_XLSX=!NOMBRE_LOG:.html=_METRICAS.xlsx!"
-
-    IF EXIST "!NOMBRE_XLSX!" (
-        move /Y "!NOMBRE_XLSX!" "!RUTA_METRICAS_PROY!\"
-        echo ✔ Guardado en !RUTA_METRICAS_PROY!\!NOMBRE_XLSX!
-    ) ELSE (
-        echo ⚠ No se generó el Excel esperado: !NOMBRE_XLSX!
-    )
-    echo.
+:: Procesa todos los .html de la carpeta en un único proceso por lotes
+:: (pool de procesos; JOBS vacío = todos los núcleos)
+SET "PYTHONPATH=%~dp0..\src;%PYTHONPATH%"
+SET "JOBS="
+set /p JOBS=Procesos en paralelo (Enter = todos los nucleos): 
+IF "!JOBS!"=="" (
+    python -m logparser.lote --parser metricas --salida "!RUTA_METRICAS_PROY!" "!RUTA_LOGS_PROY!"
+) ELSE (
+    python -m logparser.lote --parser metricas --jobs !JOBS! --salida "!RUTA_METRICAS_PROY!" "!RUTA_LOGS_PROY!"
 )
+IF ERRORLEVEL 1 (
+    echo ⚠ Algunos logs no se pudieron procesar. Revisa el resumen anterior.
+)
+echo.
 
 echo ✅ Proceso finalizado.
 PAUSE
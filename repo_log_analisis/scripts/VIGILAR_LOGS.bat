@@ -0,0 +1,19 @@
+@echo off
+SETLOCAL
+
+:: Ruta base
+SET "BASE_DIR=C:\RepositorioLocal\LABORATORIO\Analisis_logs_Jenkins"
+SET "LOGS_DIR=%BASE_DIR%\logs"
+SET "METRICAS_DIR=%BASE_DIR%\METRICAS"
+
+:: Deja un proceso vigilando logs\<PROYECTO>\*.html: cada consola nueva o
+:: modificada genera METRICAS\<PROYECTO>\<log>_METRICAS.xlsx y sus gráficas.
+echo Vigilando: %LOGS_DIR%
+echo Métricas:  %METRICAS_DIR%
+echo (Ctrl+C para detener)
+echo.
+
+SET "PYTHONPATH=%~dp0..\src;%PYTHONPATH%"
+python -m logparser.vigilar "%LOGS_DIR%" --salida "%METRICAS_DIR%"
+
+PAUSE
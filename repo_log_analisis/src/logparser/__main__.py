@@ -0,0 +1,5 @@
+import sys
+
+from logparser.pipeline import main
+
+sys.exit(main())
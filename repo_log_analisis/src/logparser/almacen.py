@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Almacén columnar compacto de eventos.
+
+Tecnología, etiqueta, fase o tipo de evento se repiten miles de veces; en
+una lista de dicts (o en columnas de objetos) cada aparición es un str de
+Python con su cabecera. Aquí cada columna es un array tipado:
+  * categoria  código int32 en un diccionario de valores distintos
+  * entero     int64
+  * fecha      int64, segundos desde la época (logparser.fechas); None = NaT
+y a_dataframe() lo convierte en un DataFrame con columnas Categorical (las
+categorías ordenadas, para que groupby/sort den el mismo orden que con str)
+y datetime64, sin pasar por objetos Python por fila.
+
+cargar_proyecto() reúne en un solo almacén una hoja (GlobalData por defecto)
+de todas las builds de una carpeta de métricas, para análisis entre builds:
+    python -m logparser.almacen METRICAS/PROYECTO [--hoja GlobalData] [--parquet eventos.parquet]
+"""
+import argparse
+import sys
+from array import array
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TIPOS = ("categoria", "entero", "fecha")
+_NAT = np.iinfo(np.int64).min  # el entero que datetime64 interpreta como NaT
+
+ESQUEMA_GLOBAL = {"build": "categoria", "etiqueta": "categoria", "tecnologia": "categoria", "fase": "categoria",
+                  "inicio": "fecha", "fin": "fecha", "duracion_ms": "entero"}
+
+
+class Diccionario:
+    """Valores distintos de una columna categórica, con su código por orden de aparición."""
+
+    def __init__(self, valores=()):
+        self.valores = list(valores)
+        self._codigos = {v: i for i, v in enumerate(self.valores)}
+
+    def codigo(self, valor) -> int:
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def __len__(self):
+        return len(self.valores)
+
+    # Solo se serializan los valores: el índice inverso se reconstruye
+    def __getstate__(self):
+        return self.valores
+
+    def __setstate__(self, valores):
+        self.__init__(valores)
+
+
+class AlmacenEventos:
+    """
+    Filas añadidas de una en una (agregar) o por bloques (extender) a arrays
+    tipados según `esquema` (columna -> uno de TIPOS, en orden).
+    """
+
+    def __init__(self, esquema: dict):
+        for columna, tipo in esquema.items():
+            if tipo not in TIPOS:
+                raise ValueError(f"Tipo desconocido para '{columna}': {tipo} (opciones: {', '.join(TIPOS)})")
+        self.esquema = dict(esquema)
+        self._datos = {c: array("i" if t == "categoria" else "q") for c, t in self.esquema.items()}
+        self._diccionarios = {c: Diccionario() for c, t in self.esquema.items() if t == "categoria"}
+
+    def __len__(self):
+        return len(next(iter(self._datos.values()))) if self._datos else 0
+
+    def agregar(self, *valores):
+        """Una fila, en el orden del esquema. Las fechas van en segundos desde la época."""
+        for (columna, tipo), valor in zip(self.esquema.items(), valores):
+            if tipo == "categoria":
+                self._datos[columna].append(-1 if valor is None else self._diccionarios[columna].codigo(valor))
+            elif tipo == "fecha":
+                self._datos[columna].append(_NAT if valor is None else valor)
+            else:
+                self._datos[columna].append(valor)
+
+    def extender(self, df: pd.DataFrame, **constantes):
+        """Añade las filas de `df` (columnas del esquema) y, en las columnas de `constantes`, ese valor fijo."""
+        n = len(df)
+        for columna, tipo in self.esquema.items():
+            if columna in constantes:
+                valor = constantes[columna]
+                codigo = self._diccionarios[columna].codigo(valor) if tipo == "categoria" else valor
+                bloque = np.full(n, codigo)
+            elif tipo == "categoria":
+                codigos, unicos = pd.factorize(df[columna])
+                traduccion = np.array([self._diccionarios[columna].codigo(v) for v in unicos], dtype=np.int32)
+                bloque = np.where(codigos < 0, -1, traduccion[codigos] if len(unicos) else -1)
+            elif tipo == "fecha":
+                bloque = pd.to_datetime(df[columna]).to_numpy(dtype="datetime64[s]").view("int64")
+            else:
+                bloque = df[columna].to_numpy(dtype="int64")
+            self._datos[columna].frombytes(np.ascontiguousarray(bloque, dtype=self._datos[columna].typecode).tobytes())
+        return self
+
+    def a_dataframe(self) -> pd.DataFrame:
+        columnas = {}
+        for columna, tipo in self.esquema.items():
+            datos = np.frombuffer(self._datos[columna], dtype=self._datos[columna].typecode)
+            if tipo == "categoria":
+                valores = self._diccionarios[columna].valores
+                # Categorías ordenadas: se traducen los códigos (orden de aparición -> orden alfabético)
+                orden = np.argsort(np.array(valores, dtype=object), kind="stable")
+                rango = np.empty(len(valores), dtype=np.int32)
+                rango[orden] = np.arange(len(valores), dtype=np.int32)
+                codigos = np.where(datos >= 0, rango[datos] if len(valores) else -1, -1)
+                columnas[columna] = pd.Categorical.from_codes(codigos, categories=[valores[i] for i in orden])
+            elif tipo == "fecha":
+                columnas[columna] = datos.astype("datetime64[s]").astype("datetime64[us]")
+            else:
+                columnas[columna] = datos.copy()  # el array puede seguir creciendo
+        return pd.DataFrame(columnas)
+
+    def memoria(self) -> int:
+        """Bytes de los arrays más los valores distintos de los diccionarios (aprox.)."""
+        total = sum(a.itemsize * len(a) for a in self._datos.values())
+        return total + sum(sys.getsizeof(v) for d in self._diccionarios.values() for v in d.valores)
+
+
+def cargar_proyecto(directorio, hoja: str = "GlobalData", esquema: dict = None) -> AlmacenEventos:
+    """Una hoja de todas las builds de `directorio` (*_METRICAS.xlsx o columnar) en un almacén con columna build."""
+    from logparser.historico import _normalizar, build_de_salida
+    from logparser.panel import salidas_metricas
+    from logparser.salidas import leer_hoja
+    almacen = AlmacenEventos(esquema or ESQUEMA_GLOBAL)
+    for ruta in salidas_metricas(directorio):
+        try:
+            df = _normalizar(leer_hoja(ruta, hoja))
+        except Exception as e:  # un Excel dañado no impide cargar el resto
+            print(f"[WARN] {ruta.name}: {type(e).__name__}: {e}")
+            continue
+        almacen.extender(df, build=build_de_salida(ruta))
+    return almacen
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Carga una hoja de todas las builds de un proyecto en memoria compacta.")
+    ap.add_argument("directorio", type=Path, help="Carpeta con los *_METRICAS.xlsx (o directorios columnares)")
+    ap.add_argument("--hoja", default="GlobalData", help="Hoja a cargar (columnas de ESQUEMA_GLOBAL)")
+    ap.add_argument("--parquet", type=Path, default=None, help="Guarda la tabla conjunta en Parquet")
+    args = ap.parse_args(argv)
+    if not args.directorio.is_dir():
+        print(f"[ERROR] Carpeta no válida: {args.directorio}")
+        return 2
+    almacen = cargar_proyecto(args.directorio, args.hoja)
+    df = almacen.a_dataframe()
+    objetos = df.astype({c: object for c, t in almacen.esquema.items() if t == "categoria"})
+    print(f"[OK] {df['build'].nunique()} builds, {len(df)} filas | almacén {almacen.memoria() / 1e6:.2f} MB "
+          f"| DataFrame categórico {df.memory_usage(deep=True).sum() / 1e6:.2f} MB "
+          f"| con objetos str {objetos.memory_usage(deep=True).sum() / 1e6:.2f} MB")
+    if args.parquet:
+        df.to_parquet(args.parquet, index=False)
+        print(f"[OK] Generado: {args.parquet}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
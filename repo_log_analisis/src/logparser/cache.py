@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché en disco de resultados de parseo, direccionada por contenido.
+
+La clave es sha256(contenido del log, ya descomprimido: ver logparser.entradas)
++ nombre del parser + versión del parser, de modo que una consola que no ha cambiado nunca se vuelve a parsear
+(aunque se renombre o se mueva) y un cambio en la lógica de extracción
+invalida solo las entradas de ese parser al subir su versión.
+
+Cada entrada es un directorio con:
+  * una tabla por DataFrame extraído (Parquet si pyarrow está instalado,
+    si no pickle de pandas; ambos conservan los tipos de columna)
+  * meta.json con los valores escalares (log_start/log_end, errores...)
+
+Para no releer las consolas que no han cambiado, el hash de cada fichero se
+recuerda en <caché>/huellas por (ruta, tamaño, mtime_ns): mientras esos tres
+coincidan, la clave sale del índice sin abrir el fichero (los zip se miran por
+el tamaño y el mtime del zip).
+
+El tamaño total se limita expulsando las entradas menos usadas (LRU por mtime).
+Los checkpoints del parseo incremental (logparser.incremental) se guardan en
+<caché>/incremental y se gestionan con los mismos comandos.
+
+Configuración por entorno:
+  LOGPARSER_CACHE      directorio de la caché (por defecto ~/.cache/logparser)
+                       o "off" para desactivarla
+  LOGPARSER_CACHE_MB   tamaño máximo en MB (por defecto 2048)
+
+Uso:
+    python -m logparser.cache --info
+    python -m logparser.cache --limpiar [--parser metricas|table_download]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+VERSION_CACHE = 1
+# Un fichero modificado hace menos de esto puede cambiar otra vez sin que cambie su mtime
+_MARGEN_MTIME_NS = 2_000_000_000
+
+try:
+    import pyarrow  # noqa: F401
+    _FORMATO = "parquet"
+except ImportError:
+    _FORMATO = "pkl"
+
+
+def hash_fichero(path) -> str:
+    from logparser.entradas import bloques
+    h = hashlib.sha256()
+    for bloque in bloques(path):
+        h.update(bloque)
+    return h.hexdigest()
+
+
+def _serializar(valor):
+    if isinstance(valor, datetime):
+        return {"__datetime__": valor.isoformat()}
+    raise TypeError(f"Tipo no serializable en meta: {type(valor).__name__}")
+
+
+def _deserializar(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class CacheParseo:
+    def __init__(self, directorio=None, tamano_maximo_mb=None):
+        entorno = os.environ.get("LOGPARSER_CACHE", "")
+        self.activa = entorno.lower() != "off"
+        base = directorio or (entorno if self.activa and entorno else Path.home() / ".cache" / "logparser")
+        self.directorio = Path(base) / f"v{VERSION_CACHE}"
+        mb = tamano_maximo_mb or int(os.environ.get("LOGPARSER_CACHE_MB", "2048"))
+        self.tamano_maximo = mb * 1024 * 1024
+
+    @property
+    def directorio_incremental(self) -> Path:
+        return self.directorio.parent / "incremental"
+
+    @property
+    def directorio_huellas(self) -> Path:
+        return self.directorio.parent / "huellas"
+
+    def _ruta_huella(self, ruta) -> Path:
+        return self.directorio_huellas / f"{hashlib.sha1(str(Path(ruta).resolve()).encode('utf-8')).hexdigest()}.json"
+
+    def firma(self, ruta) -> dict:
+        """Tamaño y mtime_ns con los que se recuerda el hash de `ruta` (los del zip si va dentro de uno)."""
+        from logparser.entradas import miembro_zip
+        zip_ = miembro_zip(ruta)
+        st = os.stat(zip_[0] if zip_ else ruta)
+        return {"tamano": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def hash_indexado(self, ruta, firma: dict):
+        """Hash recordado para `ruta` si su firma no ha cambiado; None si hay que leerla."""
+        if not self.activa:
+            return None
+        try:
+            with open(self._ruta_huella(ruta), "r", encoding="utf-8") as f:
+                registro = json.load(f)
+            if {k: registro.get(k) for k in firma} == firma:
+                return registro["sha256"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def indexar(self, ruta, firma: dict, digest: str):
+        """Recuerda `digest` para `ruta` con la firma tomada antes de leerla."""
+        if not self.activa or time.time_ns() - firma["mtime_ns"] <= _MARGEN_MTIME_NS:
+            return
+        try:
+            self.directorio_huellas.mkdir(parents=True, exist_ok=True)
+            tmp = self.directorio_huellas / f".tmp-{uuid.uuid4().hex}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({**firma, "sha256": digest}, f)
+            os.replace(tmp, self._ruta_huella(ruta))
+        except OSError:
+            pass  # sin índice solo se pierde el atajo
+
+    def hash_contenido(self, ruta) -> str:
+        """hash_fichero(ruta), leído del índice si la ruta tiene el mismo tamaño y mtime que la última vez."""
+        firma = self.firma(ruta)
+        digest = self.hash_indexado(ruta, firma)
+        if digest is None:
+            digest = hash_fichero(ruta)
+            self.indexar(ruta, firma, digest)
+        return digest
+
+    def clave(self, ruta, parser: str, version: str, digest: str = None) -> str:
+        """Clave de la entrada; `digest` evita releer la ruta si su hash ya se conoce."""
+        return f"{parser}-{version}-{digest or self.hash_contenido(ruta)}"
+
+    def obtener(self, clave: str):
+        """Devuelve (tablas, meta) o None si la entrada no existe o está corrupta."""
+        if not self.activa:
+            return None
+        entrada = self.directorio / clave
+        meta_path = entrada / "meta.json"
+        if not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f, object_hook=_deserializar)
+            tablas = {}
+            for nombre in meta.pop("__tablas__"):
+                fichero = next(entrada.glob(f"{nombre}.*"))
+                tablas[nombre] = pd.read_parquet(fichero) if fichero.suffix == ".parquet" else pd.read_pickle(fichero)
+        except Exception:
+            shutil.rmtree(entrada, ignore_errors=True)
+            return None
+        os.utime(entrada)  # marca de uso para la expulsión LRU
+        return tablas, meta
+
+    def guardar(self, clave: str, tablas: dict, meta: dict):
+        if not self.activa:
+            return
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        tmp = self.directorio / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir()
+        try:
+            for nombre, df in tablas.items():
+                if _FORMATO == "parquet":
+                    df.to_parquet(tmp / f"{nombre}.parquet", index=False)
+                else:
+                    df.to_pickle(tmp / f"{nombre}.pkl")
+            with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+                json.dump({**meta, "__tablas__": list(tablas)}, f, default=_serializar, ensure_ascii=False)
+            destino = self.directorio / clave
+            shutil.rmtree(destino, ignore_errors=True)
+            os.replace(tmp, destino)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self._expulsar()
+
+    def entradas(self):
+        if not self.directorio.exists():
+            return []
+        return [p for p in self.directorio.iterdir() if p.is_dir() and not p.name.startswith(".tmp-")]
+
+    @staticmethod
+    def _tamano(entrada: Path) -> int:
+        return sum(f.stat().st_size for f in entrada.iterdir())
+
+    def tamano_total(self) -> int:
+        return sum(self._tamano(e) for e in self.entradas())
+
+    def _expulsar(self):
+        entradas = sorted(self.entradas(), key=lambda e: e.stat().st_mtime)
+        tamanos = {e: self._tamano(e) for e in entradas}
+        total = sum(tamanos.values())
+        for entrada in entradas:
+            if total <= self.tamano_maximo:
+                break
+            shutil.rmtree(entrada, ignore_errors=True)
+            total -= tamanos[entrada]
+
+    def invalidar(self, parser: str = None) -> int:
+        """Borra todas las entradas (o solo las de un parser). Devuelve cuántas se borraron."""
+        borradas = 0
+        for entrada in self.entradas():
+            if parser is None or entrada.name.startswith(f"{parser}-"):
+                shutil.rmtree(entrada, ignore_errors=True)
+                borradas += 1
+        if parser is None:
+            shutil.rmtree(self.directorio_huellas, ignore_errors=True)
+        return borradas
+
+
+def parsear_con_cache(ruta, parser: str, version: str, funcion_parseo, usar_cache: bool = True):
+    """
+    Devuelve (tablas, meta) para `ruta`, usando la caché si hay una entrada
+    válida; si no, llama a funcion_parseo(ruta) -> (tablas, meta) y la guarda.
+    """
+    cache = CacheParseo() if usar_cache else None
+    if cache is None or not cache.activa:
+        return funcion_parseo(ruta)
+    clave = cache.clave(ruta, parser, version)
+    encontrado = cache.obtener(clave)
+    if encontrado is not None:
+        return encontrado
+    tablas, meta = funcion_parseo(ruta)
+    try:
+        cache.guardar(clave, tablas, meta)
+    except OSError as e:
+        print(f"[WARN] No se pudo escribir en la caché ({e}).")
+    return tablas, meta
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Gestión de la caché de parseo de logparser.")
+    ap.add_argument("--info", action="store_true", help="Muestra ubicación, entradas y tamaño")
+    ap.add_argument("--limpiar", action="store_true", help="Invalida la caché")
+    ap.add_argument("--parser", default=None, help="Limita --limpiar a un parser (metricas, table_download)")
+    args = ap.parse_args(argv)
+    from logparser.incremental import Checkpoints
+    cache = CacheParseo()
+    checkpoints = Checkpoints(cache)
+    if args.limpiar:
+        print(f"[OK] Entradas eliminadas: {cache.invalidar(args.parser)} "
+              f"| checkpoints incrementales: {checkpoints.invalidar(args.parser)}")
+    if args.info or not args.limpiar:
+        entradas = cache.entradas()
+        print(f"Caché: {cache.directorio} ({'activa' if cache.activa else 'desactivada'})")
+        print(f"Entradas: {len(entradas)} | tamaño: {cache.tamano_total() / 1e6:.1f} MB "
+              f"| máximo: {cache.tamano_maximo / 1e6:.0f} MB")
+        incrementales = checkpoints.entradas()
+        print(f"Checkpoints incrementales: {len(incrementales)} "
+              f"| tamaño: {sum(p.stat().st_size for p in incrementales) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
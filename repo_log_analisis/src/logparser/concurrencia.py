@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Análisis de paralelismo sobre los intervalos (etiqueta, fase, inicio, fin) de
+la hoja GlobalData.
+
+Sumar duracion_ms por tecnología (hoja Tiempos) cuenta varias veces el tiempo
+en que varias etiquetas se ejecutan a la vez. Aquí se recorre la línea de
+tiempo con un barrido (sweep line) vectorizado, O(n log n), y se obtiene:
+
+  * Concurrencia        por tecnología y en total: tiempo real ocupado (unión
+                        de intervalos), suma de duraciones, paralelismo máximo
+                        y medio, e instante del pico
+  * Serie Concurrencia  nivel de concurrencia en cada cambio (escalonado),
+                        reducido a MAX_PUNTOS_SERIE puntos por ámbito
+                        conservando el máximo de cada tramo
+  * Ruta Critica        la cadena de fases encadenadas (cada una empieza
+                        cuando la anterior ya terminó) de mayor duración total
+
+La consola no declara dependencias entre fases, así que se considera que una
+fase puede depender de cualquier otra que haya terminado antes de su inicio.
+Los intervalos son semiabiertos [inicio, fin): una fase que empieza justo
+cuando otra termina no se solapa con ella. Una fase con varias tecnologías
+("AS400, ORACLE") cuenta en cada una de ellas y una sola vez en el total.
+"""
+import numpy as np
+import pandas as pd
+
+from logparser import perfil
+
+AMBITO_TOTAL = "TOTAL"
+MAX_PUNTOS_SERIE = 10_000
+COLUMNAS_CONCURRENCIA = ["tecnologia", "intervalos", "suma_ms", "union_ms", "union_hms",
+                         "paralelismo_max", "paralelismo_medio", "instante_pico"]
+COLUMNAS_SERIE = ["tecnologia", "instante", "nivel"]
+COLUMNAS_RUTA = ["paso", "etiqueta", "tecnologia", "fase", "inicio", "fin",
+                 "duracion_ms", "duracion_hms", "espera_ms"]
+
+
+def _a_ns(serie) -> np.ndarray:
+    return pd.to_datetime(serie).to_numpy(dtype="datetime64[ns]").astype("int64")
+
+
+def _intervalos_validos(df_global: pd.DataFrame) -> pd.DataFrame:
+    df = df_global.dropna(subset=["inicio", "fin"])
+    df = df.assign(inicio=pd.to_datetime(df["inicio"]).astype("datetime64[ns]"),
+                   fin=pd.to_datetime(df["fin"]).astype("datetime64[ns]"))
+    return df[df["fin"] > df["inicio"]]
+
+
+def barrido(grupos: np.ndarray, inicio: np.ndarray, fin: np.ndarray):
+    """
+    Barrido de varios grupos a la vez. `grupos` son códigos enteros e
+    inicio/fin instantes en ns (int64). Devuelve (grupo, instante, nivel,
+    tramo_ns): un punto por cambio de nivel dentro de cada grupo, con el nivel
+    vigente desde ese instante y la duración del tramo hasta el siguiente punto
+    del mismo grupo (0 en el último).
+    """
+    n = len(inicio)
+    t = np.concatenate([inicio, fin])
+    delta = np.concatenate([np.ones(n, dtype=np.int64), -np.ones(n, dtype=np.int64)])
+    g = np.concatenate([grupos, grupos])
+    # Por grupo, por instante y, a igual instante, primero los fines (-1)
+    orden = np.lexsort((delta, t, g))
+    t, delta, g = t[orden], delta[orden], g[orden]
+    # Los +1/-1 de cada grupo suman 0: el acumulado vuelve a 0 al cambiar de grupo
+    nivel = np.cumsum(delta)
+
+    ultimo = np.ones(len(t), dtype=bool)
+    ultimo[:-1] = (g[1:] != g[:-1]) | (t[1:] != t[:-1])
+    t, g, nivel = t[ultimo], g[ultimo], nivel[ultimo]
+
+    tramo = np.zeros(len(t), dtype=np.int64)
+    if len(t) > 1:
+        tramo[:-1] = np.where(g[1:] == g[:-1], t[1:] - t[:-1], 0)
+    return g, t, nivel, tramo
+
+
+def _por_tecnologia(df: pd.DataFrame) -> pd.Series:
+    """Tecnología de cada intervalo, indexada por su posición; "AS400, ORACLE" da una fila para cada una."""
+    tecnologias = pd.Series(df["tecnologia"].fillna("").astype(str).to_numpy(), dtype=object)
+    return tecnologias.str.split(", ").explode()
+
+
+def _barrido_por_ambito(df: pd.DataFrame):
+    # Ámbito 0 = TOTAL; 1..k = cada tecnología (un intervalo compartido cuenta en todas las suyas)
+    por_tecnologia = _por_tecnologia(df)
+    fila = por_tecnologia.index.to_numpy()
+    tecnologias = pd.Categorical(por_tecnologia.to_numpy())
+    ambitos = [AMBITO_TOTAL] + list(tecnologias.categories)
+    inicio, fin = _a_ns(df["inicio"]), _a_ns(df["fin"])
+    codigos = tecnologias.codes.astype(np.int64) + 1
+    grupos = np.concatenate([np.zeros(len(df), dtype=np.int64), codigos])
+    g, t, nivel, tramo = barrido(grupos, np.concatenate([inicio, inicio[fila]]), np.concatenate([fin, fin[fila]]))
+    return ambitos, pd.DataFrame({"ambito": g, "instante": t, "nivel": nivel, "tramo": tramo})
+
+
+def resumen_concurrencia(ambitos, puntos: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    from logparser.generar_metricas import formatear_duraciones
+    if puntos.empty:
+        return pd.DataFrame(columns=COLUMNAS_CONCURRENCIA)
+    ocupado = puntos["tramo"].where(puntos["nivel"] > 0, 0)
+    por_ambito = puntos.assign(ocupado=ocupado, ponderado=puntos["nivel"] * puntos["tramo"]).groupby("ambito")
+    resumen = por_ambito.agg(union_ns=("ocupado", "sum"), suma_ns=("ponderado", "sum"), paralelismo_max=("nivel", "max"))
+    resumen["instante_pico"] = pd.to_datetime(puntos.loc[por_ambito["nivel"].idxmax(), "instante"].to_numpy(), unit="ns")
+
+    intervalos = _por_tecnologia(df).value_counts()
+    resumen.index = [ambitos[i] for i in resumen.index]
+    resumen["intervalos"] = intervalos.reindex(resumen.index).fillna(len(df)).astype("int64")
+    resumen["suma_ms"] = resumen["suma_ns"] // 1_000_000
+    resumen["union_ms"] = resumen["union_ns"] // 1_000_000
+    resumen["union_hms"] = formatear_duraciones(resumen["union_ms"])
+    resumen["paralelismo_medio"] = (resumen["suma_ns"] / resumen["union_ns"]).round(2)
+    return resumen.rename_axis("tecnologia").reset_index()[COLUMNAS_CONCURRENCIA]
+
+
+def serie_concurrencia(ambitos, puntos: pd.DataFrame, max_puntos: int = MAX_PUNTOS_SERIE) -> pd.DataFrame:
+    """Nivel escalonado por ámbito; los ámbitos con más puntos se reducen al máximo por tramo."""
+    partes = []
+    for codigo, grupo in puntos.groupby("ambito", sort=True):
+        if len(grupo) > max_puntos:
+            t = grupo["instante"]
+            # Dividir antes de multiplicar: (t - t0) * max_puntos en ns desborda int64 a partir de ~10 días
+            cubo = ((t - t.iloc[0]) / (t.iloc[-1] - t.iloc[0] + 1) * max_puntos).astype("int64")
+            grupo = grupo.groupby(cubo.to_numpy()).agg(instante=("instante", "first"), nivel=("nivel", "max"))
+        partes.append(pd.DataFrame({"tecnologia": ambitos[codigo],
+                                    "instante": pd.to_datetime(grupo["instante"].to_numpy(), unit="ns"),
+                                    "nivel": grupo["nivel"].to_numpy()}))
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS_SERIE)
+    return pd.concat(partes, ignore_index=True)[COLUMNAS_SERIE]
+
+
+def ruta_critica(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cadena de fases no solapadas de mayor duración total (weighted interval
+    scheduling): orden por fin + búsqueda binaria del predecesor, O(n log n).
+    """
+    from logparser.generar_metricas import formatear_duraciones
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNAS_RUTA)
+    df = df.sort_values(["fin", "inicio"], kind="stable").reset_index(drop=True)
+    inicio, fin = _a_ns(df["inicio"]), _a_ns(df["fin"])
+    duracion = (fin - inicio).tolist()
+    # previo[i]: última fase (en orden de fin) que termina no después del inicio de i
+    previo = (np.searchsorted(fin, inicio, side="right") - 1).tolist()
+
+    mejor = [0] * (len(df) + 1)  # mejor[i + 1] = mejor cadena entre las fases 0..i
+    tomada = [False] * len(df)
+    for i, (d, p) in enumerate(zip(duracion, previo)):
+        con_i = d + mejor[p + 1]
+        if con_i > mejor[i]:
+            mejor[i + 1] = con_i
+            tomada[i] = True
+        else:
+            mejor[i + 1] = mejor[i]
+
+    cadena = []
+    i = len(df) - 1
+    while i >= 0:
+        if tomada[i]:
+            cadena.append(i)
+            i = previo[i]
+        else:
+            i -= 1
+    ruta = df.loc[cadena[::-1]].reset_index(drop=True)
+    ruta["duracion_ms"] = ((ruta["fin"] - ruta["inicio"]) // pd.Timedelta(milliseconds=1)).astype("int64")
+    ruta["duracion_hms"] = formatear_duraciones(ruta["duracion_ms"])
+    espera = (ruta["inicio"] - ruta["fin"].shift()) // pd.Timedelta(milliseconds=1)
+    ruta["espera_ms"] = espera.fillna(0).astype("int64")
+    ruta.insert(0, "paso", np.arange(1, len(ruta) + 1))
+    return ruta[COLUMNAS_RUTA]
+
+
+def serie_desde_intervalos(df: pd.DataFrame, max_puntos: int = MAX_PUNTOS_SERIE) -> pd.DataFrame:
+    """Serie Concurrencia de cualquier tabla con columnas tecnologia, inicio y fin (p. ej. Etiquetas)."""
+    ambitos, puntos = _barrido_por_ambito(_intervalos_validos(df))
+    return serie_concurrencia(ambitos, puntos, max_puntos)
+
+
+@perfil.medido("concurrencia")
+def hojas_concurrencia(df_global: pd.DataFrame) -> dict:
+    """Hojas Concurrencia, Serie Concurrencia y Ruta Critica a partir de GlobalData."""
+    df = _intervalos_validos(df_global)
+    perfil.contar(intervalos=len(df))
+    ambitos, puntos = _barrido_por_ambito(df)
+    return {
+        "Concurrencia": resumen_concurrencia(ambitos, puntos, df),
+        "Serie Concurrencia": serie_concurrencia(ambitos, puntos),
+        "Ruta Critica": ruta_critica(df),
+    }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura de consolas planas, comprimidas o dentro de un zip, sin descomprimir a disco.
+
+Una consola puede ser:
+  * x.html                  fichero plano; los grandes se leen con mmap
+                            (bloques memoryview sobre el mapa, sin copiar a
+                            un buffer intermedio)
+  * x.html.gz / .bz2 / .xz  descompresión en streaming con la biblioteca estándar
+  * x.html.zst              con compression.zstd (Python 3.14) o el paquete zstandard
+  * builds.zip/x.html       miembro de un zip: la ruta sigue dentro del archivo,
+                            como zipfile.Path; listar() expande un zip en sus
+                            consolas y se procesan una a una
+
+bloques() entrega el contenido descomprimido por bloques de bytes para los
+escáneres y para la huella de la caché (la misma consola plana o comprimida
+comparte entrada). ruta_logica() es la ruta que tendría la consola
+descomprimida junto al original ("x.html.gz" -> "x.html", "P/builds.zip/x.html"
+-> "P/x.html"); de ella salen los nombres de las salidas y el proyecto.
+
+Todos los parsers decodifican igual (nuevo_decodificador): UTF-8 con los
+bytes no válidos sustituidos por U+FFFD y \\r\\n / \\r convertidos en \\n.
+fin_de_consola() reconoce la línea "Finished: <resultado>" con la que Jenkins
+cierra la consola de una build terminada.
+"""
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+import mmap
+import os
+import re
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+EXTENSION_CONSOLA = ".html"
+_TAMANO_BLOQUE = 1 << 20
+_UMBRAL_MMAP = 16 << 20  # por debajo, read() es igual de rápido y no merece mapear
+# Última línea de la consola de una build terminada (en el HTML puede ir tras una etiqueta)
+_FIN_CONSOLA_RE = re.compile(r"^(?:<[^>\n]*>)*Finished: (?:SUCCESS|UNSTABLE|FAILURE|ABORTED|NOT_BUILT)\b", re.M)
+
+
+def _abrir_zstd(f):
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.ZstdFile(f)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Para leer consolas .zst hace falta Python 3.14 o el paquete zstandard "
+                          "(pip install zstandard)") from None
+    return zstandard.ZstdDecompressor().stream_reader(f, closefd=False)
+
+
+COMPRESORES = {
+    ".gz": lambda f: gzip.GzipFile(fileobj=f),
+    ".bz2": bz2.BZ2File,
+    ".xz": lzma.LZMAFile,
+    ".zst": _abrir_zstd,
+}
+
+
+def nuevo_decodificador():
+    """Decodificador incremental común: equivale a open(..., encoding="utf-8", errors="replace") en modo texto."""
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+
+
+def fin_de_consola(texto: str) -> bool:
+    """True si `texto` (líneas completas) contiene la línea con la que Jenkins cierra la consola."""
+    return "Finished: " in texto and _FIN_CONSOLA_RE.search(texto) is not None
+
+
+def es_consola(nombre: str) -> bool:
+    """'x.html' o 'x.html' comprimido ('x.html.gz', 'x.html.zst'...)."""
+    nombre = nombre.lower()
+    return nombre.endswith(EXTENSION_CONSOLA) or any(nombre.endswith(EXTENSION_CONSOLA + c) for c in COMPRESORES)
+
+
+def es_zip(ruta) -> bool:
+    ruta = Path(ruta)
+    return ruta.suffix.lower() == ".zip" and ruta.is_file()
+
+
+def miembro_zip(ruta):
+    """(zip, nombre del miembro) si `ruta` apunta dentro de un zip; si no, None."""
+    ruta = Path(ruta)
+    for padre in ruta.parents:
+        if padre.suffix.lower() == ".zip" and padre.is_file():
+            return padre, ruta.relative_to(padre).as_posix()
+    return None
+
+
+def es_plano(ruta) -> bool:
+    """Fichero sin comprimir fuera de un zip: admite mmap, seek y el parseo incremental."""
+    ruta = Path(ruta)
+    return ruta.suffix.lower() not in COMPRESORES and miembro_zip(ruta) is None
+
+
+def existe(ruta) -> bool:
+    m = miembro_zip(ruta)
+    if m is None:
+        return Path(ruta).is_file()
+    try:
+        with zipfile.ZipFile(m[0]) as zf:
+            zf.getinfo(m[1])
+        return True
+    except (KeyError, OSError, zipfile.BadZipFile):
+        return False
+
+
+def ruta_logica(ruta) -> Path:
+    """Ruta de la consola como si estuviera descomprimida junto al original."""
+    ruta = Path(ruta)
+    m = miembro_zip(ruta)
+    if m is not None:
+        ruta = m[0].parent / m[1]
+    if ruta.suffix.lower() in COMPRESORES:
+        ruta = ruta.with_suffix("")
+    return ruta
+
+
+def listar(ruta, patron: str = "*" + EXTENSION_CONSOLA) -> list:
+    """
+    Consolas de `ruta`: un directorio (las que cumplen `patron`, también
+    comprimidas, y las de cada zip), un zip (sus miembros) o una consola suelta.
+    """
+    ruta = Path(ruta)
+    if ruta.is_dir():
+        consolas, logicas = [], set()
+        for p in sorted(ruta.iterdir()):
+            if es_zip(p):
+                consolas.extend(listar(p, patron))
+            elif p.is_file() and ruta_logica(p).match(patron) and ruta_logica(p) not in logicas:
+                # "x.html" y "x.html.gz" son la misma consola: se queda la primera (la plana)
+                logicas.add(ruta_logica(p))
+                consolas.append(p)
+        return consolas
+    if es_zip(ruta):
+        with zipfile.ZipFile(ruta) as zf:
+            miembros = sorted(i.filename for i in zf.infolist() if not i.is_dir())
+        return [ruta / m for m in miembros if es_consola(m) and ruta_logica(m).match(patron)]
+    return [ruta]
+
+
+@contextmanager
+def abrir(ruta):
+    """Flujo binario con el contenido descomprimido de la consola."""
+    ruta = Path(ruta)
+    m = miembro_zip(ruta)
+    with zipfile.ZipFile(m[0]) if m else open(ruta, "rb") as origen:
+        with origen.open(m[1]) if m else _sin_cerrar(origen) as f:
+            compresor = COMPRESORES.get(ruta.suffix.lower())
+            if compresor is None:
+                yield f
+            else:
+                with compresor(f) as descomprimido:
+                    yield descomprimido
+
+
+@contextmanager
+def _sin_cerrar(f):
+    yield f
+
+
+def bloques(ruta, offset: int = 0, tamano: int = _TAMANO_BLOQUE):
+    """
+    Contenido de la consola a partir de `offset` (bytes descomprimidos), por
+    bloques. En ficheros planos grandes los bloques son memoryview sobre un
+    mmap: son válidos hasta pedir el siguiente y no deben guardarse.
+    """
+    if es_plano(ruta):
+        with open(ruta, "rb") as f:
+            total = os.fstat(f.fileno()).st_size
+            if total - offset >= _UMBRAL_MMAP:
+                with mmap.mmap(f.fileno(), total, access=mmap.ACCESS_READ) as mapa, memoryview(mapa) as vista:
+                    for inicio in range(offset, total, tamano):
+                        bloque = vista[inicio:inicio + tamano]
+                        try:
+                            yield bloque
+                        finally:
+                            bloque.release()
+                return
+            f.seek(offset)
+            yield from iter(lambda: f.read(tamano), b"")
+        return
+    with abrir(ruta) as f:
+        if offset:
+            f.seek(offset)  # en los comprimidos, descomprime y descarta hasta el offset
+        yield from iter(lambda: f.read(tamano), b"")
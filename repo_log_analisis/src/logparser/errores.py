@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Huellas de errores: el mismo fallo reconocido entre etiquetas y builds.
+
+El escáner de promoción guarda cada bloque de error completo (las líneas
+"... The following error occurred while executing this line:" encadenadas y
+el mensaje final) con su etiqueta CR/PF/RQ. normalizar() sustituye las partes
+que cambian de una ejecución a otra (rutas, fechas, etiquetas, hashes y
+números) y la huella es un hash corto del texto normalizado:
+    "D:/jenkins/workspace/CR-1234/build.xml:621: Compile failed"
+    "/opt/build/PF-77/build.xml:8: Compile failed"    -> build.xml:<n>: Compile failed
+Las hojas Etiquetas y Errores del Excel llevan la huella, su frecuencia en
+la consola y, con --historico, cuántas builds del proyecto la tienen
+(builds_historico).
+
+El índice persistente vive en el histórico SQLite (logparser.historico): la
+tabla errores (build, etiqueta, huella) indexada por huella y la tabla huellas
+con el patrón y un ejemplo. "Qué fallo se repite en las últimas 500 builds" es
+una consulta por huella, sin abrir ningún Excel:
+    python -m logparser.historico errores --db historico.sqlite [--proyecto P] [--ultimos 500] [--minimo 2]
+    python -m logparser.historico errores --db historico.sqlite --huella 3fa9c1b2d04e
+"""
+import hashlib
+import re
+
+import pandas as pd
+
+COLUMNAS_ERRORES = ["etiqueta", "huella", "frecuencia", "mensaje", "bloque"]
+
+# En orden: las rutas primero, así las etiquetas y números de sus carpetas desaparecen con ellas
+_VOLATILES = (
+    (re.compile(r"(?:[A-Za-z]:)?[\\/](?:[^\\/\s\"':]+[\\/])+"), "<ruta>/"),
+    (re.compile(r"\[?\d{4}[.\-/]\d{2}[.\-/]\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\]?"), "<fecha>"),
+    (re.compile(r"\b(?:CR|PF|RQ)-\d+\b", re.IGNORECASE), "<etiqueta>"),
+    (re.compile(r"\b[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}\b", re.IGNORECASE), "<uuid>"),
+    (re.compile(r"\b(?=[0-9a-f]*[a-f])(?=[0-9a-f]*\d)[0-9a-f]{7,}\b", re.IGNORECASE), "<hex>"),
+    (re.compile(r"\d+"), "<n>"),
+    (re.compile(r"[ \t]+"), " "),
+)
+
+
+def normalizar(bloque: str) -> str:
+    """Texto del bloque sin las partes volátiles, línea a línea y sin comillas."""
+    lineas = []
+    for linea in bloque.splitlines():
+        linea = linea.strip().strip('"').strip()
+        for patron, sustituto in _VOLATILES:
+            linea = patron.sub(sustituto, linea)
+        if linea:
+            lineas.append(linea)
+    return "\n".join(lineas)
+
+
+def huella(bloque: str) -> str:
+    """Identificador corto (12 hex) del bloque normalizado."""
+    return hashlib.sha1(normalizar(bloque).encode("utf-8")).hexdigest()[:12]
+
+
+def mensaje(bloque: str) -> str:
+    """Última línea del bloque: el mensaje que se muestra en comentarios."""
+    return bloque.rstrip().rsplit("\n", 1)[-1].strip().strip('"')
+
+
+def tabla_errores(bloques_error) -> pd.DataFrame:
+    """Hoja Errores: un bloque por fila, en orden, con su huella y cuántas veces aparece en la consola."""
+    df = pd.DataFrame([(etiqueta, huella(bloque), mensaje(bloque), bloque) for etiqueta, bloque in bloques_error],
+                      columns=["etiqueta", "huella", "mensaje", "bloque"], dtype=object)
+    df.insert(2, "frecuencia", df.groupby("huella")["huella"].transform("size").astype("int64"))
+    return df[COLUMNAS_ERRORES]
+
+
+def huellas_por_etiqueta(df_errores: pd.DataFrame) -> pd.DataFrame:
+    """Huella y frecuencia del último bloque de cada etiqueta (el mismo que da el comentario)."""
+    return df_errores.drop_duplicates("etiqueta", keep="last").set_index("etiqueta")[["huella", "frecuencia"]]
+
+
+def filas_indice(hojas: dict) -> list:
+    """(etiqueta, huella, patrón, bloque) de la hoja Errores, para el histórico."""
+    df = hojas.get("Errores")
+    if df is None or df.empty:
+        return []
+    # La huella se recalcula del bloque: releída de un Excel podría llegar como número
+    bloques = df["bloque"].fillna("").astype(str)
+    return [(str(e), huella(b), normalizar(b), b) for e, b in zip(df["etiqueta"], bloques)]
+
+
+def builds_por_huella(con, proyecto: str, huellas) -> dict:
+    """{huella: builds del proyecto en el histórico donde aparece}."""
+    huellas = sorted(set(huellas))
+    if not huellas:
+        return {}
+    marcas = ", ".join("?" * len(huellas))
+    filas = con.execute(
+        f"SELECT e.huella, COUNT(DISTINCT e.build_id) FROM errores e JOIN builds b ON b.id = e.build_id "
+        f"WHERE b.proyecto = ? AND e.huella IN ({marcas}) GROUP BY e.huella", [proyecto, *huellas]).fetchall()
+    return dict(filas)
+
+
+def recurrentes(con, proyecto: str = None, ultimos: int = None, minimo: int = 2) -> pd.DataFrame:
+    """
+    Huellas presentes en al menos `minimo` de las `ultimos` builds más recientes
+    (todas si es None), de la más repetida a la menos.
+    """
+    consulta = """
+        WITH sel AS (
+            SELECT id, proyecto, build, inicio FROM builds
+            WHERE (:proyecto IS NULL OR proyecto = :proyecto)
+            ORDER BY inicio DESC LIMIT :ultimos
+        )
+        SELECT e.huella, COUNT(DISTINCT e.build_id) AS builds, COUNT(*) AS apariciones,
+               COUNT(DISTINCT e.etiqueta) AS etiquetas, MIN(sel.inicio) AS primera, MAX(sel.inicio) AS ultima,
+               h.patron
+        FROM errores e JOIN sel ON e.build_id = sel.id JOIN huellas h ON h.huella = e.huella
+        GROUP BY e.huella
+        HAVING COUNT(DISTINCT e.build_id) >= :minimo
+        ORDER BY builds DESC, apariciones DESC, e.huella
+    """
+    df = pd.read_sql_query(consulta, con, params={"proyecto": proyecto, "ultimos": ultimos or -1, "minimo": minimo})
+    df["patron"] = df["patron"].str.replace("\n", " | ", regex=False)
+    return df
+
+
+def apariciones(con, huella_id: str) -> pd.DataFrame:
+    """Builds y etiquetas en las que aparece una huella, en orden cronológico."""
+    return pd.read_sql_query(
+        "SELECT b.proyecto, b.build, b.inicio, e.etiqueta FROM errores e JOIN builds b ON b.id = e.build_id "
+        "WHERE e.huella = :huella ORDER BY b.inicio, b.id", con, params={"huella": huella_id})
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Decodificación rápida de las marcas de tiempo de las consolas ("AAAA.MM.DD hh:mm:ss").
+
+datetime.strptime interpreta el formato en cada llamada y es de lo más caro
+del bucle de parseo. Aquí el formato es fijo: los campos se cortan por
+posición, la fecha de cada día ya visto se memoriza (una consola abarca pocos
+días) y, como muchas líneas seguidas comparten el mismo segundo, también se
+recuerda el último texto decodificado.
+
+El resultado son segundos enteros desde 1970-01-01, sin zona horaria (igual
+que los datetime ingenuos de strptime); a_datetime64() los convierte de una
+vez en una columna datetime64 y a_datetime() en un datetime suelto.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+FORMATO = "%Y.%m.%d %H:%M:%S"
+_EPOCA = date(1970, 1, 1).toordinal()
+_EPOCA_DATETIME = datetime(1970, 1, 1)
+_MAX_DIAS = 4096
+
+
+class DecodificadorFechas:
+    """
+    Convierte "AAAA.MM.DD hh:mm:ss" en segundos desde la época. El texto debe
+    venir ya validado por una expresión regular (dígitos en su sitio); fechas
+    u horas fuera de rango lanzan ValueError como strptime.
+    """
+
+    def __init__(self):
+        self._dias = {}             # "AAAA.MM.DD" -> segundos del día a las 00:00:00
+        self._ultimo_texto = None
+        self._ultimo_valor = None
+
+    def _dia(self, texto: str) -> int:
+        if texto[4] != "." or texto[7] != ".":
+            raise ValueError(f"Marca de tiempo no válida: {texto!r}")
+        dia = (date(int(texto[0:4]), int(texto[5:7]), int(texto[8:10])).toordinal() - _EPOCA) * 86400
+        if len(self._dias) >= _MAX_DIAS:
+            self._dias.clear()
+        self._dias[texto[:10]] = dia
+        return dia
+
+    def segundos(self, texto: str) -> int:
+        if texto == self._ultimo_texto:
+            return self._ultimo_valor
+        if len(texto) != 19:
+            raise ValueError(f"Marca de tiempo no válida: {texto!r}")
+        dia = self._dias.get(texto[:10])
+        if dia is None:
+            dia = self._dia(texto)
+        h, m, s = int(texto[11:13]), int(texto[14:16]), int(texto[17:19])
+        if h > 23 or m > 59 or s > 59:
+            raise ValueError(f"Marca de tiempo no válida: {texto!r}")
+        valor = dia + h * 3600 + m * 60 + s
+        self._ultimo_texto, self._ultimo_valor = texto, valor
+        return valor
+
+
+# Instancia compartida del proceso: la memoria de días no forma parte del estado de los escáneres
+segundos = DecodificadorFechas().segundos
+
+
+def a_datetime(valor: int) -> datetime:
+    return _EPOCA_DATETIME + timedelta(seconds=int(valor))
+
+
+def a_datetime64(valores, unidad: str = "us") -> np.ndarray:
+    """Segundos desde la época (secuencia o array de enteros) -> datetime64[unidad]."""
+    return np.asarray(valores, dtype="int64").astype("datetime64[s]").astype(f"datetime64[{unidad}]")
@@ -1,96 +1,240 @@
+import os
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from pathlib import Path
 
+from logparser import perfil
+from logparser.salidas import leer_hoja
+
 AUTORIA = "Autor: Proyecto Público"
 
-def crear_grafica_tiempos(excel_path):
-    try:
-        df_tiempos = pd.read_excel(excel_path, sheet_name="Tiempos", engine="openpyxl")
-        df_tiempos.columns = [c.strip().lower() for c in df_tiempos.columns]
-        if 'tecnología' in df_tiempos.columns:
-            df_tiempos = df_tiempos.rename(columns={'tecnología': 'nombre'})
-        if 'tecnologia' in df_tiempos.columns:
-            df_tiempos = df_tiempos.rename(columns={'tecnologia': 'nombre'})
-        posibles_duracion = [c for c in df_tiempos.columns if "duracion" in c or "duración" in c]
-        if not posibles_duracion or len(df_tiempos) == 0:
-            print("No hay datos suficientes para la gráfica de tiempos.")
-            return
-        col_duracion = posibles_duracion[0]
-        df_tiempos['fin'] = pd.to_datetime(df_tiempos['fin'])
-        df_tiempos['inicio'] = pd.to_datetime(df_tiempos['inicio'])
-        df_tiempos[col_duracion] = df_tiempos[col_duracion].astype(int)
-        df_tiempos['Label'] = df_tiempos['nombre']
+# Cómo se incluye plotly.js (varios MB) en cada HTML:
+#   incrustado  dentro del fichero (funciona sin conexión y sin ficheros extra)
+#   compartido  un único plotly-<versión>.min.js por carpeta, referenciado por todos
+#   cdn         desde cdn.plot.ly (requiere conexión al abrirlo)
+MODOS_PLOTLYJS = ("incrustado", "compartido", "cdn")
+# Filas (etiquetas) a partir de las que cambia el tipo de timeline:
+#   <= MAX_FILAS_SVG    px.timeline, una barra SVG por fila
+#   <= MAX_FILAS_WEBGL  segmentos Scattergl (WebGL) y sin rótulos en el eje Y
+#   >  MAX_FILAS_WEBGL  agregada: etiquetas activas por tecnología a lo largo del tiempo
+MAX_FILAS_SVG = 500
+MAX_FILAS_WEBGL = 20_000
+
+def asset_plotlyjs(directorio):
+    """Escribe una vez (por versión) plotly-<versión>.min.js en `directorio` y devuelve su ruta."""
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+    directorio = Path(directorio)
+    ruta = directorio / f"plotly-{get_plotlyjs_version()}.min.js"
+    if not ruta.exists():
+        directorio.mkdir(parents=True, exist_ok=True)
+        tmp = ruta.with_name(f".{ruta.name}.{os.getpid()}.tmp")  # varios workers a la vez
+        tmp.write_text(get_plotlyjs(), encoding="utf-8")
+        os.replace(tmp, ruta)
+    return ruta
+
+def incluir_plotlyjs(directorio, plotlyjs="incrustado"):
+    """Valor de include_plotlyjs de write_html/to_html para un HTML en `directorio`."""
+    if plotlyjs == "incrustado":
+        return True
+    if plotlyjs == "cdn":
+        return "cdn"
+    if plotlyjs == "compartido":
+        return asset_plotlyjs(directorio).name
+    raise ValueError(f"Modo de plotly.js desconocido: {plotlyjs} (opciones: {', '.join(MODOS_PLOTLYJS)})")
+
+def escribir_html(fig, salida, plotlyjs="incrustado"):
+    salida = Path(salida)
+    fig.write_html(salida, include_plotlyjs=incluir_plotlyjs(salida.parent, plotlyjs))
+
+def _estilo(fig, titulo_leyenda, etiquetas_y=True):
+    fig.update_yaxes(autorange="reversed", showticklabels=etiquetas_y)
+    fig.update_layout(
+        xaxis_tickformat="%H:%M",
+        legend_title_text=titulo_leyenda,
+        template="simple_white",
+        title_font_size=24,
+        title_x=0.5
+    )
+    return fig
+
+def _timeline_webgl(df, y, color, titulo, paleta):
+    # Un trazo Scattergl por color; cada fila es un segmento inicio-fin separado por None
+    fig = go.Figure()
+    grosor = max(1, min(12, 3000 // len(df)))
+    for i, (valor, grupo) in enumerate(df.groupby(color, sort=False)):
+        n = len(grupo)
+        x = np.empty(3 * n, dtype=object)
+        x[0::3] = grupo["inicio"].to_numpy(dtype=object)
+        x[1::3] = grupo["fin"].to_numpy(dtype=object)
+        x[2::3] = None
+        etiquetas = np.empty(3 * n, dtype=object)
+        etiquetas[0::3] = etiquetas[1::3] = grupo[y].to_numpy(dtype=object)
+        etiquetas[2::3] = None
+        fig.add_trace(go.Scattergl(
+            x=x, y=etiquetas, mode="lines", name=str(valor),
+            line=dict(color=paleta[i % len(paleta)], width=grosor),
+            hovertemplate="%{y}<br>%{x|%H:%M:%S}<extra>%{fullData.name}</extra>",
+        ))
+    fig.update_yaxes(type="category", categoryorder="array", categoryarray=df[y].tolist())
+    fig.update_layout(title=titulo)
+    return fig
+
+def _timeline_agregado(df, color, titulo, paleta):
+    # Demasiadas filas para dibujarlas una a una: nivel de concurrencia por tecnología
+    from logparser.concurrencia import AMBITO_TOTAL, serie_desde_intervalos
+    serie = serie_desde_intervalos(df.rename(columns={color: "tecnologia"})[["tecnologia", "inicio", "fin"]])
+    fig = px.line(serie, x="instante", y="nivel", color="tecnologia", line_shape="hv",
+                  render_mode="webgl", title=titulo, color_discrete_sequence=paleta)
+    fig.for_each_trace(lambda t: t.update(line_dash="dot") if t.name == AMBITO_TOTAL else None)
+    fig.update_layout(yaxis_title="Activas a la vez")
+    return fig
+
+def figura_timeline(df, y, color, titulo, paleta, titulo_leyenda):
+    """
+    Timeline de `df` (columnas inicio/fin, `y` y `color`) adaptado al número
+    de filas: SVG, WebGL o agregado (ver MAX_FILAS_SVG y MAX_FILAS_WEBGL).
+    """
+    n = len(df)
+    if n <= MAX_FILAS_SVG:
         fig = px.timeline(
-            df_tiempos,
+            df,
             x_start="inicio",
             x_end="fin",
-            y="Label",
-            color="Label",
-            title=f"Línea de tiempo Tecnologías<br><sup>{AUTORIA}</sup>",
-            color_discrete_sequence=px.colors.qualitative.Plotly
+            y=y,
+            color=color,
+            title=titulo,
+            color_discrete_sequence=paleta
         )
-        fig.update_yaxes(autorange="reversed")
-        fig.update_layout(
-            xaxis_tickformat="%H:%M",
-            legend_title_text='Tecnología',
-            template="simple_white",
-            title_font_size=24,
-            title_x=0.5
-        )
-        nombre_base = str(excel_path).replace(".html.", ".").replace("_METRICAS.xlsx", "")
-        salida = nombre_base + "_tiempos.html"
-        fig.write_html(salida)
+        return _estilo(fig, titulo_leyenda)
+    if n <= MAX_FILAS_WEBGL:
+        return _estilo(_timeline_webgl(df, y, color, titulo, paleta), titulo_leyenda, etiquetas_y=False)
+    fig = _timeline_agregado(df, color, titulo.replace("<br>", f" ({n} filas, agregada)<br>", 1), paleta)
+    fig.update_layout(xaxis_tickformat="%H:%M", legend_title_text=titulo_leyenda, template="simple_white",
+                      title_font_size=24, title_x=0.5)
+    return fig
+
+def tabla_tiempos(df_tiempos):
+    """Hoja Tiempos (de cualquiera de los parsers) con columnas nombre, inicio, fin y duracion."""
+    df_tiempos = df_tiempos.copy()
+    df_tiempos.columns = [c.strip().lower() for c in df_tiempos.columns]
+    if 'tecnología' in df_tiempos.columns:
+        df_tiempos = df_tiempos.rename(columns={'tecnología': 'nombre'})
+    if 'tecnologia' in df_tiempos.columns:
+        df_tiempos = df_tiempos.rename(columns={'tecnologia': 'nombre'})
+    posibles_duracion = [c for c in df_tiempos.columns if "duracion" in c or "duración" in c]
+    if not posibles_duracion or len(df_tiempos) == 0:
+        return None
+    col_duracion = posibles_duracion[0]
+    df_tiempos['fin'] = pd.to_datetime(df_tiempos['fin'])
+    df_tiempos['inicio'] = pd.to_datetime(df_tiempos['inicio'])
+    df_tiempos['duracion'] = df_tiempos[col_duracion].astype(int)
+    return df_tiempos
+
+def figura_tiempos(df_tiempos):
+    """Timeline por tecnología a partir de la hoja Tiempos. None si no hay datos."""
+    df_tiempos = tabla_tiempos(df_tiempos)
+    if df_tiempos is None:
+        return None
+    df_tiempos['Label'] = df_tiempos['nombre']
+    return figura_timeline(df_tiempos, "Label", "Label", f"Línea de tiempo Tecnologías<br><sup>{AUTORIA}</sup>",
+                           px.colors.qualitative.Plotly, 'Tecnología')
+
+def figura_etiquetas(df_etiquetas):
+    """Timeline por etiqueta a partir de la hoja Etiquetas. None si no hay datos."""
+    df_etiquetas = df_etiquetas.copy()
+    df_etiquetas.columns = [c.strip().lower() for c in df_etiquetas.columns]
+    # La hoja de table download usa "Numero etiqueta"
+    df_etiquetas = df_etiquetas.rename(columns={'numero etiqueta': 'etiqueta'})
+    if len(df_etiquetas) == 0:
+        return None
+    df_etiquetas = df_etiquetas.sort_values("inicio").drop_duplicates("etiqueta")
+    df_etiquetas['inicio'] = pd.to_datetime(df_etiquetas['inicio'])
+    df_etiquetas['fin'] = pd.to_datetime(df_etiquetas['fin'])
+    df_etiquetas['Label'] = df_etiquetas['etiqueta'] + " (" + df_etiquetas['tecnologia'] + ")"
+    return figura_timeline(df_etiquetas, "Label", "tecnologia", f"Línea de tiempo de etiquetas<br><sup>{AUTORIA}</sup>",
+                           px.colors.qualitative.Set2, 'Tecnología')
+
+def _nombre_base(excel_path):
+    # Acepta el Excel (<base>_METRICAS.xlsx) o su directorio columnar (<base>_METRICAS)
+    nombre = str(excel_path).rstrip("/\\").replace(".html.", ".").replace("_METRICAS.xlsx", "")
+    return nombre[:-len("_METRICAS")] if nombre.endswith("_METRICAS") else nombre
+
+@perfil.medido("graficas.render")
+def guardar_graficas(hojas, nombre_base, plotlyjs="incrustado"):
+    """
+    Genera las gráficas directamente desde los DataFrames en memoria
+    (sin escribir ni releer el Excel). Devuelve las rutas HTML generadas.
+    `plotlyjs` es uno de MODOS_PLOTLYJS.
+    """
+    generadas = []
+    for sufijo, hoja, figura in (("_tiempos.html", "Tiempos", figura_tiempos),
+                                 ("_etiquetas.html", "Etiquetas", figura_etiquetas)):
+        try:
+            fig = figura(hojas[hoja])
+            if fig is None:
+                print(f"No hay datos suficientes para la gráfica de {hoja.lower()}.")
+                continue
+            salida = str(nombre_base) + sufijo
+            escribir_html(fig, salida, plotlyjs)
+            print(f"Gráfica de {hoja.lower()} generada: {salida}")
+            generadas.append(Path(salida))
+        except Exception as e:
+            print(f"No se pudo generar la gráfica de {hoja.lower()}: {e}")
+    return generadas
+
+def crear_grafica_tiempos(excel_path, plotlyjs="incrustado"):
+    try:
+        with perfil.etapa("graficas.lectura"):
+            df_tiempos = leer_hoja(excel_path, "Tiempos")
+        with perfil.etapa("graficas.render"):
+            fig = figura_tiempos(df_tiempos)
+            if fig is None:
+                print("No hay datos suficientes para la gráfica de tiempos.")
+                return
+            salida = _nombre_base(excel_path) + "_tiempos.html"
+            escribir_html(fig, salida, plotlyjs)
         print(f"Gráfica de tiempos generada: {salida}")
     except Exception as e:
         print(f"No se pudo generar la gráfica de tiempos: {e}")
 
-def crear_grafica_etiquetas(excel_path):
+def crear_grafica_etiquetas(excel_path, plotlyjs="incrustado"):
     try:
-        df_etiquetas = pd.read_excel(excel_path, sheet_name="Etiquetas", engine="openpyxl")
-        df_etiquetas.columns = [c.strip().lower() for c in df_etiquetas.columns]
-        if len(df_etiquetas) == 0:
-            print("No hay datos suficientes para la gráfica de etiquetas.")
-            return
-        df_etiquetas = df_etiquetas.sort_values("inicio").drop_duplicates("etiqueta")
-        df_etiquetas['inicio'] = pd.to_datetime(df_etiquetas['inicio'])
-        df_etiquetas['fin'] = pd.to_datetime(df_etiquetas['fin'])
-        df_etiquetas['Label'] = df_etiquetas['etiqueta'] + " (" + df_etiquetas['tecnologia'] + ")"
-        fig = px.timeline(
-            df_etiquetas,
-            x_start="inicio",
-            x_end="fin",
-            y="Label",
-            color="tecnologia",
-            title=f"Línea de tiempo de etiquetas<br><sup>{AUTORIA}</sup>",
-            color_discrete_sequence=px.colors.qualitative.Set2
-        )
-        fig.update_yaxes(autorange="reversed")
-        fig.update_layout(
-            xaxis_tickformat="%H:%M",
-            legend_title_text='Tecnología',
-            template="simple_white",
-            title_font_size=24,
-            title_x=0.5
-        )
-        nombre_base = str(excel_path).replace(".html.", ".").replace("_METRICAS.xlsx", "")
-        salida = nombre_base + "_etiquetas.html"
-        fig.write_html(salida)
+        with perfil.etapa("graficas.lectura"):
+            df_etiquetas = leer_hoja(excel_path, "Etiquetas")
+        with perfil.etapa("graficas.render"):
+            fig = figura_etiquetas(df_etiquetas)
+            if fig is None:
+                print("No hay datos suficientes para la gráfica de etiquetas.")
+                return
+            salida = _nombre_base(excel_path) + "_etiquetas.html"
+            escribir_html(fig, salida, plotlyjs)
         print(f"Gráfica de etiquetas generada: {salida}")
     except Exception as e:
         print(f"No se pudo generar la gráfica de etiquetas: {e}")
 
 if __name__ == "__main__":
     import sys
-    import os
-    _logfile = "generar_graficas_log.txt"
-    _logfile = os.path.join(os.path.dirname(__file__), _logfile)
-    sys.stdout = open(_logfile, "a", encoding="utf-8")
-    sys.stderr = sys.stdout
-    print("\n--- EJECUCIÓN NUEVA ---")
     if len(sys.argv) < 2:
-        print("Uso: python generar_graficas.py archivo_METRICAS.xlsx")
+        print("Uso: python generar_graficas.py archivo_METRICAS.xlsx | directorio_METRICAS "
+              "[--plotlyjs incrustado|compartido|cdn] [--perfil [FICHERO.jsonl]] [--log FICHERO]")
     else:
-        excel_path = Path(sys.argv[1])
-        crear_grafica_tiempos(excel_path)
-        crear_grafica_etiquetas(excel_path)
\ No newline at end of file
+        import argparse
+        from contextlib import ExitStack, redirect_stderr, redirect_stdout
+        ap = argparse.ArgumentParser()
+        ap.add_argument("excel_path", type=Path)
+        ap.add_argument("--plotlyjs", choices=MODOS_PLOTLYJS, default="incrustado")
+        ap.add_argument("--log", type=Path, default=None, help="Añade los mensajes a este fichero en vez de a la consola")
+        perfil.agregar_argumentos(ap)
+        args = ap.parse_args()
+        with ExitStack() as pila:
+            if args.log:
+                # El registro de --perfil sin fichero sigue saliendo por la consola (perfil usa sys.__stderr__)
+                log = pila.enter_context(open(args.log, "a", encoding="utf-8"))
+                pila.enter_context(redirect_stdout(log))
+                pila.enter_context(redirect_stderr(log))
+                print("\n--- EJECUCIÓN NUEVA ---")
+            with perfil.perfilar_si(args.excel_path, perfil.opciones_perfil(args)):
+                crear_grafica_tiempos(args.excel_path, args.plotlyjs)
+                crear_grafica_etiquetas(args.excel_path, args.plotlyjs)
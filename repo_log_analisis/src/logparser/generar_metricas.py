@@ -1,9 +1,18 @@
+import copy
 import re
+from itertools import islice
 import pandas as pd
-from datetime import datetime
 from pathlib import Path
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
+
+from logparser import perfil
+from logparser.almacen import AlmacenEventos
+from logparser.concurrencia import hojas_concurrencia
+from logparser.entradas import bloques, es_plano, es_zip, fin_de_consola, nuevo_decodificador, ruta_logica
+from logparser.fechas import FORMATO, segundos
+from logparser.reglas import Regla, motor, registrar
+
+# Subir al cambiar la lógica de extracción: invalida las entradas de caché antiguas
+VERSION_PARSER = "4"
 
 def format_duration(ms):
     if pd.isnull(ms):
@@ -13,183 +22,452 @@ def format_duration(ms):
     minutes, seconds = divmod(remainder, 60)
     return f"{hours}h {minutes}m {seconds}s"
 
-def extraer_procesos(raw_lines):
-    EXCLUDE_TAGS = ("CR", "PF", "RQ")
-    VALID_NOMBRES = ("Orchestrator", "-", "EnvironmentPreparation")
-    filas = []
-    patron = re.compile(
-        r"\[(\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2})\]\s+\[([^\]]+)\]\s+\[([^\]]+)\]\s+\[([^\]]+)\]\s+(?:La fase|The) (\w+) (?:ha finalizado|phase has ended) in (\d+)ms",
-        re.IGNORECASE
-    )
-    for line in raw_lines:
-        m = patron.search(line)
-        if m:
-            fecha_str, nombre, tipo, descripcion, fase, duracion_ms = m.groups()
-            if nombre not in VALID_NOMBRES:
-                continue
-            if any(tag in descripcion for tag in EXCLUDE_TAGS):
-                continue
-            duracion_ms = int(duracion_ms)
-            if duracion_ms == 0:
-                continue
-            filas.append({
-                "Nombre": nombre,
-                "Tipo": tipo,
-                "Descripcion": descripcion,
-                "Fase": fase.upper(),
-                "Inicio": "",
-                "Fin": fecha_str,
-                "Duracion (ms)": duracion_ms,
-                "Duracion (h:m:s)": format_duration(duracion_ms)
-            })
-    columnas = ["Nombre", "Tipo", "Descripcion", "Fase", "Inicio", "Fin", "Duracion (ms)", "Duracion (h:m:s)"]
-    return pd.DataFrame(filas, columns=columnas)
+EXCLUDE_TAGS = ("CR", "PF", "RQ")
+VALID_NOMBRES = ("Orchestrator", "-", "EnvironmentPreparation")
+COLUMNAS_PROCESOS = ["Nombre", "Tipo", "Descripcion", "Fase", "Inicio", "Fin", "Duracion (ms)", "Duracion (h:m:s)"]
+# Filas de procesos en el almacén columnar: "Inicio" va vacío y "Duracion (h:m:s)" sale de la duración
+ESQUEMA_PROCESOS = {"Nombre": "categoria", "Tipo": "categoria", "Descripcion": "categoria", "Fase": "categoria",
+                    "Fin": "fecha", "Duracion (ms)": "entero"}
+MARCA_ERROR = "The following error occurred while executing this line:"
 
+_EVENTO_RE = re.compile(
+    r"\[(\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2})\]\s+\[(\w+)\].*?\[(CR|PF|RQ)-(\d+)\].*?The (\w+)\sphase has\s(ended|started)",
+    re.IGNORECASE
+)
+_PROCESO_RE = re.compile(
+    r"\[(\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2})\]\s+\[([^\]]+)\]\s+\[([^\]]+)\]\s+\[([^\]]+)\]\s+(?:La fase|The) (\w+) (?:ha finalizado|phase has ended) in (\d+)ms",
+    re.IGNORECASE
+)
+_TAG_RE = re.compile(r"\[((?:CR|PF|RQ)-\d+)\]")
 
-def detectar_errores_por_etiqueta(raw_lines):
-    import re
-    errores = {}
-    current_tag = None
-    capture_next = False
-    for line in raw_lines:
-        tag_match = re.search(r"\[(CR-\d+)\]", line)
+# Literales del prefiltro: toda línea que cumple la expresión los contiene (ver logparser.reglas)
+registrar(
+    "metricas",
+    Regla("evento", _EVENTO_RE, ("phase has",)),
+    Regla("proceso", _PROCESO_RE, ("ha finalizado", "phase has ended")),
+    Regla("etiqueta", _TAG_RE, ("[CR-", "[PF-", "[RQ-")),
+    Regla("error", re.compile(re.escape(MARCA_ERROR)), (MARCA_ERROR,), siguiente=True),
+)
+
+
+COLUMNAS_EVENTOS = ["fecha", "evento", "etiqueta", "tecnologia", "fase"]
+ESQUEMA_EVENTOS = {"fecha": "fecha", "evento": "categoria", "etiqueta": "categoria", "tecnologia": "categoria",
+                   "fase": "categoria"}
+_LINEAS_POR_LOTE = 10_000
+
+
+class EscanerPromocion:
+    """
+    Recorre las líneas de una consola de promoción en una sola pasada y
+    alimenta a la vez los tres extractores: eventos de fase por etiqueta,
+    fases de procesos (Orchestrator/EnvironmentPreparation) y bloques de
+    error por etiqueta (CR/PF/RQ).
+
+    De los eventos solo se guarda lo que usa calcular_metricas: por
+    (etiqueta, fase) el primer STARTED, el último ENDED y la primera aparición
+    de cada tecnología. Las fechas se guardan como el texto del log
+    ("AAAA.MM.DD hh:mm:ss", de ancho fijo: el orden de texto es el cronológico)
+    y se convierten de una vez en df_eventos(), que sale con columnas
+    categóricas (logparser.almacen). Las filas de procesos se acumulan en un
+    AlmacenEventos. El estado es pequeño y se puede serializar para
+    retomar el parseo (ver logparser.incremental): alimentar() acepta bloques
+    de bytes arbitrarios y guarda la última línea incompleta; `terminada`
+    indica que ya ha pasado la línea final de la consola ("Finished: ...").
+
+    Solo las líneas que pasan el prefiltro de las reglas "metricas" (más la
+    que sigue a cada marca de error) llegan a procesar().
+    """
+
+    def __init__(self):
+        self.inicios = {}          # (etiqueta, fase) -> primer STARTED
+        self.fines = {}            # (etiqueta, fase) -> último ENDED
+        self.tecnologias = {}      # (etiqueta, fase, tecnologia) -> (fecha, evento) de su primera aparición
+        self.n_eventos = 0
+        self.procesos = AlmacenEventos(ESQUEMA_PROCESOS)
+        self.errores = {}
+        self.bloques_error = []    # (etiqueta, bloque completo) en orden de aparición
+        self._bloque = []
+        self.current_tag = None
+        self.capture_next = False
+        self.lineas = 0
+        self.terminada = False
+        self._decodificador = nuevo_decodificador()
+        self._resto = ""
+
+    def procesar(self, line):
+        self._evento(line)
+        self._proceso(line)
+        self._error(line)
+
+    def procesar_texto(self, texto):
+        """Procesa un bloque de líneas completas separadas por \\n."""
+        self.terminada = self.terminada or fin_de_consola(texto)
+        while self.capture_next and self.current_tag:
+            # La marca de error cerró el bloque anterior: el mensaje es la primera línea
+            # (o la siguiente, si esta es otra marca)
+            primera, salto, texto = texto.partition("\n")
+            self.procesar(primera)
+            self.lineas += 1
+            if not salto:
+                return
+        self.lineas += texto.count("\n") + 1
+        for line in motor("metricas").candidatas(texto):
+            self.procesar(line)
+
+    def procesar_lineas(self, lines):
+        lines = iter(lines)
+        while True:
+            lote = list(islice(lines, _LINEAS_POR_LOTE))
+            if not lote:
+                return self
+            self.procesar_texto("\n".join(lote))
+
+    def alimentar(self, bloque: bytes):
+        texto = self._resto + self._decodificador.decode(bloque)
+        corte = texto.rfind("\n")
+        self._resto = texto[corte + 1:]
+        if corte >= 0:
+            self.procesar_texto(texto[:corte])
+
+    def cerrado(self):
+        """Copia del escáner con la última línea (sin salto final) ya procesada; self no cambia."""
+        final = copy.copy(self)
+        final.inicios = dict(self.inicios)
+        final.fines = dict(self.fines)
+        final.tecnologias = dict(self.tecnologias)
+        final.procesos = copy.deepcopy(self.procesos)
+        final.errores = dict(self.errores)
+        final.bloques_error = list(self.bloques_error)
+        final._bloque = list(self._bloque)
+        estado = self._decodificador.getstate()
+        cola = self._resto + self._decodificador.decode(b"", final=True)
+        self._decodificador.setstate(estado)
+        final._decodificador = None
+        final._resto = ""
+        final.procesar_lineas(cola.split("\n") if cola else [])
+        return final
+
+    def resultado(self):
+        """(tablas, meta) del parseo hasta aquí, con el formato de la caché."""
+        final = self.cerrado()
+        perfil.contar(eventos=final.n_eventos)
+        return ({"eventos": final.df_eventos(), "procesos": final.df_procesos()},
+                {"errores": final.errores, "bloques_error": [list(b) for b in final.bloques_error]})
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        if self._decodificador is not None:
+            estado["_decodificador"] = self._decodificador.getstate()
+        return estado
+
+    def __setstate__(self, estado):
+        decodificador = estado["_decodificador"]
+        self.__dict__.update(estado)
+        if decodificador is not None:
+            self._decodificador = nuevo_decodificador()
+            self._decodificador.setstate(decodificador)
+
+    def _evento(self, line):
+        match = _EVENTO_RE.search(line)
+        if match:
+            fecha, tecnologia, tipo_etq, num_etq, fase, evento = match.groups()
+            evento = evento.upper()
+            clave = (f"{tipo_etq}-{num_etq}", fase.upper())
+            self.n_eventos += 1
+            self.tecnologias.setdefault(clave + (tecnologia,), (fecha, evento))
+            if evento == "STARTED":
+                if clave not in self.inicios or fecha < self.inicios[clave]:
+                    self.inicios[clave] = fecha
+            elif evento == "ENDED":
+                if clave not in self.fines or fecha > self.fines[clave]:
+                    self.fines[clave] = fecha
+
+    def _proceso(self, line):
+        m = _PROCESO_RE.search(line)
+        if not m:
+            return
+        fecha_str, nombre, tipo, descripcion, fase, duracion_ms = m.groups()
+        if nombre not in VALID_NOMBRES:
+            return
+        if any(tag in descripcion for tag in EXCLUDE_TAGS):
+            return
+        duracion_ms = int(duracion_ms)
+        if duracion_ms == 0:
+            return
+        self.procesos.agregar(nombre, tipo, descripcion, fase.upper(), segundos(fecha_str), duracion_ms)
+
+    def _error(self, line):
+        tag_match = _TAG_RE.search(line)
         if tag_match:
-            current_tag = tag_match.group(1)
-        if "The following error occurred while executing this line:" in line:
-            capture_next = True
-            continue
-        if capture_next and current_tag:
+            self.current_tag = tag_match.group(1)
+        if MARCA_ERROR in line:
+            # Las marcas encadenadas (un build.xml que llama a otro) forman un solo bloque
+            if not self.capture_next:
+                self._bloque = []
+            self._bloque.append(line.strip())
+            self.capture_next = True
+            return
+        if self.capture_next and self.current_tag:
             siguiente = line.strip().strip('"')
             if siguiente:
-                errores[current_tag] = siguiente
-            capture_next = False
-    return errores
+                self.errores[self.current_tag] = siguiente
+                self.bloques_error.append((self.current_tag, "\n".join(self._bloque + [line.strip()])))
+            self.capture_next = False
+            self._bloque = []
 
-def generar_metricas(log_path_str):
-    log_path = Path(log_path_str)
+    def df_eventos(self):
+        """
+        Tabla de eventos reducida: la primera aparición de cada tecnología por
+        (etiqueta, fase), en orden, más el primer STARTED y el último ENDED.
+        calcular_metricas obtiene de ella las mismas hojas que del log completo.
+        """
+        filas = [(fecha, evento, etiqueta, tecnologia, fase)
+                 for (etiqueta, fase, tecnologia), (fecha, evento) in self.tecnologias.items()]
+        primera = {}
+        for etiqueta, fase, tecnologia in self.tecnologias:
+            primera.setdefault((etiqueta, fase), tecnologia)
+        filas += [(fecha, "STARTED", etiqueta, primera[(etiqueta, fase)], fase)
+                  for (etiqueta, fase), fecha in self.inicios.items()]
+        filas += [(fecha, "ENDED", etiqueta, primera[(etiqueta, fase)], fase)
+                  for (etiqueta, fase), fecha in self.fines.items()]
+        almacen = AlmacenEventos(ESQUEMA_EVENTOS)
+        for fecha, evento, etiqueta, tecnologia, fase in filas:
+            almacen.agregar(segundos(fecha), evento, etiqueta, tecnologia, fase)
+        return almacen.a_dataframe()
 
-    # Detectar y corregir nombres mal formateados
-    if log_path.name.endswith("_l.html_tiempos"):
-        nuevo_nombre = log_path.name.replace("_l.html_tiempos", ".html")
-        nuevo_path = log_path.with_name(nuevo_nombre)
-        log_path.rename(nuevo_path)
-        print(f"✔ Archivo renombrado internamente a: {nuevo_path.name}")
-        log_path = nuevo_path  # actualizar la referencia para el resto del proceso
+    def df_procesos(self):
+        df = self.procesos.a_dataframe()
+        df.insert(COLUMNAS_PROCESOS.index("Inicio"), "Inicio", "")
+        # El Excel conserva la fecha de fin como el texto del log
+        df["Fin"] = df["Fin"].dt.strftime(FORMATO).astype(object)
+        df["Duracion (h:m:s)"] = formatear_duraciones(df["Duracion (ms)"])
+        return df[COLUMNAS_PROCESOS]
 
-    with open(log_path, "r", encoding="utf-8") as file:
-        raw_lines = file.readlines()
 
-    patron = re.compile(
-        r"\[(\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2})\]\s+\[(\w+)\].*?\[(CR|PF|RQ)-(\d+)\].*?The (\w+)\sphase has\s(ended|started)",
-        re.IGNORECASE
-    )
+def extraer_procesos(raw_lines):
+    escaner = EscanerPromocion()
+    for line in raw_lines:
+        escaner._proceso(line)
+    return escaner.df_procesos()
+
 
-    eventos = []
+def detectar_errores_por_etiqueta(raw_lines):
+    escaner = EscanerPromocion()
     for line in raw_lines:
-        match = patron.search(line)
-        if match:
-            fecha_str, tecnologia, tipo_etq, num_etq, fase, evento = match.groups()
-            fecha = datetime.strptime(fecha_str.replace(".", "-"), "%Y-%m-%d %H:%M:%S")
-            eventos.append({
-                "fecha": fecha,
-                "evento": evento.upper(),
-                "etiqueta": f"{tipo_etq}-{num_etq}",
-                "tecnologia": tecnologia,
-                "fase": fase.upper()
-            })
-
-    df_eventos = pd.DataFrame(eventos)
-    filas = []
-    for (etiqueta, fase), grupo in df_eventos.groupby(["etiqueta", "fase"]):
-        fecha_ini = grupo[grupo["evento"] == "STARTED"]["fecha"].min()
-        fecha_fin = grupo[grupo["evento"] == "ENDED"]["fecha"].max()
-        tecnologias = grupo["tecnologia"].unique()
-        if pd.notnull(fecha_ini) and pd.notnull(fecha_fin) and fecha_fin > fecha_ini:
-            duracion_ms = int((fecha_fin - fecha_ini).total_seconds() * 1000)
-            filas.append({
-                "etiqueta": etiqueta,
-                "tecnologia": ", ".join(tecnologias),
-                "fase": fase,
-                "inicio": fecha_ini,
-                "fin": fecha_fin,
-                "duracion_ms": duracion_ms,
-                "duracion_hms": format_duration(duracion_ms)
-            })
-
-    df_global = pd.DataFrame(filas)
+        escaner._error(line)
+    return escaner.errores
+
+
+def escanear_log(log_path):
+    # Lectura por bloques (plano, comprimido o en un zip): el fichero nunca se carga entero en memoria
+    escaner = EscanerPromocion()
+    for bloque in bloques(log_path):
+        escaner.alimentar(bloque)
+    return escaner.cerrado()
+
+
+@perfil.medido("metricas.parseo")
+def parsear_log(log_path, usar_cache=True):
+    """
+    Extrae del log (df_eventos, df_procesos, errores_etiqueta, bloques_error).
+    Con usar_cache, una consola que solo ha crecido desde el último parseo se
+    retoma desde donde se quedó (logparser.incremental) y una ya parseada con
+    esta VERSION_PARSER se lee de la caché.
+    """
+    from logparser.incremental import parsear_incremental
+    tablas, meta = parsear_incremental(log_path, "metricas", VERSION_PARSER, EscanerPromocion, usar_cache)
+    return tablas["eventos"], tablas["procesos"], meta["errores"], meta["bloques_error"]
+
+def formatear_duraciones(ms):
+    """Versión vectorizada de format_duration para una Series de milisegundos."""
+    total_seconds = (ms.fillna(0) // 1000).astype("int64")
+    texto = ((total_seconds // 3600).astype(str) + "h "
+             + (total_seconds % 3600 // 60).astype(str) + "m "
+             + (total_seconds % 60).astype(str) + "s")
+    return texto.where(ms.notna(), "").astype(object)
+
+
+COLUMNAS_GLOBAL = ["etiqueta", "tecnologia", "fase", "inicio", "fin", "duracion_ms", "duracion_hms"]
+
+
+def _unir_por_grupo(df, claves, columna):
+    # Equivale a groupby(claves)[columna].agg(", ".join) conservando el orden de
+    # las filas, pero concatenando por posición dentro del grupo (pocas
+    # iteraciones vectorizadas) en lugar de una llamada Python por grupo.
+    posicion = df.groupby(claves, sort=False, observed=True).cumcount()
+    resultado = df.loc[posicion == 0].set_index(claves)[columna].astype(object)
+    for k in range(1, int(posicion.max()) + 1 if len(df) else 0):
+        siguiente = df.loc[posicion == k].set_index(claves)[columna].reindex(resultado.index).astype(object)
+        hay = siguiente.notna()
+        resultado[hay] = resultado[hay] + ", " + siguiente[hay]
+    return resultado
+
+
+def _calcular_global(df_eventos):
+    # Una fila por (etiqueta, fase): primer STARTED, último ENDED y las
+    # tecnologías en orden de aparición. Solo fases cerradas con fin > inicio.
+    # Las claves pueden ser categóricas (df_eventos del almacén): observed=True
+    # agrupa solo las combinaciones presentes, como con columnas de texto.
+    claves = ["etiqueta", "fase"]
+    es_inicio = df_eventos["evento"] == "STARTED"
+    es_fin = df_eventos["evento"] == "ENDED"
+    inicio = df_eventos.loc[es_inicio].groupby(claves, observed=True)["fecha"].min().rename("inicio")
+    fin = df_eventos.loc[es_fin].groupby(claves, observed=True)["fecha"].max().rename("fin")
+    tecnologias = _unir_por_grupo(df_eventos.drop_duplicates(claves + ["tecnologia"]), claves, "tecnologia")
+    df = pd.concat([inicio, fin], axis=1, join="inner")
+    df = df[df["fin"] > df["inicio"]].sort_index()
+    df["tecnologia"] = tecnologias.reindex(df.index)
+    # Hoja pequeña (una fila por fase): claves de vuelta a texto para el resto de hojas y gráficas
+    df = df.reset_index().astype({"etiqueta": str, "fase": str})
+    df["duracion_ms"] = ((df["fin"] - df["inicio"]) // pd.Timedelta(milliseconds=1)).astype("int64")
+    df["duracion_hms"] = formatear_duraciones(df["duracion_ms"])
+    return df[COLUMNAS_GLOBAL]
+
+
+def _tecnologias_por_etiqueta(df_global):
+    # Conjunto ordenado de tecnologías por etiqueta (las filas pueden traer "A, B")
+    pares = df_global[["etiqueta"]].assign(tecnologia=df_global["tecnologia"].str.split(", "))
+    pares = pares.explode("tecnologia").drop_duplicates().sort_values(["etiqueta", "tecnologia"])
+    return _unir_por_grupo(pares, ["etiqueta"], "tecnologia")
+
+
+@perfil.medido("metricas.agregacion")
+def calcular_metricas(df_eventos, errores_etiqueta, bloques_error=()):
+    """
+    Construye las hojas GlobalData, Tiempos, Etiquetas y Medias Tecnologia a
+    partir de los eventos de fase, con operaciones groupby vectorizadas, y la
+    hoja Errores con la huella de cada bloque de error (logparser.errores).
+    """
+    from logparser.errores import huellas_por_etiqueta, tabla_errores
+    if df_eventos.empty:
+        # Esquema tipado para que el resto de agregaciones no falle sin eventos
+        df_global = pd.DataFrame({
+            "etiqueta": pd.Series(dtype=object), "tecnologia": pd.Series(dtype=object),
+            "fase": pd.Series(dtype=object), "inicio": pd.Series(dtype="datetime64[ns]"),
+            "fin": pd.Series(dtype="datetime64[ns]"), "duracion_ms": pd.Series(dtype="int64"),
+            "duracion_hms": pd.Series(dtype=object),
+        })
+    else:
+        df_global = _calcular_global(df_eventos)
+
     df_tiempos = df_global.groupby("tecnologia").agg(
         inicio=("inicio", "min"),
         fin=("fin", "max"),
         duracion_ms=("duracion_ms", "sum")
     ).reset_index()
-    df_tiempos["duracion_hms"] = df_tiempos["duracion_ms"].apply(format_duration)
+    df_tiempos["duracion_hms"] = formatear_duraciones(df_tiempos["duracion_ms"])
 
-    
     df_etiquetas = df_global.groupby("etiqueta").agg(
-        tecnologia=("tecnologia", lambda x: ", ".join(sorted(set(sum((s.split(", ") for s in x), []))))),
         inicio=("inicio", "min"),
         fin=("fin", "max")
-    ).reset_index()
-    df_etiquetas["duracion_ms"] = (df_etiquetas["fin"] - df_etiquetas["inicio"]).dt.total_seconds() * 1000
-    df_etiquetas["duracion_ms"] = df_etiquetas["duracion_ms"].astype(int)
-    df_etiquetas["duracion_hms"] = df_etiquetas["duracion_ms"].apply(format_duration)
-    
-    errores_etiqueta = detectar_errores_por_etiqueta(raw_lines)
+    )
+    df_etiquetas.insert(0, "tecnologia", _tecnologias_por_etiqueta(df_global).reindex(df_etiquetas.index))
+    df_etiquetas = df_etiquetas.reset_index()
+    df_etiquetas["duracion_ms"] = ((df_etiquetas["fin"] - df_etiquetas["inicio"]) // pd.Timedelta(milliseconds=1)).astype("int64")
+    df_etiquetas["duracion_hms"] = formatear_duraciones(df_etiquetas["duracion_ms"])
     df_etiquetas["comentarios"] = df_etiquetas["etiqueta"].map(errores_etiqueta).fillna("")
+    df_errores = tabla_errores(bloques_error)
+    por_etiqueta = huellas_por_etiqueta(df_errores)
+    df_etiquetas["huella"] = df_etiquetas["etiqueta"].map(por_etiqueta["huella"]).fillna("").astype(object)
+    df_etiquetas["frecuencia"] = df_etiquetas["etiqueta"].map(por_etiqueta["frecuencia"]).fillna(0).astype("int64")
 
     df_medias = df_global.groupby("tecnologia").agg(
         numero_etiquetas=("etiqueta", "count"),
         suma_total_ms=("duracion_ms", "sum")
     ).reset_index()
-    df_medias["media_ms"] = (df_medias["suma_total_ms"] / df_medias["numero_etiquetas"]).astype(int)
-    df_medias["media_hms"] = df_medias["media_ms"].apply(format_duration)
-
-    # ----- PROCESOS -----
-    df_procesos = extraer_procesos(raw_lines)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Portada"
-    ws["A1"] = "Autor:"
-    ws["B1"] = "Proyecto Público"
-    ws["A2"] = "Organización:"
-    ws["B2"] = "—"
-    ws["A4"] = "Descripción:"
-    ws["B4"] = "Métricas generadas a partir de log HTML de promoción Jenkins"
-
-    def add_sheet(wb, name, df):
-        ws = wb.create_sheet(name)
-        ws.append(df.columns.tolist())
-        for row in df.itertuples(index=False):
-            ws.append(row)
-
-    if ws.title == "Etiquetas" and "comentarios" in df.columns:
-        from openpyxl.styles import PatternFill
-        fill_rojo = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-            comentario = row[df.columns.get_loc("comentarios")]
-            if comentario.value:
-                comentario.fill = fill_rojo
-        for col_idx, _ in enumerate(df.columns, start=1):
-            max_length = max((len(str(cell.value)) for cell in ws[get_column_letter(col_idx)] if cell.value), default=10)
-            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 2, 40)
-
-    add_sheet(wb, "GlobalData", df_global)
-    add_sheet(wb, "Tiempos", df_tiempos)
-    add_sheet(wb, "Etiquetas", df_etiquetas)
-    add_sheet(wb, "Medias Tecnologia", df_medias)
-    add_sheet(wb, "Procesos", df_procesos)  # <<--- ¡SIEMPRE crea esta hoja!
+    df_medias["media_ms"] = (df_medias["suma_total_ms"] / df_medias["numero_etiquetas"]).astype("int64")
+    df_medias["media_hms"] = formatear_duraciones(df_medias["media_ms"])
+
+    return {
+        "GlobalData": df_global,
+        "Tiempos": df_tiempos,
+        "Etiquetas": df_etiquetas,
+        "Medias Tecnologia": df_medias,
+        "Errores": df_errores,
+    }
 
+
+def ruta_salida(log_path, salida_dir=None):
+    log_path = Path(log_path)
     nombre_base = log_path.name[:45].replace(" ", "_").replace("#", "_")
-    output_path = Path(log_path.parent) / f"{nombre_base}_METRICAS.xlsx"
-    wb.save(output_path)
-    print(f"✔ Errores detectados en etiquetas: {sum(1 for v in errores_etiqueta.values() if v)}")
+    output_dir = Path(salida_dir or log_path.parent)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir / f"{nombre_base}_METRICAS.xlsx"
+
+
+PORTADA = [
+    ("A1", "Autor:"),
+    ("B1", "Proyecto Público"),
+    ("A2", "Organización:"),
+    ("B2", "—"),
+    ("A4", "Descripción:"),
+    ("B4", "Métricas generadas a partir de log HTML de promoción Jenkins"),
+]
+
+
+def escribir_excel(output_path, hojas):
+    from logparser.salidas import escribir_xlsx
+    return escribir_xlsx(output_path, hojas, portada=PORTADA)
+
+
+def escribir_salidas(output_path, hojas, formatos=("xlsx",), metadatos=None):
+    from logparser.salidas import escribir_hojas
+    return escribir_hojas(output_path, hojas, formatos, portada=PORTADA, metadatos=metadatos)
+
+
+def generar_metricas(log_path_str, salida_dir=None, usar_cache=True, formatos=("xlsx",)):
+    log_path = Path(log_path_str)
+
+    # Detectar y corregir nombres mal formateados
+    if log_path.name.endswith("_l.html_tiempos") and es_plano(log_path):
+        nuevo_nombre = log_path.name.replace("_l.html_tiempos", ".html")
+        nuevo_path = log_path.with_name(nuevo_nombre)
+        log_path.rename(nuevo_path)
+        print(f"✔ Archivo renombrado internamente a: {nuevo_path.name}")
+        log_path = nuevo_path  # actualizar la referencia para el resto del proceso
+
+    df_eventos, df_procesos, errores_etiqueta, bloques_error = parsear_log(log_path, usar_cache)
+    hojas = calcular_metricas(df_eventos, errores_etiqueta, bloques_error)
+    hojas.update(hojas_concurrencia(hojas["GlobalData"]))
+    hojas["Procesos"] = df_procesos  # <<--- ¡SIEMPRE crea esta hoja!
+
+    from logparser.historico import metadatos_build
+    output_path = ruta_salida(ruta_logica(log_path), salida_dir)
+    generados = escribir_salidas(output_path, hojas, formatos, metadatos_build(log_path))
+    print(f"✔ Errores detectados en etiquetas: {sum(1 for v in errores_etiqueta.values() if v)} "
+          f"({hojas['Errores']['huella'].nunique()} huellas distintas)")
 
-    print(f"Excel generado: {output_path}")
+    for ruta in generados:
+        print(f"Excel generado: {ruta}" if ruta.suffix == ".xlsx" else f"Tablas generadas: {ruta}")
+    return generados[0]
 
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) > 1:
-        generar_metricas(sys.argv[1])
+    import argparse
+    if len(sys.argv) == 1:
+        print("Uso: python -m logparser.generar_metricas ruta_al_log.html[.gz] | consolas.zip | directorio | glob "
+              "[--jobs N] [--salida DIR]")
+        sys.exit(2)
+    ap = argparse.ArgumentParser(description="Genera el Excel de métricas a partir de logs HTML de promoción.")
+    ap.add_argument("entradas", nargs="+", help="Log HTML (también .gz, .bz2, .xz o .zst), zip de consolas, directorio o patrón glob")
+    ap.add_argument("--jobs", "-j", type=int, default=None, help="Procesos en paralelo para lotes")
+    ap.add_argument("--salida", default=None, help="Directorio de salida (por defecto: junto al log)")
+    ap.add_argument("--sin-cache", action="store_true", help="Parsea siempre el log, sin leer ni escribir la caché")
+    ap.add_argument("--formato", nargs="+", default=["xlsx"], help="xlsx, csv, parquet y/o feather")
+    perfil.agregar_argumentos(ap)
+    args = ap.parse_args()
+    if len(args.entradas) == 1 and Path(args.entradas[0]).is_file() and not es_zip(args.entradas[0]) \
+            and args.jobs is None:
+        with perfil.perfilar_si(args.entradas[0], perfil.opciones_perfil(args)):
+            generar_metricas(args.entradas[0], salida_dir=args.salida, usar_cache=not args.sin_cache,
+                             formatos=args.formato)
     else:
-        print("Uso: python -m logparser.generar_metricas ruta_al_log.html")
+        from logparser import lote
+        extra = ["--jobs", str(args.jobs)] if args.jobs else []
+        extra += ["--salida", args.salida] if args.salida else []
+        extra += ["--sin-cache"] if args.sin_cache else []
+        extra += ["--formato"] + args.formato
+        extra += ["--perfil", args.perfil] if args.perfil else []
+        extra += ["--perfil-memoria"] if args.perfil_memoria else []
+        extra += ["--perfil-volcado", args.perfil_volcado] if args.perfil_volcado else []
+        sys.exit(lote.main(args.entradas + ["--parser", "metricas"] + extra))
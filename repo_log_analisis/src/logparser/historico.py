@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Histórico de builds en SQLite: tendencias sin abrir cientos de Excel.
+
+Cada build (proyecto + nombre del log) guarda sus filas de GlobalData
+(tabla fases), Procesos (procesos), Tiempos (tiempos) y Errores (errores,
+el índice de huellas de logparser.errores). La ingesta es
+incremental e idempotente: una build ya cargada con la misma huella se
+salta y una build con datos nuevos se reemplaza entera en una transacción.
+
+Ingesta:
+  * desde el pipeline (python -m logparser ... --historico historico.sqlite),
+    con las hojas en memoria
+  * a posteriori desde una carpeta de salidas (<log>_METRICAS.xlsx o su
+    directorio columnar), con la huella (tamaño, mtime) de cada fichero:
+        python -m logparser.historico ingestar METRICAS --db historico.sqlite
+Las dos vías usan la misma clave (proyecto, build): la de la consola, que las
+salidas llevan en sus metadatos (logparser.salidas.leer_metadatos) porque el
+nombre del Excel va recortado a 45 caracteres y sin espacios ni "#".
+
+Consultas (por build se suma la duración del grupo; ver --medida):
+    python -m logparser.historico consultar --db historico.sqlite --tecnologia AS400 --ultimos 300
+    python -m logparser.historico consultar --origen procesos --fase ORCHESTRATOR --serie
+    python -m logparser.historico consultar --regresiones --umbral 0.2 --ventana 10
+    python -m logparser.historico builds [--proyecto P]
+    python -m logparser.historico errores [--proyecto P] [--ultimos 500] [--minimo 2] [--huella H]
+
+El resumen da por grupo (tecnología/fase, o nombre/fase en procesos)
+percentiles p50/p90/p95/p99, la pendiente de la recta de regresión (en % de la
+media por build) y cuántas builds superan en más de --umbral la media móvil de
+las --ventana anteriores.
+"""
+import argparse
+import hashlib
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+MEDIDAS = ("suma", "media", "max", "n")
+ORIGENES = {
+    # origen -> (tabla, columna de grupo, columna de subgrupo)
+    "fases": ("fases", "tecnologia", "fase"),
+    "procesos": ("procesos", "nombre", "fase"),
+    "tiempos": ("tiempos", "tecnologia", None),
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    proyecto TEXT NOT NULL,
+    build TEXT NOT NULL,
+    parser TEXT NOT NULL,
+    inicio TEXT,
+    fin TEXT,
+    huella TEXT NOT NULL,
+    origen TEXT,
+    ingestado TEXT NOT NULL,
+    UNIQUE (proyecto, build)
+);
+CREATE INDEX IF NOT EXISTS idx_builds_inicio ON builds (proyecto, inicio);
+CREATE TABLE IF NOT EXISTS fases (
+    build_id INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    etiqueta TEXT, tecnologia TEXT, fase TEXT, inicio TEXT, fin TEXT, duracion_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_fases ON fases (tecnologia, fase, build_id);
+CREATE INDEX IF NOT EXISTS idx_fases_build ON fases (build_id);
+CREATE TABLE IF NOT EXISTS procesos (
+    build_id INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    nombre TEXT, tipo TEXT, descripcion TEXT, fase TEXT, fin TEXT, duracion_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_procesos ON procesos (fase, nombre, build_id);
+CREATE INDEX IF NOT EXISTS idx_procesos_build ON procesos (build_id);
+CREATE TABLE IF NOT EXISTS tiempos (
+    build_id INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    tecnologia TEXT, inicio TEXT, fin TEXT, duracion_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_tiempos ON tiempos (tecnologia, build_id);
+CREATE INDEX IF NOT EXISTS idx_tiempos_build ON tiempos (build_id);
+CREATE TABLE IF NOT EXISTS errores (
+    build_id INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    etiqueta TEXT, huella TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_errores ON errores (huella, build_id);
+CREATE INDEX IF NOT EXISTS idx_errores_build ON errores (build_id);
+CREATE TABLE IF NOT EXISTS huellas (
+    huella TEXT PRIMARY KEY,
+    patron TEXT NOT NULL,
+    ejemplo TEXT
+);
+"""
+
+
+def conectar(db) -> sqlite3.Connection:
+    """Abre (y crea si hace falta) el histórico. WAL permite leer mientras un lote escribe."""
+    Path(db).parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(db), timeout=30)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA foreign_keys=ON")
+    con.executescript(ESQUEMA)
+    return con
+
+
+def nombre_build(ruta) -> str:
+    """'X.html', 'X.html_METRICAS.xlsx', 'X_METRICAS' o 'X_METRICAS.xlsx' -> 'X'."""
+    nombre = Path(str(ruta).rstrip("/\\")).name
+    for sufijo in (".xlsx", "_METRICAS", ".html"):
+        if nombre.endswith(sufijo):
+            nombre = nombre[:-len(sufijo)]
+    return nombre
+
+
+def metadatos_build(log_path) -> dict:
+    """Clave de la build de una consola: carpeta del log y nombre completo, sin comprimir ni zip."""
+    from logparser.entradas import ruta_logica
+    logica = ruta_logica(log_path)
+    return {"proyecto": logica.parent.name, "build": nombre_build(logica.name)}
+
+
+def build_de_salida(ruta) -> str:
+    """Nombre de la build de una salida de métricas: el de sus metadatos o, si no tiene, el del fichero."""
+    from logparser.salidas import leer_metadatos
+    return leer_metadatos(ruta).get("build") or nombre_build(ruta)
+
+
+def _fechas(serie) -> list:
+    fechas = pd.to_datetime(serie, errors="coerce", format="mixed")
+    return [None if pd.isna(f) else f.strftime(FORMATO_FECHA) for f in fechas]
+
+
+def _normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    # Tiempos de table download usa "Tecnología", "Duración (ms)"...
+    df = df.copy()
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df.rename(columns={"tecnología": "tecnologia", "duración (ms)": "duracion_ms",
+                              "duracion (ms)": "duracion_ms"})
+
+
+def _filas(hojas: dict) -> dict:
+    filas = {}
+    g = _normalizar(hojas.get("GlobalData", pd.DataFrame(columns=["etiqueta", "tecnologia", "fase", "inicio", "fin", "duracion_ms"])))
+    filas["fases"] = list(zip(g["etiqueta"].astype(str), g["tecnologia"].astype(str), g["fase"].astype(str),
+                              _fechas(g["inicio"]), _fechas(g["fin"]), g["duracion_ms"].astype("int64").tolist()))
+    t = _normalizar(hojas.get("Tiempos", pd.DataFrame(columns=["tecnologia", "inicio", "fin", "duracion_ms"])))
+    filas["tiempos"] = list(zip(t["tecnologia"].astype(str), _fechas(t["inicio"]), _fechas(t["fin"]),
+                                t["duracion_ms"].astype("int64").tolist()))
+    p = _normalizar(hojas["Procesos"]) if "Procesos" in hojas else None
+    filas["procesos"] = [] if p is None else list(zip(
+        p["nombre"].astype(str), p["tipo"].astype(str), p["descripcion"].astype(str), p["fase"].astype(str),
+        _fechas(p["fin"].astype(str).str.replace(".", "-", regex=False)), p["duracion_ms"].astype("int64").tolist()))
+    from logparser.errores import filas_indice
+    filas["errores"] = filas_indice(hojas)
+    return filas
+
+
+def _huella_filas(filas: dict) -> str:
+    h = hashlib.sha256()
+    for tabla in ("fases", "tiempos", "procesos", "errores"):
+        h.update(repr(filas[tabla]).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _huella_registrada(con, proyecto: str, build: str):
+    fila = con.execute("SELECT huella FROM builds WHERE proyecto = ? AND build = ?", (proyecto, build)).fetchone()
+    return fila[0] if fila else None
+
+
+def ingestar_hojas(db_o_con, build: str, proyecto: str, parser: str, hojas: dict,
+                   huella: str = None, origen: str = "") -> bool:
+    """
+    Carga las hojas de una build. Devuelve False si ya estaba con la misma
+    huella (por defecto, un hash de las filas) y True si se insertó o reemplazó.
+    """
+    con = db_o_con if isinstance(db_o_con, sqlite3.Connection) else conectar(db_o_con)
+    try:
+        filas = _filas(hojas)
+        huella = huella or _huella_filas(filas)
+        if _huella_registrada(con, proyecto, build) == huella:
+            return False
+        fechas = [f for _, _, _, i, fin, _ in filas["fases"] for f in (i, fin) if f] \
+            or [f for _, i, fin, _ in filas["tiempos"] for f in (i, fin) if f]
+        with con:
+            con.execute("DELETE FROM builds WHERE proyecto = ? AND build = ?", (proyecto, build))
+            cur = con.execute(
+                "INSERT INTO builds (proyecto, build, parser, inicio, fin, huella, origen, ingestado) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (proyecto, build, parser, min(fechas, default=None), max(fechas, default=None), huella,
+                 str(origen), datetime.now().strftime(FORMATO_FECHA)))
+            build_id = cur.lastrowid
+            con.executemany("INSERT INTO fases VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            ((build_id,) + f for f in filas["fases"]))
+            con.executemany("INSERT INTO tiempos VALUES (?, ?, ?, ?, ?)",
+                            ((build_id,) + f for f in filas["tiempos"]))
+            con.executemany("INSERT INTO procesos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            ((build_id,) + f for f in filas["procesos"]))
+            con.executemany("INSERT INTO errores VALUES (?, ?, ?)",
+                            ((build_id, etiqueta, huella) for etiqueta, huella, _, _ in filas["errores"]))
+            con.executemany("INSERT OR IGNORE INTO huellas VALUES (?, ?, ?)",
+                            ((huella, patron, bloque) for _, huella, patron, bloque in filas["errores"]))
+        return True
+    finally:
+        if con is not db_o_con:
+            con.close()
+
+
+def _salidas_metricas(raiz: Path):
+    # <log>_METRICAS.xlsx y, si no hay Excel, su directorio columnar <log>_METRICAS/
+    vistos = set()
+    for xlsx in sorted(raiz.rglob("*_METRICAS.xlsx")):
+        vistos.add(xlsx.with_suffix(""))
+        yield xlsx
+    for directorio in sorted(raiz.rglob("*_METRICAS")):
+        if directorio.is_dir() and directorio not in vistos:
+            yield directorio
+
+
+def _huella_fichero(ruta: Path) -> str:
+    ficheros = sorted(ruta.iterdir()) if ruta.is_dir() else [ruta]
+    return ";".join(f"{f.name}:{f.stat().st_size}:{f.stat().st_mtime_ns}" for f in ficheros)
+
+
+def _leer_hojas(ruta: Path) -> dict:
+    from logparser.salidas import leer_hoja
+    if ruta.suffix == ".xlsx":
+        disponibles = pd.ExcelFile(ruta, engine="openpyxl").sheet_names
+        nombres = [h for h in ("GlobalData", "Tiempos", "Procesos", "Errores") if h in disponibles]
+        return pd.read_excel(ruta, sheet_name=nombres, engine="openpyxl")
+    hojas = {}
+    for hoja in ("GlobalData", "Tiempos", "Procesos", "Errores"):
+        try:
+            hojas[hoja] = leer_hoja(ruta, hoja)
+        except FileNotFoundError:
+            pass
+    return hojas
+
+
+def ingestar_directorio(db, raiz) -> tuple:
+    """
+    Ingiere todas las salidas de métricas bajo `raiz` (METRICAS/<PROYECTO>/...).
+    Las ya cargadas sin cambios (mismo tamaño y mtime) ni se leen. Proyecto y
+    build salen de los metadatos de la salida (los mismos que usa --historico);
+    las salidas sin metadatos se nombran por su carpeta y su fichero.
+    Devuelve (cargadas, sin_cambios, con_error).
+    """
+    raiz = Path(raiz)
+    cargadas = sin_cambios = errores = 0
+    con = conectar(db)
+    try:
+        from logparser.salidas import leer_metadatos
+        for ruta in _salidas_metricas(raiz):
+            metadatos = leer_metadatos(ruta)
+            proyecto = metadatos.get("proyecto") or (ruta.parent.name if ruta.parent != raiz else raiz.name)
+            build = metadatos.get("build") or nombre_build(ruta)
+            huella = _huella_fichero(ruta)
+            if _huella_registrada(con, proyecto, build) == huella:
+                sin_cambios += 1
+                continue
+            try:
+                hojas = _leer_hojas(ruta)
+                parser = "metricas" if "Procesos" in hojas else "table_download"
+                ingestar_hojas(con, build, proyecto, parser, hojas, huella=huella, origen=ruta)
+                cargadas += 1
+                print(f"[OK] {proyecto}/{build}")
+            except Exception as e:  # una salida corrupta no detiene la ingesta
+                errores += 1
+                print(f"[ERROR] {ruta}: {type(e).__name__}: {e}")
+    finally:
+        con.close()
+    return cargadas, sin_cambios, errores
+
+
+def valores_por_build(con, origen: str = "fases", proyecto: str = None, grupo: str = None,
+                      fase: str = None, ultimos: int = None, medida: str = "suma") -> pd.DataFrame:
+    """
+    Una fila por (build, grupo, subgrupo) con la duración agregada de la
+    build, en orden cronológico. `ultimos` limita a las N builds más recientes.
+    """
+    tabla, col_grupo, col_sub = ORIGENES[origen]
+    agregado = {"suma": "SUM(t.duracion_ms)", "media": "AVG(t.duracion_ms)",
+                "max": "MAX(t.duracion_ms)", "n": "COUNT(*)"}[medida]
+    sub = f"t.{col_sub}" if col_sub else "''"
+    consulta = f"""
+        WITH sel AS (
+            SELECT id, proyecto, build, inicio FROM builds
+            WHERE (:proyecto IS NULL OR proyecto = :proyecto)
+            ORDER BY inicio DESC LIMIT :ultimos
+        )
+        SELECT sel.proyecto, sel.build, sel.inicio AS fecha, t.{col_grupo} AS grupo, {sub} AS subgrupo,
+               {agregado} AS valor
+        FROM {tabla} t JOIN sel ON t.build_id = sel.id
+        WHERE (:grupo IS NULL OR t.{col_grupo} = :grupo)
+          AND (:fase IS NULL OR {sub} = :fase)
+        GROUP BY sel.id, t.{col_grupo}, subgrupo
+        ORDER BY sel.inicio, sel.id
+    """
+    parametros = {"proyecto": proyecto, "grupo": grupo, "fase": fase, "ultimos": ultimos or -1}
+    df = pd.read_sql_query(consulta, con, params=parametros)
+    df["fecha"] = pd.to_datetime(df["fecha"], format=FORMATO_FECHA)
+    return df
+
+
+def serie_tendencia(valores: pd.DataFrame, ventana: int = 10, umbral: float = 0.2) -> pd.DataFrame:
+    """Añade media_movil (incluida la build) y marca como regresión la build que supera
+    en más de `umbral` la media de las `ventana` anteriores (con al menos 3)."""
+    por_grupo = valores.groupby(["grupo", "subgrupo"], sort=False)["valor"]
+    serie = valores.copy()
+    serie["media_movil"] = por_grupo.transform(lambda s: s.rolling(ventana, min_periods=1).mean())
+    referencia = por_grupo.transform(lambda s: s.shift().rolling(ventana, min_periods=3).mean())
+    serie["referencia"] = referencia
+    serie["regresion"] = serie["valor"] > referencia * (1 + umbral)
+    return serie
+
+
+def _pendiente_pct(valores: pd.Series) -> float:
+    # Pendiente de la recta de regresión sobre el índice de build, en % de la media
+    if len(valores) < 2 or not valores.mean():
+        return float("nan")
+    pendiente = np.polyfit(np.arange(len(valores)), valores.to_numpy(dtype=float), 1)[0]
+    return round(100 * pendiente / valores.mean(), 2)
+
+
+def resumen_tendencia(serie: pd.DataFrame) -> pd.DataFrame:
+    if serie.empty:
+        return pd.DataFrame(columns=["grupo", "subgrupo", "builds", "p50", "p90", "p95", "p99", "min", "max",
+                                     "ultimo", "pendiente_pct_build", "regresiones"])
+    por_grupo = serie.groupby(["grupo", "subgrupo"])
+    resumen = por_grupo["valor"].agg(builds="count", min="min", max="max", ultimo="last")
+    cuantiles = por_grupo["valor"].quantile(list(PERCENTILES)).unstack()
+    cuantiles.columns = [f"p{int(q * 100)}" for q in PERCENTILES]
+    resumen = resumen.join(cuantiles)
+    resumen["pendiente_pct_build"] = por_grupo["valor"].apply(_pendiente_pct)
+    resumen["regresiones"] = por_grupo["regresion"].sum().astype("int64")
+    columnas = ["builds", "p50", "p90", "p95", "p99", "min", "max", "ultimo", "pendiente_pct_build", "regresiones"]
+    return resumen[columnas].round(1).reset_index()
+
+
+def _imprimir(df: pd.DataFrame, salida_csv=None):
+    if salida_csv:
+        df.to_csv(salida_csv, index=False, encoding="utf-8")
+        print(f"[OK] Generado: {salida_csv}")
+    elif df.empty:
+        print("[WARN] Sin datos para los filtros indicados.")
+    else:
+        print(df.to_string(index=False))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Histórico de builds (SQLite) y consultas de tendencia.")
+    ap.add_argument("--db", type=Path, default=Path("historico.sqlite"), help="Fichero SQLite del histórico")
+    sub = ap.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("ingestar", help="Carga las salidas _METRICAS de una carpeta")
+    p.add_argument("raiz", type=Path, help="Carpeta de salidas (p. ej. METRICAS)")
+
+    p = sub.add_parser("consultar", help="Percentiles, medias móviles y regresiones por build")
+    p.add_argument("--origen", choices=sorted(ORIGENES), default="fases",
+                   help="fases (GlobalData), procesos (Procesos) o tiempos (Tiempos)")
+    p.add_argument("--proyecto", default=None)
+    p.add_argument("--tecnologia", "--nombre", dest="grupo", default=None,
+                   help="Tecnología (fases/tiempos) o nombre del proceso (procesos)")
+    p.add_argument("--fase", default=None)
+    p.add_argument("--ultimos", type=int, default=None, help="Solo las N builds más recientes")
+    p.add_argument("--medida", choices=MEDIDAS, default="suma", help="Agregado por build de la duración (ms)")
+    p.add_argument("--ventana", type=int, default=10, help="Builds de la media móvil")
+    p.add_argument("--umbral", type=float, default=0.2, help="Exceso sobre la media móvil considerado regresión")
+    modo = p.add_mutually_exclusive_group()
+    modo.add_argument("--serie", action="store_true", help="Muestra la serie por build con su media móvil")
+    modo.add_argument("--regresiones", action="store_true", help="Muestra solo las builds marcadas como regresión")
+    p.add_argument("--csv", type=Path, default=None, help="Escribe el resultado en CSV en lugar de mostrarlo")
+
+    p = sub.add_parser("builds", help="Lista las builds cargadas")
+    p.add_argument("--proyecto", default=None)
+
+    p = sub.add_parser("errores", help="Huellas de error que se repiten entre builds")
+    p.add_argument("--proyecto", default=None)
+    p.add_argument("--ultimos", type=int, default=None, help="Solo las N builds más recientes")
+    p.add_argument("--minimo", type=int, default=2, help="Builds en las que debe aparecer la huella")
+    p.add_argument("--huella", default=None, help="Lista las builds y etiquetas de esta huella")
+    p.add_argument("--csv", type=Path, default=None, help="Escribe el resultado en CSV en lugar de mostrarlo")
+    args = ap.parse_args(argv)
+
+    if args.comando == "ingestar":
+        if not args.raiz.is_dir():
+            print(f"[ERROR] Carpeta no válida: {args.raiz}")
+            return 2
+        cargadas, sin_cambios, errores = ingestar_directorio(args.db, args.raiz)
+        print(f"Cargadas: {cargadas} | sin cambios: {sin_cambios} | con error: {errores} | histórico: {args.db}")
+        return 1 if errores else 0
+
+    con = conectar(args.db)
+    try:
+        if args.comando == "builds":
+            df = pd.read_sql_query(
+                "SELECT proyecto, build, parser, inicio, fin, ingestado FROM builds "
+                "WHERE (:p IS NULL OR proyecto = :p) ORDER BY proyecto, inicio", con, params={"p": args.proyecto})
+            _imprimir(df)
+            return 0
+        if args.comando == "errores":
+            from logparser import errores
+            if args.huella:
+                _imprimir(errores.apariciones(con, args.huella), args.csv)
+            else:
+                _imprimir(errores.recurrentes(con, args.proyecto, args.ultimos, args.minimo), args.csv)
+            return 0
+        valores = valores_por_build(con, args.origen, args.proyecto, args.grupo, args.fase, args.ultimos, args.medida)
+    finally:
+        con.close()
+    serie = serie_tendencia(valores, args.ventana, args.umbral).round({"valor": 1, "media_movil": 1, "referencia": 1})
+    if args.serie:
+        _imprimir(serie.drop(columns="referencia"), args.csv)
+    elif args.regresiones:
+        _imprimir(serie[serie["regresion"]].drop(columns="regresion"), args.csv)
+    else:
+        _imprimir(resumen_tendencia(serie), args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parseo incremental de consolas que siguen creciendo (builds en curso).
+
+Los escáneres de los parsers (EscanerPromocion, EscanerTableDownload) se
+alimentan con bloques de bytes y guardan todo su estado: líneas a medio
+escribir, fases abiertas, mapa de tablas, etiqueta CR actual, etc. Tras cada
+parseo se guarda un checkpoint por ruta con ese estado y el desplazamiento en
+bytes; la siguiente llamada solo lee y procesa la cola añadida desde entonces.
+
+El checkpoint se descarta (y se parsea desde cero) si el fichero encoge, si
+sin crecer ha cambiado su mtime (reescrito con el mismo tamaño) o si su
+huella ya no coincide: sha256 de los primeros 64 KiB y de los 64 KiB
+anteriores al desplazamiento, es decir, si el log no ha crecido solo por el final.
+
+Sin checkpoint válido se usa la caché por contenido (logparser.cache) si el
+hash de la ruta está en su índice; si no, se parsea desde el principio en una
+sola pasada que calcula a la vez el hash de los mismos bloques y guarda el
+resultado en la caché, sin leer el fichero dos veces.
+
+Cuando el escáner ha visto la línea final de la consola ("Finished: ...") la
+build ha terminado y no habrá nada que retomar: tras un parseo completo no se
+guarda checkpoint (basta la caché); si la línea llega al retomar, el
+checkpoint se marca como terminado y solo vale mientras el fichero no cambie.
+
+Los checkpoints viven junto a la caché (<caché>/incremental) y respetan
+LOGPARSER_CACHE=off y --sin-cache. Las consolas comprimidas o dentro de un zip
+(logparser.entradas) están cerradas: no se retoman y van directas a la caché.
+"""
+import hashlib
+import os
+import pickle
+import uuid
+from pathlib import Path
+
+from logparser import perfil
+from logparser.entradas import bloques, es_plano
+
+VERSION_CHECKPOINT = 2
+_TAMANO_HUELLA = 1 << 16
+
+
+def _huella(f, offset: int) -> str:
+    h = hashlib.sha256()
+    f.seek(0)
+    h.update(f.read(min(offset, _TAMANO_HUELLA)))
+    if offset > _TAMANO_HUELLA:
+        inicio = max(_TAMANO_HUELLA, offset - _TAMANO_HUELLA)
+        f.seek(inicio)
+        h.update(f.read(offset - inicio))
+    return h.hexdigest()
+
+
+class Checkpoints:
+    """Un fichero pickle por (parser, ruta absoluta o URL) con el estado del escáner."""
+
+    def __init__(self, cache=None):
+        from logparser.cache import CacheParseo
+        cache = cache or CacheParseo()
+        self.activo = cache.activa
+        self.directorio = cache.directorio_incremental
+        # Una fracción de la caché: los checkpoints se reescriben en cada refresco
+        self.tamano_maximo = cache.tamano_maximo // 4
+
+    def _ruta(self, ruta, parser: str) -> Path:
+        # Ficheros por su ruta absoluta; consolas remotas (logparser.jenkins) por su URL
+        origen = ruta if isinstance(ruta, str) and "://" in ruta else str(Path(ruta).resolve())
+        clave = hashlib.sha1(origen.encode("utf-8")).hexdigest()
+        return self.directorio / f"{parser}-{clave}.pkl"
+
+    def cargar(self, ruta, parser: str, version: str):
+        fichero = self._ruta(ruta, parser)
+        try:
+            with open(fichero, "rb") as f:
+                checkpoint = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            fichero.unlink(missing_ok=True)
+            return None
+        if checkpoint.get("version_checkpoint") != VERSION_CHECKPOINT or checkpoint.get("version") != version:
+            return None
+        return checkpoint
+
+    def guardar(self, ruta, parser: str, checkpoint: dict):
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        destino = self._ruta(ruta, parser)
+        tmp = self.directorio / f".tmp-{uuid.uuid4().hex}"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump({**checkpoint, "version_checkpoint": VERSION_CHECKPOINT}, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, destino)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            raise
+        self._expulsar()
+
+    def borrar(self, ruta, parser: str):
+        self._ruta(ruta, parser).unlink(missing_ok=True)
+
+    def entradas(self):
+        if not self.directorio.exists():
+            return []
+        return [p for p in self.directorio.glob("*.pkl") if not p.name.startswith(".tmp-")]
+
+    def _expulsar(self):
+        entradas = sorted(self.entradas(), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entradas)
+        for entrada in entradas[:-1]:  # nunca el recién escrito
+            if total <= self.tamano_maximo:
+                break
+            total -= entrada.stat().st_size
+            entrada.unlink(missing_ok=True)
+
+    def invalidar(self, parser: str = None) -> int:
+        borrados = 0
+        for entrada in self.entradas():
+            if parser is None or entrada.name.startswith(f"{parser}-"):
+                entrada.unlink(missing_ok=True)
+                borrados += 1
+        return borrados
+
+
+def leer_desde(ruta, estado, offset: int = 0, hash_=None) -> int:
+    """
+    Alimenta `estado` con los bytes de `ruta` a partir de `offset`. Devuelve el
+    nuevo offset. Con `hash_` (un objeto de hashlib) lo actualiza con los mismos bloques.
+    """
+    for bloque in bloques(ruta, offset):
+        estado.alimentar(bloque)
+        if hash_ is not None:
+            hash_.update(bloque)
+        offset += len(bloque)
+    return offset
+
+
+def _extraer(ruta, parser: str, estado, offset: int, hash_=None):
+    with perfil.etapa(f"{parser}.extraccion"):
+        lineas = estado.lineas
+        fin = leer_desde(ruta, estado, offset, hash_)
+        perfil.contar(bytes=fin - offset, lineas=estado.lineas - lineas)
+        return estado.resultado(), fin
+
+
+def _checkpoint_valido(ruta, checkpoint, st) -> bool:
+    offset = checkpoint["offset"]
+    if st.st_size < offset or (checkpoint["terminada"] and st.st_size != offset):
+        return False
+    if st.st_size == offset:
+        # Sin bytes nuevos solo cambia el mtime si se ha reescrito: la huella
+        # (muestras del principio y del final) no vería un cambio en medio
+        return st.st_mtime_ns == checkpoint["mtime_ns"]
+    with open(ruta, "rb") as f:
+        return _huella(f, offset) == checkpoint["huella"]
+
+
+def parsear_incremental(ruta, parser: str, version: str, nuevo_estado, usar_cache: bool = True):
+    """
+    Devuelve (tablas, meta) de `ruta` como cache.parsear_con_cache, retomando
+    el último checkpoint de esa ruta si el fichero solo ha crecido.
+
+    nuevo_estado() crea el escáner del parser, que debe ofrecer
+    alimentar(bytes), el contador `lineas`, el indicador `terminada` y
+    resultado() -> (tablas, meta) calculado como si el fichero terminara ahí,
+    sin modificar el escáner.
+    """
+    if not usar_cache:
+        return _extraer(ruta, parser, nuevo_estado(), 0)[0]
+    from logparser.cache import CacheParseo, parsear_con_cache
+    cache = CacheParseo()
+    if not cache.activa:
+        return _extraer(ruta, parser, nuevo_estado(), 0)[0]
+    if not es_plano(ruta):
+        return parsear_con_cache(ruta, parser, version, lambda r: _extraer(r, parser, nuevo_estado(), 0)[0], usar_cache)
+
+    checkpoints = Checkpoints(cache)
+    st = os.stat(ruta)
+    checkpoint = checkpoints.cargar(ruta, parser, version)
+    if checkpoint is not None and _checkpoint_valido(ruta, checkpoint, st):
+        estado, offset = checkpoint["estado"], checkpoint["offset"]
+        if offset == st.st_size:
+            with perfil.etapa(f"{parser}.extraccion"):
+                return estado.resultado()
+        resultado, fin = _extraer(ruta, parser, estado, offset)
+        _guardar_checkpoint(ruta, parser, version, estado, fin, checkpoints)
+        return resultado
+    return _parsear_desde_cero(ruta, parser, version, nuevo_estado(), cache, checkpoints)
+
+
+def _parsear_desde_cero(ruta, parser, version, estado, cache, checkpoints):
+    firma = cache.firma(ruta)
+    digest = cache.hash_indexado(ruta, firma)
+    if digest is not None:
+        encontrado = cache.obtener(cache.clave(ruta, parser, version, digest))
+        if encontrado is not None:
+            return encontrado
+    h = hashlib.sha256()
+    resultado, fin = _extraer(ruta, parser, estado, 0, h)
+    digest = h.hexdigest()
+    if fin == firma["tamano"]:  # si ha crecido mientras se leía, el hash es solo de una parte
+        cache.indexar(ruta, firma, digest)
+    try:
+        cache.guardar(cache.clave(ruta, parser, version, digest), *resultado)
+    except OSError as e:
+        print(f"[WARN] No se pudo escribir en la caché ({e}).")
+    if estado.terminada:
+        checkpoints.borrar(ruta, parser)  # la caché ya cubre la consola cerrada
+    else:
+        _guardar_checkpoint(ruta, parser, version, estado, fin, checkpoints)
+    return resultado
+
+
+def _guardar_checkpoint(ruta, parser, version, estado, fin, checkpoints):
+    try:
+        with open(ruta, "rb") as f:
+            huella = _huella(f, fin)
+        mtime_ns = os.stat(ruta).st_mtime_ns
+        checkpoints.guardar(ruta, parser, {"version": version, "offset": fin, "mtime_ns": mtime_ns,
+                                           "huella": huella, "terminada": estado.terminada, "estado": estado})
+    except OSError as e:
+        print(f"[WARN] No se pudo guardar el checkpoint incremental ({e}).")
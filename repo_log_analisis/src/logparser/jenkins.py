@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Descarga concurrente de consolas de Jenkins directamente a los parsers.
+
+Sustituye a guardar cada consola desde el navegador y renombrarla
+(GEN_METRICAS_INDIVIDUAL.bat): para un job y un rango de builds pide
+    <jenkins>/job/<job>/<n>/logText/progressiveHtml?start=<bytes ya leídos>
+con un número acotado de peticiones a la vez sobre conexiones HTTP/1.1
+persistentes (asyncio, solo biblioteca estándar; sigue las redirecciones
+dentro del mismo servidor, p. ej. de un proxy inverso o a la URL con barra
+final) y alimenta el escáner del parser con cada bloque según llega, en un
+hilo aparte para no frenar las demás descargas: no se escribe ningún HTML
+temporal. El
+cuerpo es el mismo <pre> de la página de consola, así que las métricas
+coinciden con las de la consola guardada. Las tablas, gráficas e histórico
+se escriben como en logparser.pipeline, con el log "<job>/<job>_<n>.html".
+
+Cada build deja un checkpoint (logparser.incremental, clave = URL de la
+build) con el estado del escáner, el desplazamiento X-Text-Size y el
+anotador de consola: al repetir el comando las builds terminadas no se
+vuelven a pedir y de las que estaban en curso solo se transfieren los bytes
+nuevos. Con --seguir se sondean las builds en curso hasta que terminan.
+
+Credenciales: --usuario (o JENKINS_USER) y el token de API en la variable
+JENKINS_TOKEN, nunca en la línea de comandos. Para probar sin Jenkins:
+python tests/jenkins_simulado.py.
+
+Uso:
+    python -m logparser.jenkins https://jenkins.ejemplo --job carpeta/PROYECTO (--builds 120-150 160 | --ultimos N)
+                                [--salida METRICAS/PROYECTO] [--parser metricas|table_download]
+                                [--concurrencia 6] [--jobs N] [--seguir [--intervalo 30]] [--inseguro]
+                                [--formato xlsx csv parquet feather | --formato] [--sin-graficas]
+                                [--sin-cache] [--historico historico.sqlite] [--plotlyjs incrustado|compartido|cdn]
+"""
+import argparse
+import asyncio
+import base64
+import inspect
+import json
+import os
+import ssl
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote, urljoin, urlsplit
+
+_TAMANO_BLOQUE = 1 << 16
+_REDIRECCIONES = (301, 302, 303, 307, 308)
+_MAX_REDIRECCIONES = 5
+PREFIJO_CONSOLA = b'<pre class="console-output">'  # lo que precede al cuerpo de progressiveHtml en la página
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado: int, ruta: str, detalle: str = ""):
+        super().__init__(f"HTTP {estado} en {ruta}" + (f" ({detalle})" if detalle else ""))
+        self.estado = estado
+
+
+class _ConexionCerrada(Exception):
+    """El servidor cerró una conexión reutilizada antes de responder."""
+
+
+class ClienteHTTP:
+    """
+    Cliente HTTP/1.1 mínimo para un servidor: GET con conexiones persistentes
+    reutilizadas (pool) y como mucho `maximo` peticiones a la vez. Acepta
+    respuestas con Content-Length, chunked o hasta el cierre, y gzip. Sigue
+    las redirecciones al mismo servidor (esquema, host y puerto); las que van
+    a otro dan ErrorHTTP con la URL de destino.
+    """
+
+    def __init__(self, url_base: str, maximo: int = 6, cabeceras=None, verificar_ssl: bool = True,
+                 timeout: float = 60.0):
+        partes = urlsplit(url_base)
+        if partes.scheme not in ("http", "https") or not partes.hostname:
+            raise ValueError(f"URL de Jenkins no válida: {url_base}")
+        self.url_base = url_base.rstrip("/")
+        self._origen = (partes.scheme, partes.hostname, partes.port or (443 if partes.scheme == "https" else 80))
+        self.host = partes.hostname
+        self.puerto = partes.port or (443 if partes.scheme == "https" else 80)
+        self.prefijo = partes.path.rstrip("/")
+        self._ssl = None
+        if partes.scheme == "https":
+            self._ssl = ssl.create_default_context()
+            if not verificar_ssl:
+                self._ssl.check_hostname = False
+                self._ssl.verify_mode = ssl.CERT_NONE
+        self._cabeceras = {"Host": partes.netloc.rpartition("@")[2], "Accept-Encoding": "gzip",
+                           "User-Agent": "logparser", **(cabeceras or {})}
+        self._maximo = maximo
+        self._semaforo = None
+        self._libres = []
+        self.timeout = timeout
+        self.conexiones = 0
+        self.bytes_recibidos = 0
+
+    async def _esperar(self, corrutina):
+        return await asyncio.wait_for(corrutina, self.timeout)
+
+    async def _conectar(self):
+        self.conexiones += 1
+        return await self._esperar(asyncio.open_connection(self.host, self.puerto, ssl=self._ssl, limit=1 << 20))
+
+    async def pedir(self, ruta: str, cabeceras=None, destino=None):
+        """
+        GET de `ruta` (relativa a la URL base). Si la respuesta es 200, cada
+        bloque del cuerpo ya descomprimido se pasa a destino(bytes), que puede
+        ser una corrutina (se espera antes de leer el bloque siguiente).
+        Devuelve (estado, cabeceras en minúsculas).
+        """
+        camino = self.prefijo + ruta
+        for _ in range(_MAX_REDIRECCIONES + 1):
+            estado, respuesta = await self._pedir(camino, cabeceras, destino)
+            if estado not in _REDIRECCIONES or "location" not in respuesta:
+                return estado, respuesta
+            camino = self._camino_redirigido(camino, respuesta["location"])
+        raise ErrorHTTP(estado, ruta, f"más de {_MAX_REDIRECCIONES} redirecciones")
+
+    def _camino_redirigido(self, camino: str, location: str) -> str:
+        # Location puede ser relativa; solo se sigue dentro del mismo servidor (credenciales y pool)
+        destino = urlsplit(urljoin(f"{self._origen[0]}://{self.host}:{self._origen[2]}{camino}", location))
+        puerto = destino.port or (443 if destino.scheme == "https" else 80)
+        if (destino.scheme, destino.hostname, puerto) != self._origen:
+            raise ErrorHTTP(302, camino, f"redirige a otro servidor: {destino.geturl()}; usa esa URL base")
+        return destino.path + (f"?{destino.query}" if destino.query else "")
+
+    async def _pedir(self, camino: str, cabeceras, destino):
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self._maximo)
+        async with self._semaforo:
+            while True:
+                reutilizada = bool(self._libres)
+                lector, escritor = self._libres.pop() if reutilizada else await self._conectar()
+                try:
+                    estado, respuesta, persistente = await self._intercambio(lector, escritor, camino, cabeceras,
+                                                                             destino)
+                except _ConexionCerrada:
+                    escritor.close()
+                    if reutilizada:
+                        continue  # caducó mientras estaba libre: se repite con otra
+                    raise ConnectionError(f"El servidor cerró la conexión sin responder ({camino})") from None
+                except BaseException:
+                    escritor.close()
+                    raise
+                if persistente:
+                    self._libres.append((lector, escritor))
+                else:
+                    escritor.close()
+                return estado, respuesta
+
+    async def _intercambio(self, lector, escritor, camino, cabeceras, destino):
+        lineas = [f"GET {camino} HTTP/1.1"]
+        lineas += [f"{k}: {v}" for k, v in {**self._cabeceras, **(cabeceras or {})}.items()]
+        try:
+            escritor.write(("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1"))
+            await escritor.drain()
+            linea = await self._esperar(lector.readline())
+        except (ConnectionError, OSError):
+            raise _ConexionCerrada() from None
+        if not linea:
+            raise _ConexionCerrada()
+        version, estado = linea.split(None, 2)[:2]
+        estado = int(estado)
+        respuesta = {}
+        while True:
+            linea = await self._esperar(lector.readline())
+            if linea in (b"\r\n", b"\n", b""):
+                break
+            clave, _, valor = linea.decode("latin-1").partition(":")
+            respuesta[clave.strip().lower()] = valor.strip()
+
+        descompresor = zlib.decompressobj(wbits=31) if respuesta.get("content-encoding") == "gzip" else None
+
+        async def entregar(datos, cola=False):
+            if not cola:
+                self.bytes_recibidos += len(datos)
+                if descompresor is not None:
+                    datos = descompresor.decompress(datos)
+            if destino is not None and estado == 200 and datos:
+                resultado = destino(datos)
+                if inspect.isawaitable(resultado):
+                    await resultado
+
+        persistente = version != b"HTTP/1.0" and respuesta.get("connection", "").lower() != "close"
+        if respuesta.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                tamano = int((await self._esperar(lector.readline())).split(b";")[0], 16)
+                if tamano == 0:
+                    while (await self._esperar(lector.readline())) not in (b"\r\n", b"\n", b""):
+                        pass  # trailers
+                    break
+                await self._copiar(lector, tamano, entregar)
+                await self._esperar(lector.readexactly(2))
+        elif "content-length" in respuesta:
+            await self._copiar(lector, int(respuesta["content-length"]), entregar)
+        else:
+            persistente = False
+            while datos := await self._esperar(lector.read(_TAMANO_BLOQUE)):
+                await entregar(datos)
+        if descompresor is not None:
+            await entregar(descompresor.flush(), cola=True)
+        return estado, respuesta, persistente
+
+    async def _copiar(self, lector, pendiente: int, entregar):
+        while pendiente:
+            datos = await self._esperar(lector.read(min(pendiente, _TAMANO_BLOQUE)))
+            if not datos:
+                raise asyncio.IncompleteReadError(b"", pendiente)
+            await entregar(datos)
+            pendiente -= len(datos)
+
+    async def json(self, ruta: str):
+        partes = []
+        estado, _ = await self.pedir(ruta, destino=partes.append)
+        if estado != 200:
+            raise ErrorHTTP(estado, ruta)
+        return json.loads(b"".join(partes))
+
+    async def cerrar(self):
+        while self._libres:
+            self._libres.pop()[1].close()
+
+
+def ruta_job(job: str) -> str:
+    """'carpeta/PROYECTO' -> '/job/carpeta/job/PROYECTO'."""
+    return "".join(f"/job/{quote(parte, safe='')}" for parte in job.strip("/").split("/") if parte)
+
+
+def parsear_builds(especificacion) -> list:
+    """['120-125', '130'] -> [120, ..., 125, 130]."""
+    numeros = set()
+    for parte in especificacion:
+        for trozo in str(parte).split(","):
+            if not trozo:
+                continue
+            inicio, _, fin = trozo.partition("-")
+            numeros.update(range(int(inicio), int(fin or inicio) + 1))
+    return sorted(numeros)
+
+
+async def ultimas_builds(cliente: ClienteHTTP, job: str, cuantas: int) -> list:
+    datos = await cliente.json(f"{ruta_job(job)}/api/json?tree=builds%5Bnumber%5D")
+    return sorted(b["number"] for b in datos.get("builds", []))[-cuantas:]
+
+
+def _escaner(parser: str):
+    """(versión, clase del escáner) del parser, los mismos que usan la caché y el modo incremental."""
+    if parser == "metricas":
+        from logparser.generar_metricas import VERSION_PARSER, EscanerPromocion
+        return VERSION_PARSER, EscanerPromocion
+    from logparser.parser_table_download import VERSION_PARSER, EscanerTableDownload
+    return VERSION_PARSER, EscanerTableDownload
+
+
+@dataclass
+class ResultadoDescarga:
+    build: int
+    ok: bool
+    estado: str = ""            # "terminada", "en curso", "sin cambios", "no existe" o "error"
+    bytes_nuevos: int = 0
+    salida: Optional[Path] = None
+    error: str = ""
+    segundos: float = 0.0
+
+
+async def descargar_build(cliente: ClienteHTTP, job: str, numero: int, parser: str, checkpoints=None,
+                          seguir: bool = False, intervalo: float = 30.0):
+    """
+    Descarga (o continúa) la consola de una build alimentando el escáner del
+    parser. Devuelve (tablas, meta, bytes nuevos, terminada); tablas es None
+    si la build ya estaba terminada en el checkpoint. ErrorHTTP si falla.
+    """
+    version, nuevo_estado = _escaner(parser)
+    ruta = f"{ruta_job(job)}/{numero}/"
+    url = cliente.url_base + ruta
+    checkpoint = checkpoints.cargar(url, parser, version) if checkpoints is not None else None
+    if checkpoint is not None and checkpoint["terminada"]:
+        return None, None, 0, True
+    if checkpoint is not None:
+        estado, offset, anotador = checkpoint["estado"], checkpoint["offset"], checkpoint["anotador"]
+    else:
+        estado, offset, anotador = nuevo_estado(), 0, None
+        estado.alimentar(PREFIJO_CONSOLA)
+
+    nuevos = 0
+    loop = asyncio.get_running_loop()
+
+    async def alimentar(bloque):
+        nonlocal nuevos
+        nuevos += len(bloque)
+        # El escaneo va a un hilo: mientras, el bucle sigue atendiendo las demás descargas
+        await loop.run_in_executor(None, estado.alimentar, bloque)
+
+    while True:
+        cabeceras = {"X-ConsoleAnnotator": anotador} if anotador else None
+        codigo, respuesta = await cliente.pedir(f"{ruta}logText/progressiveHtml?start={offset}", cabeceras, alimentar)
+        if codigo != 200:
+            raise ErrorHTTP(codigo, ruta)
+        offset = int(respuesta.get("x-text-size", offset))
+        anotador = respuesta.get("x-consoleannotator", anotador)
+        terminada = respuesta.get("x-more-data", "").lower() != "true"
+        if terminada or not seguir:
+            break
+        await asyncio.sleep(intervalo)
+
+    if checkpoints is not None:
+        try:
+            await loop.run_in_executor(None, checkpoints.guardar, url, parser, {
+                "version": version, "offset": offset, "anotador": anotador, "terminada": terminada, "estado": estado})
+        except OSError as e:
+            print(f"[WARN] No se pudo guardar el checkpoint de {url} ({e}).")
+    tablas, meta = await loop.run_in_executor(None, estado.resultado)
+    return tablas, meta, nuevos, terminada
+
+
+def _publicar(log_path: Path, parser: str, tablas: dict, meta: dict, salida_dir, origen: str, opciones: dict):
+    # Para el pool: como pipeline._tarea, sin devolver los DataFrames
+    from logparser.pipeline import hojas_desde_tablas, publicar
+    resultado = publicar(log_path, parser, hojas_desde_tablas(parser, tablas, meta), salida_dir,
+                         origen=origen, **opciones)
+    generados = resultado.salidas + resultado.graficas
+    return generados[0] if generados else None
+
+
+async def descargar(url: str, job: str, builds=None, ultimos: int = None, parser: str = "metricas",
+                    salida_dir=None, concurrencia: int = 6, jobs: int = 1, usar_cache: bool = True,
+                    seguir: bool = False, intervalo: float = 30.0, cabeceras=None, verificar_ssl: bool = True,
+                    **opciones):
+    """
+    Descarga y publica las builds indicadas (o las `ultimos` más recientes)
+    de `job`. Devuelve (lista de ResultadoDescarga, cliente) en orden de build.
+    `opciones` son las de pipeline.publicar (formatos, graficas, historico, plotlyjs).
+    """
+    from logparser.incremental import Checkpoints
+    checkpoints = Checkpoints() if usar_cache else None
+    if checkpoints is not None and not checkpoints.activo:
+        checkpoints = None
+    cliente = ClienteHTTP(url, concurrencia, cabeceras, verificar_ssl)
+    nombre = job.strip("/").rsplit("/", 1)[-1]
+    loop = asyncio.get_running_loop()
+    # Con un solo proceso, la escritura (Excel, gráficas) va a un hilo y se solapa con la red
+    pool = ProcessPoolExecutor(jobs) if jobs > 1 else ThreadPoolExecutor(1)
+    # Acota también las builds ya descargadas que esperan a publicarse (memoria)
+    en_curso = asyncio.Semaphore(concurrencia + max(jobs, 1))
+
+    async def una(numero):
+        async with en_curso:
+            t0 = time.perf_counter()
+            resultado = ResultadoDescarga(build=numero, ok=True)
+            try:
+                tablas, meta, resultado.bytes_nuevos, terminada = await descargar_build(
+                    cliente, job, numero, parser, checkpoints, seguir, intervalo)
+                if tablas is None:
+                    resultado.estado = "sin cambios"
+                else:
+                    resultado.estado = "terminada" if terminada else "en curso"
+                    log_path = Path(nombre) / f"{nombre}_{numero}.html"
+                    resultado.salida = await loop.run_in_executor(
+                        pool, _publicar, log_path, parser, tablas, meta, salida_dir,
+                        cliente.url_base + f"{ruta_job(job)}/{numero}/", opciones)
+            except ErrorHTTP as e:
+                resultado.ok = e.estado == 404
+                resultado.estado = "no existe" if e.estado == 404 else "error"
+                resultado.error = "" if resultado.ok else str(e)
+            except Exception as e:
+                resultado.ok, resultado.estado, resultado.error = False, "error", f"{type(e).__name__}: {e}"
+            resultado.segundos = time.perf_counter() - t0
+            return resultado
+
+    try:
+        if builds is None:
+            builds = await ultimas_builds(cliente, job, ultimos)
+        resultados = await asyncio.gather(*(una(n) for n in builds))
+    finally:
+        await cliente.cerrar()
+        pool.shutdown()
+    return list(resultados), cliente
+
+
+def imprimir_resumen(job: str, resultados, cliente: ClienteHTTP, segundos_totales: float):
+    print(f"\n=== Resumen de la descarga ({job}) ===")
+    for r in resultados:
+        etiqueta = "OK   " if r.ok else "ERROR"
+        detalle = f"{r.estado}, {r.bytes_nuevos / 1e6:.1f} MB nuevos" if r.bytes_nuevos else r.estado
+        print(f"[{etiqueta}] #{r.build} ({detalle}, {r.segundos:.1f} s)" + (f" -> {r.error}" if r.error else ""))
+    publicadas = sum(r.estado in ("terminada", "en curso") for r in resultados)
+    sin_cambios = sum(r.estado == "sin cambios" for r in resultados)
+    print(f"Builds: {len(resultados)} | publicadas: {publicadas} | sin cambios: {sin_cambios} "
+          f"| con error: {sum(not r.ok for r in resultados)} | descargado: {cliente.bytes_recibidos / 1e6:.1f} MB "
+          f"en {cliente.conexiones} conexiones | tiempo total: {segundos_totales:.1f} s")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Descarga consolas de Jenkins y genera sus métricas sin ficheros intermedios.")
+    ap.add_argument("url", help="URL de Jenkins (https://jenkins.ejemplo)")
+    ap.add_argument("--job", required=True, help="Job, con sus carpetas separadas por / (carpeta/PROYECTO)")
+    grupo = ap.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--builds", nargs="+", help="Números o rangos de build: 120-150 160")
+    grupo.add_argument("--ultimos", type=int, help="Las N builds más recientes del job")
+    from logparser.pipeline import PARSERS
+    ap.add_argument("--parser", choices=PARSERS, default="metricas")
+    ap.add_argument("--salida", type=Path, default=None, help="Directorio de salida (por defecto: ./<job>)")
+    ap.add_argument("--concurrencia", type=int, default=6, help="Peticiones HTTP simultáneas (conexiones del pool)")
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="Procesos para escribir Excel y gráficas")
+    ap.add_argument("--seguir", action="store_true", help="Sigue las builds en curso hasta que terminan")
+    ap.add_argument("--intervalo", type=float, default=30.0, help="Segundos entre sondeos con --seguir")
+    ap.add_argument("--usuario", default=os.environ.get("JENKINS_USER"),
+                    help="Usuario (el token de API se lee de JENKINS_TOKEN)")
+    ap.add_argument("--inseguro", action="store_true", help="No verifica el certificado HTTPS")
+    ap.add_argument("--formato", nargs="*", default=["xlsx"],
+                    help="Tablas a escribir: xlsx, csv, parquet, feather (sin valores = ninguna)")
+    ap.add_argument("--sin-graficas", action="store_true", help="No genera los HTML de gráficas")
+    ap.add_argument("--sin-cache", action="store_true", help="Sin checkpoints: descarga siempre las consolas enteras")
+    ap.add_argument("--historico", type=Path, default=None, help="Carga cada build en este histórico SQLite")
+    from logparser.generar_graficas import MODOS_PLOTLYJS
+    ap.add_argument("--plotlyjs", choices=MODOS_PLOTLYJS, default="incrustado",
+                    help="plotly.js dentro de cada HTML, en un fichero compartido por carpeta o desde CDN")
+    args = ap.parse_args(argv)
+
+    try:
+        builds = parsear_builds(args.builds) if args.builds else None
+    except ValueError:
+        print(f"[ERROR] Rango de builds no válido: {' '.join(args.builds)}")
+        return 2
+    cabeceras = {}
+    if args.usuario:
+        token = os.environ.get("JENKINS_TOKEN", "")
+        if not token:
+            print("[WARN] JENKINS_TOKEN no está definido: se usa el usuario sin token.")
+        credenciales = base64.b64encode(f"{args.usuario}:{token}".encode()).decode()
+        cabeceras["Authorization"] = f"Basic {credenciales}"
+
+    t0 = time.perf_counter()
+    try:
+        resultados, cliente = asyncio.run(descargar(
+            args.url, args.job, builds, args.ultimos, args.parser, args.salida, args.concurrencia, args.jobs,
+            not args.sin_cache, args.seguir, args.intervalo, cabeceras, not args.inseguro,
+            formatos=args.formato, graficas=not args.sin_graficas, historico=args.historico,
+            plotlyjs=args.plotlyjs))
+    except (ErrorHTTP, OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+    imprimir_resumen(args.job, resultados, cliente, time.perf_counter() - t0)
+    return 0 if all(r.ok for r in resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Procesado por lotes de consolas de Jenkins con un pool de procesos.
+
+Recibe ficheros (también comprimidos), zips de consolas, directorios o
+patrones glob (ver logparser.entradas), reparte los logs entre N
+procesos (las importaciones de pandas/openpyxl se pagan una vez por worker,
+no una vez por fichero) y devuelve los resultados en el orden de entrada.
+Un log que falla no detiene el resto: el error queda en el resumen final.
+
+Uso:
+    python -m logparser.lote [--parser metricas|table_download] [--jobs N] [--salida DIR]
+                               [--formato xlsx csv parquet feather] [--perfil [FICHERO.jsonl]]
+                               <ruta|dir|glob> ...
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class ResultadoLote:
+    ruta: Path
+    ok: bool
+    salida: Optional[Path] = None
+    error: str = ""
+    segundos: float = 0.0
+
+
+def _tarea_metricas(ruta: Path, salida_dir: Optional[Path], **opciones):
+    from logparser.generar_metricas import generar_metricas
+    return generar_metricas(ruta, salida_dir=salida_dir, **opciones)
+
+
+def _tarea_table_download(ruta: Path, salida_dir: Optional[Path], **opciones):
+    from logparser.parser_table_download import process_file
+    return process_file(ruta, salida_dir=salida_dir, **opciones)
+
+
+def _tarea_pipeline(ruta: Path, salida_dir: Optional[Path], **opciones):
+    from logparser.pipeline import _tarea
+    return _tarea(ruta, salida_dir, **opciones)
+
+
+TAREAS = {
+    "metricas": _tarea_metricas,
+    "table_download": _tarea_table_download,
+    "pipeline": _tarea_pipeline,
+}
+
+
+def expandir_entradas(entradas, patron: str = "*.html") -> list:
+    """
+    Convierte ficheros, directorios, zips y globs en una lista ordenada y sin
+    duplicados. Un zip aporta cada consola que contiene ("consolas.zip/x.html").
+    """
+    from logparser.entradas import existe, listar, miembro_zip
+    rutas = []
+    for entrada in entradas:
+        p = Path(entrada)
+        if p.is_dir() or p.is_file():
+            rutas.extend(listar(p, patron))
+        elif miembro_zip(p) is not None:
+            if existe(p):
+                rutas.append(p)
+        else:
+            rutas.extend(r for m in sorted(glob.glob(str(entrada))) if Path(m).is_file() for r in listar(m, patron))
+    vistos = set()
+    unicas = []
+    for r in rutas:
+        clave = r.resolve()
+        if clave not in vistos:
+            vistos.add(clave)
+            unicas.append(r)
+    return unicas
+
+
+def _ejecutar(tarea, ruta: Path, salida_dir: Optional[Path], opciones: dict,
+              perfil_opciones: Optional[dict] = None) -> ResultadoLote:
+    from logparser import perfil
+    t0 = time.perf_counter()
+    try:
+        with perfil.perfilar_si(ruta, perfil_opciones):
+            salida = TAREAS[tarea](ruta, salida_dir, **opciones)
+        return ResultadoLote(ruta, True, salida=salida, segundos=time.perf_counter() - t0)
+    except Exception as e:
+        detalle = "".join(traceback.format_exception_only(type(e), e)).strip()
+        return ResultadoLote(ruta, False, error=detalle, segundos=time.perf_counter() - t0)
+
+
+def procesar_lote(rutas, tarea: str = "metricas", jobs: Optional[int] = None,
+                  salida_dir: Optional[Path] = None, perfil_opciones: Optional[dict] = None,
+                  **opciones) -> list:
+    """
+    Procesa cada ruta con la tarea indicada y devuelve un ResultadoLote por
+    ruta, en el mismo orden que `rutas` independientemente del orden de fin.
+    jobs=1 ejecuta en el propio proceso; None usa todos los núcleos.
+    Las `opciones` se pasan tal cual a la función de la tarea (p. ej. usar_cache).
+    Con `perfil_opciones` (ver perfil.opciones_perfil) cada worker emite un
+    registro JSON de tiempos por fichero.
+    """
+    if tarea not in TAREAS:
+        raise ValueError(f"Tarea desconocida: {tarea} (opciones: {', '.join(TAREAS)})")
+    rutas = list(rutas)
+    if salida_dir is not None:
+        Path(salida_dir).mkdir(parents=True, exist_ok=True)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(rutas) or 1))
+
+    if jobs == 1:
+        return [_ejecutar(tarea, r, salida_dir, opciones, perfil_opciones) for r in rutas]
+
+    resultados = [None] * len(rutas)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futuros = {pool.submit(_ejecutar, tarea, r, salida_dir, opciones, perfil_opciones): i for i, r in enumerate(rutas)}
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            try:
+                resultados[i] = futuro.result()
+            except Exception as e:  # el worker murió (p. ej. sin memoria)
+                resultados[i] = ResultadoLote(rutas[i], False, error=f"{type(e).__name__}: {e}")
+    return resultados
+
+
+def imprimir_resumen(resultados, segundos_totales: float):
+    ok = [r for r in resultados if r.ok]
+    fallidos = [r for r in resultados if not r.ok]
+    print("\n=== Resumen del lote ===")
+    for r in resultados:
+        estado = "OK   " if r.ok else "ERROR"
+        print(f"[{estado}] {r.ruta.name} ({r.segundos:.1f} s)" + (f" -> {r.error}" if r.error else ""))
+    print(f"Procesados: {len(resultados)} | correctos: {len(ok)} | con error: {len(fallidos)} "
+          f"| tiempo total: {segundos_totales:.1f} s")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Procesa por lotes consolas HTML de Jenkins.")
+    ap.add_argument("entradas", nargs="+", help="Ficheros (también comprimidos), zips, directorios o patrones glob")
+    ap.add_argument("--parser", choices=sorted(TAREAS), default="metricas")
+    ap.add_argument("--jobs", "-j", type=int, default=None, help="Procesos en paralelo (por defecto: núcleos)")
+    ap.add_argument("--salida", type=Path, default=None, help="Directorio de salida (por defecto: junto a cada log)")
+    ap.add_argument("--sin-cache", action="store_true", help="No usar la caché de parseo")
+    ap.add_argument("--formato", nargs="+", default=["xlsx"], help="xlsx, csv, parquet y/o feather")
+    from logparser import perfil
+    perfil.agregar_argumentos(ap)
+    args = ap.parse_args(argv)
+
+    rutas = expandir_entradas(args.entradas)
+    if not rutas:
+        print("[WARN] No se encontraron consolas .html en las rutas indicadas.")
+        return 0
+    t0 = time.perf_counter()
+    resultados = procesar_lote(rutas, args.parser, args.jobs, args.salida,
+                               perfil_opciones=perfil.opciones_perfil(args),
+                               usar_cache=not args.sin_cache, formatos=args.formato)
+    imprimir_resumen(resultados, time.perf_counter() - t0)
+    return 0 if all(r.ok for r in resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
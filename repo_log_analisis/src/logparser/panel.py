@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Panel de proyecto: un único HTML con todas las builds de una carpeta de
+métricas, en lugar de abrir dos gráficas por build.
+
+Lee de cada <log>_METRICAS.xlsx (o su directorio columnar) solo las hojas
+Tiempos y, si existe, Concurrencia, y dibuja:
+  * duración por tecnología en cada build (barras apiladas)
+  * línea de tiempo de cada build, en minutos desde su inicio
+  * tiempo real ocupado (unión de intervalos) frente a la suma de duraciones
+
+Las figuras comparten una sola copia de plotly.js (ver --plotlyjs).
+
+Uso:
+    python -m logparser.panel METRICAS/PROYECTO [--salida panel.html] [--ultimos 200]
+                              [--plotlyjs incrustado|compartido|cdn]
+"""
+import argparse
+import html
+import sys
+from pathlib import Path
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from logparser.generar_graficas import AUTORIA, MODOS_PLOTLYJS, incluir_plotlyjs, tabla_tiempos
+
+
+def salidas_metricas(directorio) -> list:
+    """Excel de métricas y directorios columnares de `directorio` (sin duplicar una build)."""
+    directorio = Path(directorio)
+    excels = sorted(directorio.glob("*_METRICAS.xlsx"))
+    vistos = {p.name[:-len(".xlsx")] for p in excels}
+    columnares = sorted(p for p in directorio.glob("*_METRICAS") if p.is_dir() and p.name not in vistos)
+    return excels + columnares
+
+
+def _leer_build(ruta: Path):
+    from logparser.historico import build_de_salida
+    from logparser.salidas import leer_hoja
+    tiempos = tabla_tiempos(leer_hoja(ruta, "Tiempos"))
+    if tiempos is None:
+        return None
+    tiempos = tiempos.assign(build=build_de_salida(ruta))[["build", "nombre", "inicio", "fin", "duracion"]]
+    try:
+        concurrencia = leer_hoja(ruta, "Concurrencia")
+        total = concurrencia[concurrencia["tecnologia"] == "TOTAL"]
+    except (FileNotFoundError, ValueError, KeyError):  # Excel anterior a la hoja Concurrencia
+        total = None
+    union_ms = int(total["union_ms"].iloc[0]) if total is not None and len(total) else None
+    return tiempos, union_ms
+
+
+def datos_panel(directorio, ultimos: int = None):
+    """Devuelve (tiempos de todas las builds, resumen por build) ordenados por inicio."""
+    partes, resumen = [], []
+    for ruta in salidas_metricas(directorio):
+        try:
+            leido = _leer_build(ruta)
+        except Exception as e:  # un Excel dañado no impide el panel
+            print(f"[WARN] {ruta.name}: {type(e).__name__}: {e}")
+            continue
+        if leido is None:
+            continue
+        tiempos, union_ms = leido
+        partes.append(tiempos)
+        resumen.append({"build": tiempos["build"].iloc[0], "inicio": tiempos["inicio"].min(),
+                        "fin": tiempos["fin"].max(), "suma_ms": int(tiempos["duracion"].sum()),
+                        "union_ms": union_ms})
+    if not partes:
+        return None, None
+    resumen = pd.DataFrame(resumen).sort_values(["inicio", "build"]).reset_index(drop=True)
+    if ultimos:
+        resumen = resumen.tail(ultimos).reset_index(drop=True)
+    tiempos = pd.concat(partes, ignore_index=True)
+    tiempos = tiempos[tiempos["build"].isin(resumen["build"])]
+    return tiempos, resumen
+
+
+def _layout(fig, titulo, alto=None):
+    fig.update_layout(title=titulo, template="simple_white", title_font_size=20, title_x=0.5,
+                      legend_title_text="Tecnología", height=alto)
+    return fig
+
+
+def figuras_panel(tiempos: pd.DataFrame, resumen: pd.DataFrame) -> list:
+    orden = resumen["build"].tolist()
+    paleta = px.colors.qualitative.Plotly
+    tiempos = tiempos.assign(minutos=tiempos["duracion"] / 60000)
+
+    barras = px.bar(tiempos, x="build", y="minutos", color="nombre", category_orders={"build": orden},
+                    color_discrete_sequence=paleta)
+    figuras = [_layout(barras, "Duración por tecnología y build (min, suma)")]
+
+    # Timeline de builds: una fila por build, barras horizontales desde su inicio
+    inicio_build = tiempos.groupby("build")["inicio"].transform("min")
+    tiempos = tiempos.assign(desde=(tiempos["inicio"] - inicio_build).dt.total_seconds() / 60,
+                             minutos=(tiempos["fin"] - tiempos["inicio"]).dt.total_seconds() / 60)
+    timeline = go.Figure()
+    for i, (tecnologia, grupo) in enumerate(tiempos.groupby("nombre", sort=True)):
+        timeline.add_trace(go.Bar(
+            y=grupo["build"], x=grupo["minutos"], base=grupo["desde"], orientation="h", name=str(tecnologia),
+            marker_color=paleta[i % len(paleta)],
+            hovertemplate="%{y}<br>%{base:.0f} - %{x:.0f} min<extra>%{fullData.name}</extra>",
+        ))
+    timeline.update_layout(barmode="group", xaxis_title="Minutos desde el inicio de la build")
+    timeline.update_yaxes(type="category", categoryorder="array", categoryarray=orden, autorange="reversed")
+    figuras.append(_layout(timeline, "Línea de tiempo por build", alto=max(450, min(4000, 22 * len(orden)))))
+
+    if resumen["union_ms"].notna().any():
+        comparativa = go.Figure()
+        for columna, nombre in (("suma_ms", "Suma de duraciones"), ("union_ms", "Tiempo real ocupado")):
+            comparativa.add_trace(go.Scatter(x=resumen["build"], y=resumen[columna] / 60000,
+                                             mode="lines+markers", name=nombre))
+        comparativa.update_layout(yaxis_title="Minutos", legend_title_text="")
+        figuras.append(_layout(comparativa, "Tiempo real ocupado frente a suma por build"))
+    return figuras
+
+
+def generar_panel(directorio, salida=None, plotlyjs: str = "incrustado", ultimos: int = None):
+    """Escribe el panel de `directorio` (por defecto <directorio>/<carpeta>_PANEL.html). None si no hay builds."""
+    directorio = Path(directorio)
+    tiempos, resumen = datos_panel(directorio, ultimos)
+    if tiempos is None:
+        print(f"[WARN] Sin métricas para el panel en {directorio}")
+        return None
+    salida = Path(salida) if salida else directorio / f"{directorio.resolve().name}_PANEL.html"
+    incluir = incluir_plotlyjs(salida.parent, plotlyjs)
+    cuerpos = [fig.to_html(full_html=False, include_plotlyjs=incluir if i == 0 else False)
+               for i, fig in enumerate(figuras_panel(tiempos, resumen))]
+    titulo = html.escape(f"Panel {directorio.resolve().name}: {len(resumen)} builds")
+    salida.write_text(
+        "<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\" />"
+        f"<title>{titulo}</title></head>\n<body>\n"
+        f"<h1 style=\"text-align:center;font-family:sans-serif\">{titulo}</h1>\n"
+        f"<p style=\"text-align:center;font-family:sans-serif\">{html.escape(AUTORIA)}</p>\n"
+        + "\n".join(cuerpos) + "\n</body>\n</html>\n",
+        encoding="utf-8",
+    )
+    print(f"[OK] Panel generado: {salida} ({len(resumen)} builds)")
+    return salida
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Panel HTML con todas las builds de una carpeta de métricas.")
+    ap.add_argument("directorio", type=Path, help="Carpeta con los *_METRICAS.xlsx (o directorios columnares)")
+    ap.add_argument("--salida", type=Path, default=None, help="HTML de salida (por defecto <carpeta>_PANEL.html)")
+    ap.add_argument("--ultimos", type=int, default=None, help="Solo las N builds más recientes")
+    ap.add_argument("--plotlyjs", choices=MODOS_PLOTLYJS, default="incrustado")
+    args = ap.parse_args(argv)
+    if not args.directorio.is_dir():
+        print(f"[ERROR] Carpeta no válida: {args.directorio}")
+        return 2
+    return 0 if generar_panel(args.directorio, args.salida, args.plotlyjs, args.ultimos) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,38 +5,162 @@ Parser específico para logs de Jenkins del job "table download".
 Actualización:
 - "Tiempos" ahora usa el PRIMER y ÚLTIMO timestamp del log para calcular la duración total del proceso.
 - GlobalData y Etiquetas mantienen el detalle por tabla descargada.
+- La consola HTML se extrae en streaming (sin construir el DOM con BeautifulSoup):
+  el fichero se lee por bloques y las líneas de texto del <pre>/#out llegan
+  directamente a los patrones de timestamp/descarga.
+- La consola puede estar comprimida (.gz, .bz2, .xz, .zst) o dentro de un zip
+  (ver logparser.entradas); un zip se procesa consola a consola.
 
 Hojas generadas:
   * GlobalData: etiqueta, tecnologia, fase, inicio, fin, duracion_ms, duracion_hms
   * Tiempos: Tecnología, Inicio, Fin, Duración (ms), Duración   <-- ahora = (último_ts - primer_ts)
   * Etiquetas: Numero etiqueta, Tecnologia, Inicio, Fin, Duración
   * Medias Tecnologia: Tecnología, Número de etiquetas, Suma total (ms), Media (ms), Media (h:m:s)
+  * Concurrencia, Serie Concurrencia, Ruta Critica: ver logparser.concurrencia
 
 Uso:
     python parser_table_download.py "<ruta al HTML>"       # un archivo
     python parser_table_download.py "<ruta al directorio>" # procesa todos los .html del directorio
+    python parser_table_download.py "<consolas.zip>"       # cada .html del zip
+    python parser_table_download.py "<directorio o glob>" --jobs 8  # lote en paralelo (ver logparser.lote)
 """
+import argparse
+import copy
 import re
 import sys
-from datetime import datetime
+import time
+from array import array
+from html.parser import HTMLParser
+from itertools import islice
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-try:
-    from bs4 import BeautifulSoup
-except ImportError as e:
-    print("[ERROR] Falta la librería 'beautifulsoup4'. Instálala con: pip install beautifulsoup4")
-    sys.exit(1)
+from logparser import perfil
+from logparser.almacen import Diccionario
+from logparser.entradas import bloques, es_zip, fin_de_consola, nuevo_decodificador, ruta_logica
+from logparser.fechas import a_datetime, a_datetime64, segundos
+from logparser.reglas import Regla, motor, registrar
 
 _TS_RE = re.compile(r"\[(\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2})\]")
+# Primer timestamp de cada línea de un bloque, de una sola pasada
+_TS_LINEA_RE = re.compile(r"^[^\n]*?\[(\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2})\]", re.MULTILINE)
 _DL_ECHO_RE = re.compile(r"Downloaded ftp file\s+([A-Z0-9_]+)")
 _TO_PATH_RE = re.compile(r"to\s+[A-Z]:/[^/\n]+/([A-Z0-9_]+)\s*$", re.IGNORECASE)
 
-def _extract_console_text(html_text: str) -> str:
-    soup = BeautifulSoup(html_text, "html.parser")
-    pre = soup.find("pre") or soup.select_one("#main-panel pre, #main-panel #out")
-    return pre.get_text("\n") if pre else soup.get_text("\n")
+registrar(
+    "table_download",
+    Regla("descarga_ruta", _TO_PATH_RE, (":/",)),
+    Regla("descarga_eco", _DL_ECHO_RE, ("Downloaded ftp file",)),
+)
+
+# Subir al cambiar la lógica de extracción: invalida las entradas de caché antiguas
+VERSION_PARSER = "4"
+
+_TAMANO_BLOQUE = 1 << 20  # 1 MiB por lectura
+_LINEAS_POR_LOTE = 10_000
+_TAGS_SIN_TEXTO = ("script", "style")
+
+
+class _ConsolaHTMLStream(HTMLParser):
+    """
+    Extractor incremental del texto de la consola.
+    Recoge el texto del primer <pre> (o del elemento id="out") y lo devuelve
+    por líneas a medida que se alimenta con bloques de HTML. Como hacía
+    get_text() con separador de línea, cada nodo de texto empieza en una línea nueva.
+    Si el documento no tiene consola se usa todo el texto de la página.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._objetivo = None      # nombre del tag de la consola una vez encontrado
+        self._profundidad = 0
+        self._ignorar = 0          # dentro de <script>/<style>
+        self._nodo_nuevo = False
+        self._pendiente = ""
+        self._fuera = []           # texto fuera de la consola (solo para el fallback)
+        self.lineas = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _TAGS_SIN_TEXTO:
+            self._ignorar += 1
+        if self._profundidad:
+            if tag == self._objetivo:
+                self._profundidad += 1
+        elif self._objetivo is None and (tag == "pre" or ("id", "out") in attrs):
+            self._objetivo = tag
+            self._profundidad = 1
+            self._fuera = []
+        self._nodo_nuevo = True
+
+    def handle_endtag(self, tag):
+        if tag in _TAGS_SIN_TEXTO and self._ignorar:
+            self._ignorar -= 1
+        if self._profundidad and tag == self._objetivo:
+            self._profundidad -= 1
+            if self._profundidad == 0:
+                self._vaciar()
+        self._nodo_nuevo = True
+
+    def handle_startendtag(self, tag, attrs):
+        self._nodo_nuevo = True
+
+    def handle_data(self, data):
+        if self._ignorar or not data:
+            return
+        if self._profundidad:
+            if self._nodo_nuevo and self._pendiente:
+                self.lineas.append(self._pendiente)
+                self._pendiente = ""
+            self._nodo_nuevo = False
+            partes = (self._pendiente + data).splitlines(True)
+            self._pendiente = ""
+            if partes and not partes[-1].endswith(("\n", "\r")):
+                self._pendiente = partes.pop()
+            self.lineas.extend(p.rstrip("\r\n") for p in partes)
+        elif self._objetivo is None:
+            if self._nodo_nuevo or not self._fuera:
+                self._fuera.append(data)
+            else:
+                self._fuera[-1] += data
+            self._nodo_nuevo = False
+
+    def _vaciar(self):
+        if self._pendiente:
+            self.lineas.append(self._pendiente)
+            self._pendiente = ""
+
+    def close(self):
+        super().close()
+        self._vaciar()
+        if self._objetivo is None and self._fuera:
+            self.lineas.extend("\n".join(self._fuera).splitlines())
+            self._fuera = []
+
+
+def _iter_console_lines(chunks):
+    """Genera las líneas de texto de la consola a partir de bloques de HTML."""
+    extractor = _ConsolaHTMLStream()
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.lineas:
+            yield from extractor.lineas
+            extractor.lineas = []
+    extractor.close()
+    yield from extractor.lineas
+
+
+def _leer_en_bloques(path: Path, tamano: int = _TAMANO_BLOQUE):
+    # Texto por bloques, con la misma decodificación que los escáneres (logparser.entradas)
+    decodificador = nuevo_decodificador()
+    for bloque in bloques(path, tamano=tamano):
+        texto = decodificador.decode(bloque)
+        if texto:
+            yield texto
+    cola = decodificador.decode(b"", final=True)
+    if cola:
+        yield cola
 
 def _format_hms_from_ms(ms: int) -> str:
     if ms is None or pd.isna(ms):
@@ -47,65 +171,160 @@ def _format_hms_from_ms(ms: int) -> str:
     sec = s % 60
     return f"{h:02d}:{m:02d}:{sec:02d}"
 
-def parse_table_download_console(html_text: str, proyecto: str = "PROD_TD"):
+def parse_table_download_console(html_text, proyecto: str = "PROD_TD"):
     """
+    html_text puede ser el HTML completo (str) o un iterable de bloques de HTML
+    (p. ej. _leer_en_bloques(ruta)) para procesar consolas grandes en streaming.
+
     Devuelve:
       df_events: DataFrame con columnas [etiqueta, tecnologia, fase, inicio, fin, duracion_ms, duracion_hms]
       log_start: datetime del primer timestamp detectado en el log
       log_end:   datetime del último timestamp detectado en el log
     """
-    text = _extract_console_text(html_text)
-    lines = text.splitlines()
-
-    events = {}  # tabla -> {start, end}
-    log_start = None
-    log_end = None
-
-    for line in lines:
-        m_ts = _TS_RE.search(line)
-        if m_ts:
-            ts = datetime.strptime(m_ts.group(1), "%Y.%m.%d %H:%M:%S")
-            if (log_start is None) or (ts < log_start):
-                log_start = ts
-            if (log_end is None) or (ts > log_end):
-                log_end = ts
-
-            # 1) Línea tipo: "... to D:/.../<TABLA>"
-            m_to = _TO_PATH_RE.search(line)
-            if m_to:
-                table = m_to.group(1)
-                e = events.setdefault(table, {"start": ts, "end": ts})
-                if ts < e["start"]:
-                    e["start"] = ts
-                if ts > e["end"]:
-                    e["end"] = ts
-
-            # 2) Línea tipo: "[echo] Downloaded ftp file <TABLA>"
-            m_dl = _DL_ECHO_RE.search(line)
-            if m_dl:
-                table = m_dl.group(1)
-                e = events.setdefault(table, {"start": ts, "end": ts})
-                if ts < e["start"]:
-                    e["start"] = ts
-                if ts > e["end"]:
-                    e["end"] = ts
-
-    rows = []
-    for table, e in events.items():
-        inicio = e["start"]
-        fin = e["end"]
-        dur_ms = int((fin - inicio).total_seconds() * 1000)
-        rows.append({
-            "etiqueta": table,                 # usamos el código de tabla
-            "tecnologia": "AS400",
-            "fase": "DOWNLOAD",
-            "inicio": inicio,
-            "fin": fin,
-            "duracion_ms": dur_ms,
-            "duracion_hms": _format_hms_from_ms(dur_ms),
-        })
+    chunks = [html_text] if isinstance(html_text, str) else html_text
+    escaner = EscanerTableDownload().procesar_lineas(_iter_console_lines(chunks))
+    perfil.contar(lineas=escaner.lineas, eventos=len(escaner.tablas))
+    return escaner.df_eventos(), _a_datetime(escaner.log_start), _a_datetime(escaner.log_end)
+
+class EscanerTableDownload:
+    """
+    Estado del parseo de una consola table download: extractor HTML en
+    streaming, (inicio, fin) de cada tabla y primer/último timestamp del log,
+    en segundos desde la época (logparser.fechas). Las tablas se guardan como
+    en logparser.almacen: un código por nombre (Diccionario) que indexa dos
+    arrays int64 de inicio y fin, sin una tupla por tabla.
+    alimentar() acepta bloques de bytes arbitrarios; el estado se puede
+    serializar para retomar el parseo de una consola que sigue creciendo
+    (ver logparser.incremental); `terminada` indica que ya ha pasado la línea
+    final de la consola ("Finished: ...").
+    """
 
-    df = pd.DataFrame(rows)
+    def __init__(self):
+        self.tablas = Diccionario()   # nombre de tabla -> código, por orden de aparición
+        self.inicio = array("q")      # por código, segundos desde la época
+        self.fin = array("q")
+        self.log_start = None
+        self.log_end = None
+        self.lineas = 0
+        self.terminada = False
+        self._decodificador = nuevo_decodificador()
+        self._html = _ConsolaHTMLStream()
+
+    def procesar_lineas(self, lines):
+        """Aplica los patrones de timestamp/descarga a las líneas de texto de la consola, por lotes."""
+        lines = iter(lines)
+        while True:
+            lote = list(islice(lines, _LINEAS_POR_LOTE))
+            if not lote:
+                return self
+            self.lineas += len(lote)
+            self._procesar_texto("\n".join(lote))
+
+    def _procesar_texto(self, texto):
+        self.terminada = self.terminada or fin_de_consola(texto)
+        # Primer/último timestamp: el texto "AAAA.MM.DD hh:mm:ss" ordena igual que la fecha
+        marcas = _TS_LINEA_RE.findall(texto)
+        if marcas:
+            primera, ultima = segundos(min(marcas)), segundos(max(marcas))
+            if (self.log_start is None) or (primera < self.log_start):
+                self.log_start = primera
+            if (self.log_end is None) or (ultima > self.log_end):
+                self.log_end = ultima
+
+        # Solo las líneas con "Downloaded ftp file" o ":/" (prefiltro de reglas) pueden ser descargas
+        tablas, inicio, fin = self.tablas, self.inicio, self.fin
+        for line in motor("table_download").candidatas(texto):
+            m_ts = _TS_RE.search(line)
+            if m_ts:
+                ts = segundos(m_ts.group(1))
+                # 1) Línea tipo: "... to D:/.../<TABLA>"
+                # 2) Línea tipo: "[echo] Downloaded ftp file <TABLA>"
+                for m in (_TO_PATH_RE.search(line), _DL_ECHO_RE.search(line)):
+                    if m:
+                        codigo = tablas.codigo(m.group(1))
+                        if codigo == len(inicio):
+                            inicio.append(ts)
+                            fin.append(ts)
+                        elif ts < inicio[codigo]:
+                            inicio[codigo] = ts
+                        elif ts > fin[codigo]:
+                            fin[codigo] = ts
+
+    def _consumir_lineas(self):
+        if self._html.lineas:
+            self.procesar_lineas(self._html.lineas)
+            self._html.lineas = []
+
+    def alimentar(self, bloque: bytes):
+        self._html.feed(self._decodificador.decode(bloque))
+        self._consumir_lineas()
+
+    def cerrado(self):
+        """Copia del escáner con el documento cerrado (última línea incluida); self no cambia."""
+        final = copy.copy(self)
+        final.tablas = Diccionario(self.tablas.valores)
+        final.inicio, final.fin = array("q", self.inicio), array("q", self.fin)
+        final._html = copy.deepcopy(self._html)
+        estado = self._decodificador.getstate()
+        cola = self._decodificador.decode(b"", final=True)
+        self._decodificador.setstate(estado)
+        final._decodificador = None
+        final._html.feed(cola)
+        final._html.close()
+        final._consumir_lineas()
+        return final
+
+    def resultado(self):
+        """(tablas, meta) del parseo hasta aquí, con el formato de la caché."""
+        final = self.cerrado()
+        perfil.contar(eventos=len(final.tablas))
+        log_start, log_end = _a_datetime(final.log_start), _a_datetime(final.log_end)
+        return {"eventos": final.df_eventos()}, {"log_start": log_start, "log_end": log_end}
+
+    @property
+    def events(self) -> dict:
+        """tabla -> (inicio, fin) en segundos (para comparar con otras extracciones)."""
+        return dict(zip(self.tablas.valores, zip(self.inicio, self.fin)))
+
+    def df_eventos(self) -> pd.DataFrame:
+        # copy(): una vista sobre el array impediría que siga creciendo
+        return _events_to_df(self.tablas.valores, np.frombuffer(self.inicio, dtype=np.int64).copy(),
+                             np.frombuffer(self.fin, dtype=np.int64).copy())
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        if self._decodificador is not None:
+            estado["_decodificador"] = self._decodificador.getstate()
+        return estado
+
+    def __setstate__(self, estado):
+        decodificador = estado["_decodificador"]
+        self.__dict__.update(estado)
+        if decodificador is not None:
+            self._decodificador = nuevo_decodificador()
+            self._decodificador.setstate(decodificador)
+
+
+def _extraer_eventos(lines):
+    escaner = EscanerTableDownload().procesar_lineas(lines)
+    perfil.contar(lineas=escaner.lineas, eventos=len(escaner.tablas))
+    return escaner.events, _a_datetime(escaner.log_start), _a_datetime(escaner.log_end)
+
+def _a_datetime(segundos_epoca):
+    return None if segundos_epoca is None else a_datetime(segundos_epoca)
+
+def _events_to_df(tablas, inicio: np.ndarray, fin: np.ndarray) -> pd.DataFrame:
+    """Nombre de cada tabla y sus arrays de inicio y fin en segundos desde la época."""
+    duracion_ms = (fin - inicio) * 1000
+    df = pd.DataFrame({
+        "etiqueta": list(tablas),          # usamos el código de tabla
+        "tecnologia": "AS400",
+        "fase": "DOWNLOAD",
+        "inicio": a_datetime64(inicio),
+        "fin": a_datetime64(fin),
+        "duracion_ms": duracion_ms,
+        "duracion_hms": [_format_hms_from_ms(ms) for ms in duracion_ms.tolist()],
+    })
     if df.empty:
         # Asegura esquema para no romper el pipeline
         df = pd.DataFrame(columns=[
@@ -113,11 +332,12 @@ def parse_table_download_console(html_text: str, proyecto: str = "PROD_TD"):
         ])
     else:
         df = df.sort_values(["inicio","etiqueta"]).reset_index(drop=True)
-    return df, log_start, log_end
+    return df
 
+@perfil.medido("table_download.agregacion")
 def _build_sheets(df_events: pd.DataFrame, log_start, log_end) -> dict:
     """
-    Construye los DataFrames para las 4 hojas esperadas.
+    Construye los DataFrames para las 4 hojas esperadas más las de concurrencia.
     - En "Tiempos", la duración es (log_end - log_start).
     """
     # 1) GlobalData
@@ -165,51 +385,79 @@ def _build_sheets(df_events: pd.DataFrame, log_start, log_end) -> dict:
         grp["Media (h:m:s)"] = grp["Media (ms)"].apply(lambda ms: _format_hms_from_ms(ms if pd.notna(ms) else 0))
         df_medias = grp[["Tecnología","Número de etiquetas","Suma total (ms)","Media (ms)","Media (h:m:s)"]]
 
-    return {
+    sheets = {
         "GlobalData": df_global,
         "Tiempos": df_tiempos,
         "Etiquetas": df_etq,
         "Medias Tecnologia": df_medias,
     }
+    # 5) Concurrencia, Serie Concurrencia y Ruta Critica (barrido sobre GlobalData)
+    from logparser.concurrencia import hojas_concurrencia
+    sheets.update(hojas_concurrencia(df_global))
+    return sheets
 
-def _write_excel(base_html: Path, sheets: dict):
+def _write_excel(base_html: Path, sheets: dict, salida_dir: Path = None, formatos=("xlsx",)):
+    from logparser.historico import metadatos_build
+    from logparser.salidas import escribir_hojas
+    metadatos = metadatos_build(base_html)
+    base_html = ruta_logica(base_html)  # "x.html.gz" o "P/consolas.zip/x.html" -> "x.html" junto al original
     out_name = f"{base_html.stem}_METRICAS.xlsx"
-    out_path = base_html.with_name(out_name)
-    with pd.ExcelWriter(out_path, engine="xlsxwriter", datetime_format="yyyy-mm-dd hh:mm:ss") as xw:
-        for sheet_name, df in sheets.items():
-            df.to_excel(xw, index=False, sheet_name=sheet_name)
-            # Ajustar anchos básicos
-            ws = xw.sheets[sheet_name]
-            for i, col in enumerate(df.columns):
-                width = max(12, min(40, int(df[col].astype(str).str.len().max() if not df.empty else 12) + 2))
-                ws.set_column(i, i, width)
-    return out_path
-
-def process_path(input_path: Path):
-    if input_path.is_file():
-        with open(input_path, "r", encoding="utf-8", errors="ignore") as f:
-            html_text = f.read()
-        df_events, log_start, log_end = parse_table_download_console(html_text, proyecto="PROD_TD")
-        sheets = _build_sheets(df_events, log_start, log_end)
-        out = _write_excel(input_path, sheets)
-        print(f"[OK] Generado: {out}")
-    elif input_path.is_dir():
-        htmls = sorted([p for p in input_path.glob("*.html")])
+    out_path = Path(salida_dir) / out_name if salida_dir else base_html.with_name(out_name)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    return escribir_hojas(out_path, sheets, formatos, metadatos=metadatos)[0]
+
+@perfil.medido("table_download.parseo")
+def parse_file(input_path: Path, usar_cache: bool = True):
+    """
+    Como parse_table_download_console, leyendo el fichero. Con usar_cache, una
+    consola que solo ha crecido se retoma desde el último checkpoint
+    (logparser.incremental) y una ya parseada se lee de la caché.
+    """
+    from logparser.incremental import parsear_incremental
+    tablas, meta = parsear_incremental(input_path, "table_download", VERSION_PARSER, EscanerTableDownload, usar_cache)
+    return tablas["eventos"], meta["log_start"], meta["log_end"]
+
+def process_file(input_path: Path, salida_dir: Path = None, usar_cache: bool = True, formatos=("xlsx",)) -> Path:
+    df_events, log_start, log_end = parse_file(input_path, usar_cache)
+    sheets = _build_sheets(df_events, log_start, log_end)
+    out = _write_excel(input_path, sheets, salida_dir, formatos)
+    print(f"[OK] Generado: {out}")
+    return out
+
+def process_path(input_path: Path, jobs: int = 1, salida_dir: Path = None, usar_cache: bool = True,
+                 formatos=("xlsx",), perfil_opciones: dict = None):
+    if input_path.is_file() and not es_zip(input_path):
+        with perfil.perfilar_si(input_path, perfil_opciones):
+            process_file(input_path, salida_dir, usar_cache, formatos)
+    else:
+        from logparser import lote
+        htmls = lote.expandir_entradas([input_path])
         if not htmls:
-            print("[WARN] No se encontraron .html en el directorio.")
+            if input_path.is_dir():
+                print("[WARN] No se encontraron consolas .html en el directorio.")
+            else:
+                print("[ERROR] Ruta no válida:", input_path)
             return
-        for p in htmls:
-            with open(p, "r", encoding="utf-8", errors="ignore") as f:
-                html_text = f.read()
-            df_events, log_start, log_end = parse_table_download_console(html_text, proyecto="PROD_TD")
-            sheets = _build_sheets(df_events, log_start, log_end)
-            out = _write_excel(p, sheets)
-            print(f"[OK] Generado: {out}")
-    else:
-        print("[ERROR] Ruta no válida:", input_path)
+        t0 = time.perf_counter()
+        resultados = lote.procesar_lote(htmls, "table_download", jobs, salida_dir, perfil_opciones=perfil_opciones,
+                                        usar_cache=usar_cache, formatos=formatos)
+        lote.imprimir_resumen(resultados, time.perf_counter() - t0)
+        return resultados
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Uso: python parser_table_download.py <ruta a HTML o directorio>")
+        print("Uso: python parser_table_download.py <ruta a HTML o directorio> [--jobs N] [--salida DIR]")
         sys.exit(2)
-    process_path(Path(sys.argv[1]))
+    ap = argparse.ArgumentParser(description="Parser de consolas 'table download'.")
+    ap.add_argument("ruta", type=Path, help="HTML (también comprimido), zip de consolas, directorio o patrón glob")
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="Procesos en paralelo para directorios (0 = todos los núcleos)")
+    ap.add_argument("--salida", type=Path, default=None, help="Directorio de salida (por defecto: junto al HTML)")
+    ap.add_argument("--sin-cache", action="store_true", help="Parsea siempre el log, sin leer ni escribir la caché")
+    ap.add_argument("--formato", nargs="+", default=["xlsx"], help="xlsx, csv, parquet y/o feather")
+    perfil.agregar_argumentos(ap)
+    args = ap.parse_args()
+    resultados = process_path(args.ruta, jobs=args.jobs or None, salida_dir=args.salida,
+                              usar_cache=not args.sin_cache, formatos=args.formato,
+                              perfil_opciones=perfil.opciones_perfil(args))
+    if resultados and not all(r.ok for r in resultados):
+        sys.exit(1)
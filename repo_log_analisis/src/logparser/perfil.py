@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentación por etapas (lectura/extracción, agregación, escritura, gráficas).
+
+Las funciones de los módulos marcan sus etapas con @medido("nombre") o
+`with etapa("nombre")` y añaden contadores con contar(lineas=..., eventos=...).
+Si no hay un perfil activo todo esto es un no-op de coste despreciable.
+
+perfilar(archivo, ...) activa el perfil para un fichero y al terminar emite
+un registro JSON por línea (JSONL) con, por etapa: tiempo de pared, tiempo de
+CPU, líneas/s, eventos y pico de memoria (tracemalloc, solo con memoria=True).
+Con volcado_dir se guarda además un cProfile (.prof) y las 25 líneas que más
+memoria reservan (tracemalloc) para analizar un fichero concreto.
+
+Los CLIs lo exponen con --perfil [FICHERO.jsonl] (alias --profile; sin
+fichero, el registro va a stderr) y --perfil-volcado DIR.
+"""
+import cProfile
+import functools
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_activo = None
+
+
+class Perfil:
+    def __init__(self, archivo, memoria: bool = False):
+        self.archivo = str(archivo)
+        self.memoria = memoria
+        self.etapas = []
+        self._pila = []
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        registro = {"etapa": nombre}
+        self._pila.append(registro)
+        if self.memoria:
+            tracemalloc.reset_peak()
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield registro
+        finally:
+            registro["wall_s"] = round(time.perf_counter() - t0, 6)
+            registro["cpu_s"] = round(time.process_time() - c0, 6)
+            if registro.get("lineas") and registro["wall_s"]:
+                registro["lineas_s"] = round(registro["lineas"] / registro["wall_s"])
+            if self.memoria:
+                # reset_peak() de una etapa anidada borra el pico de la exterior: se propaga a mano
+                pico = round(tracemalloc.get_traced_memory()[1] / 1e6, 3)
+                registro["pico_mb"] = max(pico, registro.get("pico_mb", 0))
+            self._pila.pop()
+            if self.memoria and self._pila:
+                padre = self._pila[-1]
+                padre["pico_mb"] = max(padre.get("pico_mb", 0), registro["pico_mb"])
+            self.etapas.append(registro)
+
+    def contar(self, **contadores):
+        if self._pila:
+            actual = self._pila[-1]
+            for clave, valor in contadores.items():
+                actual[clave] = actual.get(clave, 0) + valor
+
+
+@contextmanager
+def etapa(nombre: str):
+    if _activo is None:
+        yield {}
+    else:
+        with _activo.etapa(nombre) as registro:
+            yield registro
+
+
+def medido(nombre: str):
+    """Decorador: registra la llamada como la etapa `nombre` si hay un perfil activo."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _activo is None:
+                return funcion(*args, **kwargs)
+            with _activo.etapa(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def contar(**contadores):
+    if _activo is not None:
+        _activo.contar(**contadores)
+
+
+def _rss_max_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1e6 if sys.platform == "darwin" else 1e3), 1)  # macOS en bytes, Linux en KB
+
+
+def _emitir(registro: dict, destino):
+    linea = json.dumps(registro, ensure_ascii=False, default=str)
+    if destino in (None, "-"):
+        # El stderr real: algunos CLIs (generar_graficas) redirigen sys.stderr a su log
+        print(linea, file=sys.__stderr__ or sys.stderr, flush=True)
+    else:
+        with open(destino, "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
+
+
+@contextmanager
+def perfilar(archivo, destino=None, memoria: bool = False, volcado_dir=None):
+    """
+    Activa el perfil de `archivo` durante el bloque y emite su registro JSON
+    en `destino` (ruta JSONL; None o "-" = stderr).
+    """
+    global _activo
+    anterior = _activo
+    perfil = Perfil(archivo, memoria=memoria or volcado_dir is not None)
+    traza_previa = tracemalloc.is_tracing()
+    if perfil.memoria and not traza_previa:
+        tracemalloc.start()
+    perfilador = cProfile.Profile() if volcado_dir else None
+    _activo = perfil
+    inicio = datetime.now()
+    t0, c0 = time.perf_counter(), time.process_time()
+    ok = False
+    if perfilador:
+        perfilador.enable()
+    try:
+        yield perfil
+        ok = True
+    finally:
+        if perfilador:
+            perfilador.disable()
+        _activo = anterior
+        registro = {
+            "archivo": perfil.archivo,
+            "inicio": inicio.isoformat(timespec="seconds"),
+            "ok": ok,
+            "wall_s": round(time.perf_counter() - t0, 6),
+            "cpu_s": round(time.process_time() - c0, 6),
+            "rss_max_mb": _rss_max_mb(),
+            "etapas": perfil.etapas,
+        }
+        if volcado_dir:
+            registro["volcados"] = _volcar(perfil, perfilador, Path(volcado_dir))
+        if perfil.memoria and not traza_previa:
+            tracemalloc.stop()
+        _emitir(registro, destino)
+
+
+def _volcar(perfil: Perfil, perfilador, directorio: Path) -> list:
+    directorio.mkdir(parents=True, exist_ok=True)
+    base = directorio / f"{Path(perfil.archivo).name}.{datetime.now():%Y%m%d-%H%M%S}"
+    prof = base.with_name(base.name + ".prof")
+    perfilador.dump_stats(prof)
+    mem = base.with_name(base.name + ".tracemalloc.txt")
+    with open(mem, "w", encoding="utf-8") as f:
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:25]:
+            f.write(f"{stat}\n")
+    return [str(prof), str(mem)]
+
+
+def agregar_argumentos(ap):
+    """Añade --perfil/--profile y --perfil-volcado a un ArgumentParser."""
+    ap.add_argument("--perfil", "--profile", nargs="?", const="-", default=None, metavar="FICHERO.jsonl",
+                    help="Emite un registro JSON de tiempos por etapa (sin fichero: a stderr)")
+    ap.add_argument("--perfil-memoria", action="store_true", help="Incluye el pico de memoria por etapa (más lento)")
+    ap.add_argument("--perfil-volcado", default=None, metavar="DIR",
+                    help="Guarda además un cProfile (.prof) y el top de tracemalloc por fichero")
+
+
+def opciones_perfil(args):
+    """Opciones de perfilar() a partir de los argumentos del CLI, o None si no se pidió perfil."""
+    if args.perfil is None and args.perfil_volcado is None:
+        return None
+    return {"destino": args.perfil, "memoria": args.perfil_memoria, "volcado_dir": args.perfil_volcado}
+
+
+@contextmanager
+def perfilar_si(archivo, opciones):
+    """perfilar() si hay opciones de perfil; si no, un bloque sin instrumentar."""
+    if opciones is None:
+        yield None
+    else:
+        with perfilar(archivo, **opciones) as perfil:
+            yield perfil
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline fusionado: parseo -> métricas -> gráficas en un solo proceso.
+
+Los DataFrames calculados por generar_metricas (o parser_table_download) se
+pasan en memoria a las gráficas, sin escribir y releer el Excel ni arrancar
+un segundo intérprete. El Excel y los formatos columnares son salidas
+opcionales. Las consolas comprimidas o dentro de un zip se leen en streaming
+(logparser.entradas) y sus salidas se nombran como si estuvieran
+descomprimidas junto al original.
+
+Uso (también como `python -m logparser`):
+    python -m logparser.pipeline <log.html[.gz]|consolas.zip|dir|glob> ... [--parser metricas|table_download]
+                                 [--formato xlsx csv parquet feather | --formato] [--sin-graficas]
+                                 [--salida DIR] [--jobs N] [--sin-cache] [--perfil [FICHERO.jsonl]]
+                                 [--historico historico.sqlite]
+                                 [--plotlyjs incrustado|compartido|cdn] [--panel]
+"""
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PARSERS = ("metricas", "table_download")
+
+
+@dataclass
+class ResultadoAnalisis:
+    log: Path
+    hojas: dict
+    salidas: list = field(default_factory=list)
+    graficas: list = field(default_factory=list)
+
+
+def _hojas_metricas(log_path: Path, usar_cache: bool):
+    from logparser import generar_metricas as gm
+    df_eventos, df_procesos, errores, bloques_error = gm.parsear_log(log_path, usar_cache)
+    return hojas_desde_tablas("metricas", {"eventos": df_eventos, "procesos": df_procesos},
+                              {"errores": errores, "bloques_error": bloques_error})
+
+
+def _hojas_table_download(log_path: Path, usar_cache: bool):
+    from logparser import parser_table_download as td
+    df_events, log_start, log_end = td.parse_file(log_path, usar_cache)
+    return hojas_desde_tablas("table_download", {"eventos": df_events}, {"log_start": log_start, "log_end": log_end})
+
+
+def _ruta_metricas(log_path: Path, parser: str, salida_dir) -> Path:
+    from logparser.entradas import ruta_logica
+    log_path = ruta_logica(log_path)
+    if parser == "metricas":
+        from logparser.generar_metricas import ruta_salida
+        return ruta_salida(log_path, salida_dir)
+    destino = Path(salida_dir) if salida_dir else log_path.parent
+    destino.mkdir(parents=True, exist_ok=True)
+    return destino / f"{log_path.stem}_METRICAS.xlsx"
+
+
+def analizar(log_path, parser: str = "metricas", salida_dir=None, formatos=("xlsx",),
+             graficas: bool = True, usar_cache: bool = True, historico=None,
+             plotlyjs: str = "incrustado") -> ResultadoAnalisis:
+    """
+    Analiza un log y devuelve sus hojas en memoria. Escribe las tablas en
+    `formatos` (vacío = ninguna), si `graficas` los HTML de tiempos y etiquetas
+    (con plotly.js según `plotlyjs`) y, con `historico` (ruta SQLite), carga
+    la build en el histórico.
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"Parser desconocido: {parser} (opciones: {', '.join(PARSERS)})")
+    log_path = Path(log_path)
+    if parser == "metricas":
+        hojas = _hojas_metricas(log_path, usar_cache)
+    else:
+        hojas = _hojas_table_download(log_path, usar_cache)
+    return publicar(log_path, parser, hojas, salida_dir, formatos, graficas, historico, plotlyjs)
+
+
+def hojas_desde_tablas(parser: str, tablas: dict, meta: dict) -> dict:
+    """Hojas a partir del resultado() de un escáner (las mismas tablas que guarda la caché)."""
+    if parser == "metricas":
+        from logparser import generar_metricas as gm
+        from logparser.concurrencia import hojas_concurrencia
+        hojas = gm.calcular_metricas(tablas["eventos"], meta["errores"], meta["bloques_error"])
+        hojas.update(hojas_concurrencia(hojas["GlobalData"]))
+        hojas["Procesos"] = tablas["procesos"]
+        return hojas
+    from logparser import parser_table_download as td
+    return td._build_sheets(tablas["eventos"], meta["log_start"], meta["log_end"])
+
+
+def publicar(log_path, parser: str, hojas: dict, salida_dir=None, formatos=("xlsx",), graficas: bool = True,
+             historico=None, plotlyjs: str = "incrustado", origen=None) -> ResultadoAnalisis:
+    """
+    Escribe tablas, gráficas e histórico de unas hojas ya calculadas, con los
+    nombres que corresponden a `log_path` (que puede no existir: consolas
+    descargadas por logparser.jenkins). `origen` se guarda en el histórico.
+    """
+    log_path = Path(log_path)
+    resultado = ResultadoAnalisis(log=log_path, hojas=hojas)
+    ruta_xlsx = _ruta_metricas(log_path, parser, salida_dir)
+    # La clave del histórico es el nombre completo de la consola (el del Excel se recorta
+    # a 45 caracteres); las salidas la llevan en sus metadatos para `historico ingestar`
+    from logparser.historico import metadatos_build
+    metadatos = metadatos_build(log_path)
+    if historico:
+        # Antes que las salidas: Etiquetas y Errores llevan las builds del histórico con cada huella
+        _cargar_historico(historico, metadatos["build"], metadatos["proyecto"], parser, hojas, origen or log_path)
+    if formatos:
+        if parser == "metricas":
+            from logparser.generar_metricas import escribir_salidas
+            resultado.salidas = escribir_salidas(ruta_xlsx, hojas, formatos, metadatos)
+        else:
+            from logparser.salidas import escribir_hojas
+            resultado.salidas = escribir_hojas(ruta_xlsx, hojas, formatos, metadatos=metadatos)
+        for ruta in resultado.salidas:
+            print(f"[OK] Generado: {ruta}")
+    if graficas:
+        from logparser.generar_graficas import _nombre_base, guardar_graficas
+        resultado.graficas = guardar_graficas(hojas, _nombre_base(ruta_xlsx), plotlyjs)
+    return resultado
+
+
+def _cargar_historico(historico, build: str, proyecto: str, parser: str, hojas: dict, origen):
+    from logparser.errores import builds_por_huella
+    from logparser.historico import conectar, ingestar_hojas
+    con = conectar(historico)
+    try:
+        if ingestar_hojas(con, build, proyecto, parser, hojas, origen=origen):
+            print(f"[OK] Histórico actualizado: {proyecto}/{build}")
+        if "Errores" in hojas:
+            builds = builds_por_huella(con, proyecto, hojas["Errores"]["huella"])
+            for hoja in ("Etiquetas", "Errores"):
+                hojas[hoja]["builds_historico"] = hojas[hoja]["huella"].map(builds).fillna(0).astype("int64")
+    finally:
+        con.close()
+
+
+def _tarea(ruta: Path, salida_dir, **opciones):
+    # Para el pool de procesos: no se devuelven los DataFrames al proceso padre
+    resultado = analizar(ruta, salida_dir=salida_dir, **opciones)
+    generados = resultado.salidas + resultado.graficas
+    return generados[0] if generados else None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Parseo, métricas y gráficas de consolas Jenkins en un solo paso.")
+    ap.add_argument("entradas", nargs="+",
+                    help="Log HTML (también .gz, .bz2, .xz o .zst), zip de consolas, directorio o patrón glob")
+    ap.add_argument("--parser", choices=PARSERS, default="metricas")
+    ap.add_argument("--formato", nargs="*", default=["xlsx"],
+                    help="Tablas a escribir: xlsx, csv, parquet, feather (sin valores = ninguna)")
+    ap.add_argument("--sin-graficas", action="store_true", help="No genera los HTML de gráficas")
+    ap.add_argument("--salida", type=Path, default=None, help="Directorio de salida (por defecto: junto al log)")
+    ap.add_argument("--jobs", "-j", type=int, default=None, help="Procesos en paralelo si hay varios logs")
+    ap.add_argument("--sin-cache", action="store_true", help="No usar la caché de parseo")
+    ap.add_argument("--historico", type=Path, default=None, help="Carga cada build en este histórico SQLite")
+    from logparser.generar_graficas import MODOS_PLOTLYJS
+    ap.add_argument("--plotlyjs", choices=MODOS_PLOTLYJS, default="incrustado",
+                    help="plotly.js dentro de cada HTML, en un fichero compartido por carpeta o desde CDN")
+    ap.add_argument("--panel", action="store_true",
+                    help="Al terminar, genera el panel HTML de cada carpeta de salida (logparser.panel)")
+    from logparser import perfil
+    perfil.agregar_argumentos(ap)
+    args = ap.parse_args(argv)
+
+    opciones = dict(parser=args.parser, formatos=args.formato,
+                    graficas=not args.sin_graficas, usar_cache=not args.sin_cache, historico=args.historico,
+                    plotlyjs=args.plotlyjs)
+    from logparser import lote
+    rutas = lote.expandir_entradas(args.entradas)
+    if not rutas:
+        print("[WARN] No se encontraron consolas .html en las rutas indicadas.")
+        return 0
+    perfil_opciones = perfil.opciones_perfil(args)
+    if len(rutas) == 1 and args.jobs is None:
+        with perfil.perfilar_si(rutas[0], perfil_opciones):
+            analizar(rutas[0], salida_dir=args.salida, **opciones)
+        ok = True
+    else:
+        t0 = time.perf_counter()
+        resultados = lote.procesar_lote(rutas, "pipeline", args.jobs, args.salida,
+                                        perfil_opciones=perfil_opciones, **opciones)
+        lote.imprimir_resumen(resultados, time.perf_counter() - t0)
+        ok = all(r.ok for r in resultados)
+    if args.panel:
+        from logparser.panel import generar_panel
+        for directorio in sorted({_ruta_metricas(r, args.parser, args.salida).parent for r in rutas}):
+            generar_panel(directorio, plotlyjs=args.plotlyjs)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro de reglas por formato de consola y motor con prefiltro de literales.
+
+Cada formato (metricas, table_download...) declara sus reglas: una expresión
+regular y los literales que toda línea que la cumple contiene sí o sí
+("phase has", "Downloaded ftp file"...). El motor compila todos los
+literales de las reglas en un único patrón y lo busca sobre el bloque de
+texto completo (en C, sin recorrer las líneas en Python); solo las líneas
+candidatas pasan a las expresiones regulares completas. En consolas con
+mucho ruido la inmensa mayoría de las líneas no llega nunca a Python.
+
+Los literales distinguen mayúsculas igual que la expresión de su regla
+(re.IGNORECASE). Una regla con siguiente=True entrega además la línea que
+sigue a cada coincidencia (p. ej. el mensaje tras "The following error
+occurred..."); si la coincidencia es la última línea del bloque, el escáner
+debe tratar la primera línea del bloque siguiente (ver EscanerPromocion).
+
+Un motor puede combinar varios formatos para aplicarlos sobre una sola
+lectura de la consola; EscanerReglas recoge las coincidencias de cualquier
+formato registrado sin escribir un escáner propio, así que un tipo de job
+nuevo se añade con registrar().
+
+Uso:
+    python -m logparser.reglas consola.html [--formato metricas table_download]
+"""
+import argparse
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+
+
+class Regla(NamedTuple):
+    nombre: str
+    patron: re.Pattern
+    literales: tuple            # la línea contiene al menos uno si `patron` coincide
+    siguiente: bool = False     # entregar también la línea siguiente
+
+
+FORMATOS = {}
+
+
+def registrar(formato: str, *reglas: Regla):
+    """Declara (o amplía) las reglas de un formato de consola."""
+    for regla in reglas:
+        if not regla.literales:
+            raise ValueError(f"La regla '{regla.nombre}' necesita al menos un literal para el prefiltro")
+    # Una regla con el mismo nombre sustituye a la anterior (p. ej. al recargar el módulo)
+    existentes = {r.nombre: r for r in FORMATOS.get(formato, ())}
+    existentes.update((r.nombre, r) for r in reglas)
+    FORMATOS[formato] = tuple(existentes.values())
+    motor.cache_clear()
+
+
+def _literal(texto: str, ignorar_mayusculas: bool) -> str:
+    return f"(?i:{re.escape(texto)})" if ignorar_mayusculas else re.escape(texto)
+
+
+class Motor:
+    """Prefiltro de literales + expresiones completas de un conjunto de reglas."""
+
+    def __init__(self, reglas):
+        self.reglas = tuple(reglas)
+        if not self.reglas:
+            raise ValueError("Motor sin reglas")
+        # (literal, ignorar mayúsculas, entregar la siguiente línea), sin repetir
+        literales = {}
+        for regla in self.reglas:
+            ignorar = bool(regla.patron.flags & re.IGNORECASE)
+            for literal in regla.literales:
+                clave = (literal.casefold() if ignorar else literal, ignorar)
+                literales[clave] = literales.get(clave, False) or regla.siguiente
+        self._literales = [(literal, ignorar, siguiente) for (literal, ignorar), siguiente in literales.items()]
+        self._plegar = any(ignorar for _, ignorar, _ in self._literales)
+        self._prefiltro = re.compile("|".join(_literal(l, i) for l, i, _ in self._literales))
+        self._siguiente = re.compile("|".join(_literal(l, i) for l, i, s in self._literales if s) or "(?!)")
+
+    def _lineas_con_literal(self, texto: str) -> dict:
+        """{inicio de línea: (fin, entregar la siguiente)} de las líneas con algún literal."""
+        lineas = {}
+        plegado = texto.casefold() if self._plegar else texto
+        if len(plegado) != len(texto):
+            # Algún carácter cambia de longitud al plegar: las posiciones no valen, se usa el patrón
+            m = self._prefiltro.search(texto)
+            while m:
+                inicio = texto.rfind("\n", 0, m.start()) + 1
+                fin = texto.find("\n", m.end())
+                fin = len(texto) if fin < 0 else fin
+                lineas[inicio] = (fin, self._siguiente.search(texto, inicio, fin) is not None)
+                m = self._prefiltro.search(texto, fin + 1)
+            return lineas
+        # str.find por literal (búsqueda en C); el bucle en Python solo recorre las coincidencias
+        for literal, ignorar, siguiente in self._literales:
+            fuente = plegado if ignorar else texto
+            i = fuente.find(literal)
+            while i >= 0:
+                inicio = texto.rfind("\n", 0, i) + 1
+                fin = texto.find("\n", i + len(literal))
+                fin = len(texto) if fin < 0 else fin
+                anterior = lineas.get(inicio)
+                lineas[inicio] = (fin, siguiente or (anterior is not None and anterior[1]))
+                i = fuente.find(literal, fin)
+        return lineas
+
+    def candidatas(self, texto: str) -> list:
+        """Líneas de `texto` (separadas por \\n) que contienen algún literal, en orden y sin repetir."""
+        lineas = []
+        fin_anterior = -1   # fin (exclusivo) de la última línea añadida
+        encontradas = self._lineas_con_literal(texto)
+        for inicio in sorted(encontradas):
+            fin, siguiente = encontradas[inicio]
+            if inicio > fin_anterior:
+                lineas.append(texto[inicio:fin])
+                fin_anterior = fin
+            # La línea que sigue a la coincidencia, aunque no tenga ningún literal
+            if siguiente and fin < len(texto) and fin + 1 > fin_anterior:
+                fin_siguiente = texto.find("\n", fin + 1)
+                fin_siguiente = len(texto) if fin_siguiente < 0 else fin_siguiente
+                lineas.append(texto[fin + 1:fin_siguiente])
+                fin_anterior = fin_siguiente
+        return lineas
+
+    def coincidencias(self, linea: str) -> dict:
+        """{nombre de regla: match} de las reglas que cumple `linea`."""
+        encontradas = {}
+        for regla in self.reglas:
+            m = regla.patron.search(linea)
+            if m:
+                encontradas[regla.nombre] = m
+        return encontradas
+
+
+@lru_cache(maxsize=None)
+def motor(*formatos: str) -> Motor:
+    """Motor compilado (y reutilizado) con las reglas de uno o varios formatos."""
+    _cargar_formatos()
+    reglas = []
+    for formato in formatos:
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato sin reglas: {formato} (registrados: {', '.join(FORMATOS)})")
+        reglas.extend(r._replace(nombre=f"{formato}.{r.nombre}") if len(formatos) > 1 else r
+                      for r in FORMATOS[formato])
+    return Motor(reglas)
+
+
+def _cargar_formatos():
+    # Los parsers registran sus reglas al importarse
+    import logparser.generar_metricas  # noqa: F401
+    import logparser.parser_table_download  # noqa: F401
+
+
+class EscanerReglas:
+    """
+    Escáner genérico: guarda los grupos de cada coincidencia por regla. Sirve
+    para formatos sin escáner propio y para aplicar varios formatos en una sola
+    lectura (las reglas se llaman "<formato>.<regla>").
+    """
+
+    def __init__(self, *formatos: str):
+        self.formatos = formatos
+        self.coincidencias = {}   # regla -> [grupos]
+        self.lineas = 0
+        self.candidatas = 0
+        from logparser.entradas import nuevo_decodificador
+        self._decodificador = nuevo_decodificador()
+        self._resto = ""
+
+    def procesar_texto(self, texto: str):
+        m = motor(*self.formatos)
+        self.lineas += texto.count("\n") + 1
+        candidatas = m.candidatas(texto)
+        self.candidatas += len(candidatas)
+        for linea in candidatas:
+            for nombre, encontrada in m.coincidencias(linea).items():
+                self.coincidencias.setdefault(nombre, []).append(encontrada.groups())
+
+    def alimentar(self, bloque: bytes, final: bool = False):
+        texto = self._resto + self._decodificador.decode(bloque, final)
+        if final:
+            self._resto = ""
+            if texto:
+                self.procesar_texto(texto)
+            return self
+        corte = texto.rfind("\n")
+        self._resto = texto[corte + 1:]
+        if corte >= 0:
+            self.procesar_texto(texto[:corte])
+        return self
+
+
+def escanear(ruta, *formatos: str) -> EscanerReglas:
+    """Aplica las reglas de `formatos` a `ruta` (plana, comprimida o miembro de un zip) leyéndola una sola vez."""
+    from logparser.entradas import bloques
+    escaner = EscanerReglas(*formatos)
+    for bloque in bloques(ruta):
+        escaner.alimentar(bloque)
+    return escaner.alimentar(b"", final=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Aplica las reglas registradas a una consola y resume las coincidencias.")
+    ap.add_argument("consola", type=Path)
+    ap.add_argument("--formato", nargs="+", default=None, help="Formatos a aplicar (por defecto todos)")
+    args = ap.parse_args(argv)
+    # Con "python -m" este fichero es __main__: los parsers registran sus reglas en logparser.reglas
+    from logparser import reglas
+    reglas._cargar_formatos()
+    formatos = tuple(args.formato or reglas.FORMATOS)
+    escaner = reglas.escanear(args.consola, *formatos)
+    print(f"Líneas: {escaner.lineas} | candidatas tras el prefiltro: {escaner.candidatas} "
+          f"({escaner.candidatas / max(1, escaner.lineas):.1%})")
+    for regla in reglas.motor(*formatos).reglas:
+        print(f"  {regla.nombre:<40} {len(escaner.coincidencias.get(regla.nombre, ())):>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Capa de salida de las hojas de métricas (GlobalData, Tiempos, Etiquetas,
+Medias Tecnologia, Procesos...).
+
+Formatos:
+  * xlsx     libro Excel escrito fila a fila con xlsxwriter en modo
+             constant_memory (la memoria no crece con el número de filas)
+  * csv      un CSV por hoja
+  * parquet  un Parquet por hoja (requiere pyarrow)
+  * feather  un Feather/Arrow por hoja (requiere pyarrow)
+
+Los formatos columnares se escriben en un directorio hermano del Excel:
+    <base>_METRICAS.xlsx  ->  <base>_METRICAS/<Hoja>.<ext>
+y leer_hoja() lee una hoja de cualquiera de las dos formas, de modo que las
+gráficas pueden generarse sin pasar por el Excel.
+
+Los metadatos de la salida (proyecto y nombre completo de la build, que el
+nombre del fichero recorta) van como propiedades personalizadas del Excel y
+en <base>_METRICAS/_metadatos.json; leer_metadatos() los lee de ambos.
+"""
+import json
+import zipfile
+from xml.etree import ElementTree
+from pathlib import Path
+
+import pandas as pd
+
+from logparser import perfil
+
+FORMATOS = ("xlsx", "csv", "parquet", "feather")
+FORMATOS_COLUMNARES = ("parquet", "feather", "csv")  # orden de preferencia al leer
+FORMATO_FECHA = "yyyy-mm-dd hh:mm:ss"
+COLOR_ERROR = "#FFC7CE"
+FICHERO_METADATOS = "_metadatos.json"
+
+
+def _requiere_pyarrow(formato: str):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ValueError(f"El formato '{formato}' requiere pyarrow. Instálalo con: pip install -r requirements-columnar.txt") from None
+
+
+def comprobar_formatos(formatos):
+    formatos = list(dict.fromkeys(formatos))
+    for formato in formatos:
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconocido: {formato} (opciones: {', '.join(FORMATOS)})")
+        if formato in ("parquet", "feather"):
+            _requiere_pyarrow(formato)
+    return formatos
+
+
+def _nombre_fichero(hoja: str) -> str:
+    return hoja.replace(" ", "_")
+
+
+def directorio_columnar(ruta_xlsx) -> Path:
+    ruta_xlsx = Path(ruta_xlsx)
+    return ruta_xlsx.with_name(ruta_xlsx.stem)
+
+
+def escribir_xlsx(ruta, hojas: dict, portada=None, metadatos: dict = None) -> Path:
+    """
+    Escribe el libro fila a fila (xlsxwriter constant_memory).
+    portada: lista opcional de (celda, valor) para una primera hoja "Portada".
+    metadatos: {nombre: texto} como propiedades personalizadas del libro.
+    Las celdas no vacías de la columna "comentarios" se resaltan en rojo.
+    """
+    import xlsxwriter
+
+    ruta = Path(ruta)
+    wb = xlsxwriter.Workbook(str(ruta), {"constant_memory": True})
+    fmt_fecha = wb.add_format({"num_format": FORMATO_FECHA})
+    fmt_error = wb.add_format({"bg_color": COLOR_ERROR})
+    for nombre, valor in (metadatos or {}).items():
+        wb.set_custom_property(nombre, str(valor))
+    try:
+        if portada:
+            ws = wb.add_worksheet("Portada")
+            for celda, valor in sorted(portada, key=lambda cv: (int(cv[0][1:]), cv[0][0])):
+                ws.write(celda, valor)
+        for nombre, df in hojas.items():
+            _escribir_hoja(wb.add_worksheet(nombre), df, fmt_fecha, fmt_error)
+    finally:
+        wb.close()
+    return ruta
+
+
+def _escribir_hoja(ws, df: pd.DataFrame, fmt_fecha, fmt_error):
+    for i, col in enumerate(df.columns):
+        ancho = int(df[col].astype(str).str.len().max()) + 2 if not df.empty else 12
+        ws.set_column(i, i, max(12, min(40, ancho)))
+    ws.write_row(0, 0, [str(c) for c in df.columns])
+
+    es_fecha = [pd.api.types.is_datetime64_any_dtype(df[c]) for c in df.columns]
+    col_comentarios = df.columns.get_loc("comentarios") if "comentarios" in df.columns else None
+    valores = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    for r, fila in enumerate(valores, start=1):
+        for c, valor in enumerate(fila):
+            if valor is None or valor == "":
+                continue
+            if es_fecha[c]:
+                ws.write_datetime(r, c, valor.to_pydatetime(), fmt_fecha)
+            elif c == col_comentarios:
+                ws.write(r, c, valor, fmt_error)
+            else:
+                ws.write(r, c, valor)
+
+
+def escribir_columnar(directorio, hojas: dict, formato: str, metadatos: dict = None) -> Path:
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    if metadatos:
+        (directorio / FICHERO_METADATOS).write_text(json.dumps(metadatos, ensure_ascii=False), encoding="utf-8")
+    for nombre, df in hojas.items():
+        destino = directorio / f"{_nombre_fichero(nombre)}.{formato}"
+        if formato == "csv":
+            df.to_csv(destino, index=False, encoding="utf-8")
+        elif formato == "parquet":
+            df.to_parquet(destino, index=False)
+        else:
+            df.reset_index(drop=True).to_feather(destino)
+    return directorio
+
+
+def escribir_hojas(ruta_xlsx, hojas: dict, formatos=("xlsx",), portada=None, metadatos: dict = None) -> list:
+    """Escribe las hojas en cada formato pedido. Devuelve las rutas generadas."""
+    rutas = []
+    for formato in comprobar_formatos(formatos):
+        with perfil.etapa(f"escritura.{formato}"):
+            perfil.contar(filas=sum(len(df) for df in hojas.values()))
+            if formato == "xlsx":
+                rutas.append(escribir_xlsx(ruta_xlsx, hojas, portada, metadatos))
+            else:
+                rutas.append(escribir_columnar(directorio_columnar(ruta_xlsx), hojas, formato, metadatos))
+    return rutas
+
+
+def leer_hoja(ruta, hoja: str) -> pd.DataFrame:
+    """
+    Lee una hoja desde un Excel de métricas o desde su directorio columnar
+    (también acepta la ruta .xlsx aunque solo exista el directorio).
+    """
+    ruta = Path(ruta)
+    if ruta.suffix.lower() == ".xlsx" and ruta.exists():
+        return pd.read_excel(ruta, sheet_name=hoja, engine="openpyxl")
+    directorio = ruta if ruta.is_dir() else directorio_columnar(ruta)
+    for formato in FORMATOS_COLUMNARES:
+        fichero = directorio / f"{_nombre_fichero(hoja)}.{formato}"
+        if fichero.exists():
+            if formato == "csv":
+                return pd.read_csv(fichero, encoding="utf-8")
+            if formato == "parquet":
+                return pd.read_parquet(fichero)
+            return pd.read_feather(fichero)
+    raise FileNotFoundError(f"No se encontró la hoja '{hoja}' en {ruta}")
+
+
+def leer_metadatos(ruta) -> dict:
+    """
+    Metadatos de un Excel de métricas o de su directorio columnar ({} si no
+    tiene: salidas anteriores). Del Excel solo se lee docProps/custom.xml.
+    """
+    ruta = Path(ruta)
+    try:
+        if ruta.is_dir():
+            return json.loads((ruta / FICHERO_METADATOS).read_text(encoding="utf-8"))
+        with zipfile.ZipFile(ruta) as zf:
+            raiz = ElementTree.fromstring(zf.read("docProps/custom.xml"))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile, ElementTree.ParseError):
+        return {}
+    return {p.get("name"): "".join(p.itertext()) for p in raiz if p.tag.endswith("}property")}
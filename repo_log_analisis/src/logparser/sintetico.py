@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generador determinista de consolas HTML de Jenkins sintéticas.
+
+Produce los dos formatos que entienden los parsers, sin datos reales:
+  * promocion: líneas "[ts] [TECH] ... [CR-n] The X phase has started/ended",
+    fases de proceso (Orchestrator/EnvironmentPreparation/-) con
+    "phase has ended in Nms", bloques de error
+    "The following error occurred while executing this line:" y ruido.
+  * table_download: líneas "to D:/.../<TABLA>" y
+    "[echo] Downloaded ftp file <TABLA>" con ruido intercalado.
+
+La concurrencia se simula con N "carriles" que ejecutan etiquetas/tablas una
+tras otra; las líneas de todos los carriles se mezclan por timestamp en
+streaming (heapq.merge), así que la memoria no depende del tamaño del log.
+Misma semilla y parámetros -> mismo fichero byte a byte.
+
+Uso:
+    python -m logparser.sintetico promocion salida.html [--etiquetas 2000] [--concurrencia 8] ...
+    python -m logparser.sintetico table_download salida.html [--tablas 5000] ...
+"""
+import argparse
+import heapq
+import html
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+TECNOLOGIAS = ("JAVA", "COBOL", "SQL", "AS400", "NET", "ORACLE", "DB2", "BATCH")
+FASES = ("BUILD", "DEPLOY")
+INICIO = datetime(2024, 1, 1, 6, 0, 0)
+
+_CABECERA = ('<html><head><title>Console Output [Jenkins]</title></head><body>'
+             '<div id="main-panel"><pre class="console-output">')
+_PIE = "Finished: SUCCESS\n</pre></div></body></html>\n"
+
+
+def _ts(t: datetime) -> str:
+    return t.strftime("[%Y.%m.%d %H:%M:%S]")
+
+
+def _carril_promocion(rnd, etiquetas, tecnologias, ruido, prob_error):
+    """Genera (instante, línea) para un carril que ejecuta sus etiquetas en serie."""
+    t = INICIO + timedelta(seconds=rnd.randint(0, 60))
+    for etiqueta in etiquetas:
+        tech = rnd.choice(tecnologias)
+        for fase in FASES:
+            yield t, f"{_ts(t)} [{tech}] [promote] [{etiqueta}] The {fase} phase has started"
+            duracion = rnd.randint(5, 900)
+            for offset in sorted(rnd.randint(0, duracion) for _ in range(ruido)):
+                t_r = t + timedelta(seconds=offset)
+                yield t_r, f"{_ts(t_r)} [{tech}] [exec] {etiqueta} step {rnd.randint(1, 9999)} ok"
+            t += timedelta(seconds=duracion)
+            if rnd.random() < prob_error:
+                yield t, f"{_ts(t)} [{tech}] [{etiqueta}] BUILD FAILED"
+                yield t, "The following error occurred while executing this line:"
+                yield t, (f'"D:/jenkins/workspace/{etiqueta}/build.xml:{rnd.randint(1, 999)}: '
+                          f'Task {fase.lower()} failed with exit code {rnd.randint(1, 255)}"')
+            yield t, f"{_ts(t)} [{tech}] [promote] [{etiqueta}] The {fase} phase has ended"
+            t += timedelta(seconds=rnd.randint(0, 30))
+
+
+def _procesos(rnd, n, fin_estimado):
+    nombres = ("Orchestrator", "EnvironmentPreparation", "-")
+    fases = ("ORCHESTRATOR", "PREPARATION", "VALIDATION", "PACKAGE")
+    total = (fin_estimado - INICIO).total_seconds()
+    instantes = sorted(rnd.uniform(0, total) for _ in range(n))
+    for i, s in enumerate(instantes):
+        t = INICIO + timedelta(seconds=int(s))
+        yield t, (f"{_ts(t)} [{rnd.choice(nombres)}] [PROCESS] [Release step {i}] "
+                  f"The {rnd.choice(fases)} phase has ended in {rnd.randint(1, 600000)}ms")
+
+
+def _escribir(path: Path, flujos):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(_CABECERA)
+        for _, linea in heapq.merge(*flujos, key=lambda x: x[0]):
+            f.write(html.escape(linea, quote=False))
+            f.write("\n")
+        f.write(_PIE)
+    return path
+
+
+def generar_consola_promocion(path, etiquetas: int = 1000, tecnologias=TECNOLOGIAS,
+                              concurrencia: int = 8, ruido: int = 10,
+                              prob_error: float = 0.05, procesos: int = 20, semilla: int = 0) -> Path:
+    """
+    Escribe una consola de promoción sintética.
+    etiquetas: número de CR/PF/RQ; ruido: líneas sin patrón por fase;
+    concurrencia: etiquetas ejecutándose a la vez.
+    """
+    rnd = random.Random(semilla)
+    nombres = [f"{rnd.choice(('CR', 'PF', 'RQ'))}-{100000 + i}" for i in range(etiquetas)]
+    concurrencia = max(1, min(concurrencia, etiquetas or 1))
+    carriles = [nombres[i::concurrencia] for i in range(concurrencia)]
+    flujos = [
+        _carril_promocion(random.Random(semilla * 7919 + i), carril, list(tecnologias), ruido, prob_error)
+        for i, carril in enumerate(carriles)
+    ]
+    fin_estimado = INICIO + timedelta(seconds=max(1, etiquetas // concurrencia) * 2 * 470)
+    flujos.append(_procesos(rnd, procesos, fin_estimado))
+    return _escribir(Path(path), flujos)
+
+
+def _carril_table_download(rnd, tablas, ruido):
+    t = INICIO + timedelta(seconds=rnd.randint(0, 10))
+    for tabla in tablas:
+        yield t, f"{_ts(t)} [ftp] get /remote/{tabla}.dat to D:/data/{tabla}"
+        duracion = rnd.randint(1, 300)
+        for offset in sorted(rnd.randint(0, duracion) for _ in range(ruido)):
+            t_r = t + timedelta(seconds=offset)
+            yield t_r, f"{_ts(t_r)} [ftp] {rnd.randint(1, 99999)} bytes transferred <{tabla}> & checksum ok"
+        t += timedelta(seconds=duracion)
+        yield t, f"{_ts(t)}      [echo] Downloaded ftp file {tabla}"
+        t += timedelta(seconds=rnd.randint(0, 5))
+
+
+def generar_consola_table_download(path, tablas: int = 1000, concurrencia: int = 4,
+                                   ruido: int = 5, semilla: int = 0) -> Path:
+    """Escribe una consola 'table download' sintética con `tablas` descargas."""
+    nombres = [f"T{i:06d}" for i in range(tablas)]
+    concurrencia = max(1, min(concurrencia, tablas or 1))
+    flujos = [
+        _carril_table_download(random.Random(semilla * 7919 + i), nombres[i::concurrencia], ruido)
+        for i in range(concurrencia)
+    ]
+    return _escribir(Path(path), flujos)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Genera consolas HTML de Jenkins sintéticas.")
+    sub = ap.add_subparsers(dest="formato", required=True)
+    p = sub.add_parser("promocion", help="Consola de promoción (generar_metricas)")
+    p.add_argument("salida", type=Path)
+    p.add_argument("--etiquetas", type=int, default=1000)
+    p.add_argument("--tecnologias", nargs="+", default=list(TECNOLOGIAS))
+    p.add_argument("--concurrencia", type=int, default=8)
+    p.add_argument("--ruido", type=int, default=10, help="Líneas de ruido por fase")
+    p.add_argument("--prob-error", type=float, default=0.05)
+    p.add_argument("--procesos", type=int, default=20)
+    p.add_argument("--semilla", type=int, default=0)
+    t = sub.add_parser("table_download", help="Consola 'table download' (parser_table_download)")
+    t.add_argument("salida", type=Path)
+    t.add_argument("--tablas", type=int, default=1000)
+    t.add_argument("--concurrencia", type=int, default=4)
+    t.add_argument("--ruido", type=int, default=5, help="Líneas de ruido por tabla")
+    t.add_argument("--semilla", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    if args.formato == "promocion":
+        salida = generar_consola_promocion(args.salida, args.etiquetas, args.tecnologias, args.concurrencia,
+                                           args.ruido, args.prob_error, args.procesos, args.semilla)
+    else:
+        salida = generar_consola_table_download(args.salida, args.tablas, args.concurrencia, args.ruido, args.semilla)
+    print(f"[OK] Consola sintética: {salida} ({salida.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo vigilancia: un proceso de larga duración que procesa las consolas nuevas
+o modificadas en cuanto aparecen en la carpeta de logs.
+
+Sigue la estructura de GEN_METRICAS_PROYECTO.bat:
+    logs/<PROYECTO>/*.html  ->  METRICAS/<PROYECTO>/<log>_METRICAS.xlsx + gráficas
+
+También se vigilan las consolas comprimidas (*.html.gz, .bz2, .xz, .zst) y los
+zips de consolas: un zip nuevo o modificado se procesa consola a consola
+(logparser.entradas).
+
+El intérprete, pandas/plotly/xlsxwriter y las expresiones regulares de los
+parsers se cargan una sola vez. La carpeta se indexa por (mtime, tamaño) con
+os.scandir, sin leer los ficheros: un log se procesa cuando su firma cambia y
+se mantiene igual en dos sondeos seguidos (la copia ha terminado). El índice de
+lo ya procesado se guarda en METRICAS/.vigilancia.json, así que al reiniciar
+solo se procesa lo que cambió mientras el proceso estaba parado.
+
+Uso:
+    python -m logparser.vigilar logs --salida METRICAS [--parser metricas|table_download]
+                                [--intervalo 2] [--jobs N] [--formato xlsx ...] [--sin-graficas]
+                                [--historico historico.sqlite] [--plotlyjs compartido] [--panel]
+                                [--una-vez]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+FICHERO_INDICE = ".vigilancia.json"
+
+
+def calentar():
+    """Importa una vez las dependencias pesadas y los parsers (regex compiladas)."""
+    import pandas  # noqa: F401
+    import plotly.express  # noqa: F401
+    import xlsxwriter  # noqa: F401
+    from logparser import concurrencia, generar_graficas, generar_metricas, parser_table_download, pipeline  # noqa: F401
+
+
+class IndiceCarpeta:
+    """
+    Índice (mtime_ns, tamaño) de los .html (y comprimidos o zips) bajo `raiz`. `cambios()` devuelve
+    los ficheros cuya firma difiere de la última procesada y no ha variado
+    desde el sondeo anterior. Los directorios de `excluir` (p. ej. la salida,
+    si cuelga de `raiz`) no se recorren.
+    """
+
+    def __init__(self, raiz: Path, ruta_indice: Path = None, patron: str = ".html", excluir=()):
+        self.raiz = Path(raiz)
+        self._excluidos = {Path(d).resolve() for d in excluir}
+        self.ruta_indice = ruta_indice
+        self.patron = patron
+        self.procesados = {}   # ruta relativa -> [mtime_ns, tamaño]
+        self._vistos = {}      # firma del sondeo anterior, para detectar copias en curso
+        if ruta_indice is not None and ruta_indice.exists():
+            try:
+                self.procesados = json.loads(ruta_indice.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                print(f"[WARN] Índice de vigilancia ilegible, se reconstruye: {ruta_indice}")
+
+    def _escanear(self, directorio: Path, firmas: dict):
+        try:
+            entradas = list(os.scandir(directorio))
+        except OSError:
+            return
+        for entrada in entradas:
+            if entrada.is_dir(follow_symlinks=False):
+                if Path(entrada.path).resolve() not in self._excluidos:
+                    self._escanear(Path(entrada.path), firmas)
+            elif self._vigilado(entrada.name):
+                try:
+                    st = entrada.stat()
+                except OSError:  # borrado entre scandir y stat
+                    continue
+                rel = Path(entrada.path).relative_to(self.raiz).as_posix()
+                firmas[rel] = [st.st_mtime_ns, st.st_size]
+
+    def _vigilado(self, nombre: str) -> bool:
+        from logparser.entradas import COMPRESORES
+        nombre = nombre.lower()
+        return nombre.endswith(".zip") or any(nombre.endswith(self.patron + c) for c in ("",) + tuple(COMPRESORES))
+
+    def cambios(self) -> list:
+        firmas = {}
+        self._escanear(self.raiz, firmas)
+        estables = [rel for rel, firma in sorted(firmas.items())
+                    if self.procesados.get(rel) != firma and self._vistos.get(rel) == firma]
+        self._vistos = firmas
+        return estables
+
+    def marcar(self, rel: str):
+        firma = self._vistos.get(rel)
+        if firma is not None:
+            self.procesados[rel] = firma
+
+    def guardar(self):
+        if self.ruta_indice is None:
+            return
+        tmp = self.ruta_indice.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.procesados, indent=0, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.ruta_indice)
+
+
+def _destino(rel: str, salida: Path) -> Path:
+    # logs/<PROYECTO>/x.html -> METRICAS/<PROYECTO>/
+    return salida.joinpath(*Path(rel).parts[:-1])
+
+
+def _procesar(log: Path, salida_dir: Path, opciones: dict):
+    from logparser.entradas import listar
+    from logparser.pipeline import analizar
+    t0 = time.perf_counter()
+    for consola in listar(log):  # un zip: cada consola que contiene
+        analizar(consola, salida_dir=salida_dir, **opciones)
+    return time.perf_counter() - t0
+
+
+def vigilar(logs_dir, salida_dir, intervalo: float = 2.0, jobs: int = 1, una_vez: bool = False,
+            panel: bool = False, **opciones):
+    """
+    Procesa con pipeline.analizar (opciones: parser, formatos, graficas,
+    usar_cache, historico, plotlyjs) cada consola nueva o modificada bajo
+    `logs_dir`. Con panel, regenera el panel de cada carpeta de proyecto que
+    haya cambiado. Con una_vez, procesa lo pendiente y termina.
+    """
+    logs_dir, salida_dir = Path(logs_dir), Path(salida_dir)
+    salida_dir.mkdir(parents=True, exist_ok=True)
+    # La salida puede colgar de la carpeta vigilada: sus HTML de gráficas no son consolas
+    indice = IndiceCarpeta(logs_dir, salida_dir / FICHERO_INDICE, excluir=[salida_dir])
+    t0 = time.perf_counter()
+    calentar()
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=calentar) if jobs > 1 else None
+    print(f"[OK] Vigilando {logs_dir.resolve()} -> {salida_dir.resolve()} "
+          f"(arranque {time.perf_counter() - t0:.1f} s; Ctrl+C para salir)")
+
+    indice.cambios()  # primer sondeo: fija las firmas de referencia
+    try:
+        while True:
+            if not una_vez:
+                time.sleep(intervalo)
+            pendientes = indice.cambios()
+            if pendientes:
+                _procesar_pendientes(pendientes, indice, logs_dir, salida_dir, pool, opciones)
+                indice.guardar()
+                if panel:
+                    _regenerar_paneles(pendientes, salida_dir, opciones.get("plotlyjs", "incrustado"))
+            if una_vez:
+                break
+    except KeyboardInterrupt:
+        print("\n[OK] Vigilancia detenida.")
+    finally:
+        indice.guardar()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _procesar_pendientes(pendientes, indice, logs_dir, salida_dir, pool, opciones):
+    trabajos = [(rel, logs_dir / rel, _destino(rel, salida_dir)) for rel in pendientes]
+    if pool is None:
+        futuros = None
+    else:
+        futuros = [pool.submit(_procesar, log, destino, opciones) for _, log, destino in trabajos]
+    for i, (rel, log, destino) in enumerate(trabajos):
+        try:
+            segundos = futuros[i].result() if futuros else _procesar(log, destino, opciones)
+            print(f"[OK] {rel} ({segundos:.1f} s)")
+        except Exception as e:  # un log erróneo no detiene la vigilancia
+            print(f"[ERROR] {rel}: {type(e).__name__}: {e}")
+        # También los fallidos: no se reintentan hasta que el fichero cambie
+        indice.marcar(rel)
+
+
+def _regenerar_paneles(pendientes, salida_dir, plotlyjs):
+    from logparser.panel import generar_panel
+    for destino in sorted({_destino(rel, salida_dir) for rel in pendientes}):
+        try:
+            generar_panel(destino, plotlyjs=plotlyjs)
+        except Exception as e:
+            print(f"[ERROR] Panel {destino}: {type(e).__name__}: {e}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Procesa las consolas nuevas o modificadas de una carpeta de logs.")
+    ap.add_argument("logs", type=Path, help="Carpeta de logs (con subcarpetas por proyecto)")
+    ap.add_argument("--salida", type=Path, required=True, help="Carpeta METRICAS (se replican las subcarpetas)")
+    from logparser.pipeline import PARSERS
+    ap.add_argument("--parser", choices=PARSERS, default="metricas")
+    ap.add_argument("--intervalo", type=float, default=2.0, help="Segundos entre sondeos")
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="Procesos en paralelo (se mantienen calientes)")
+    ap.add_argument("--formato", nargs="*", default=["xlsx"], help="xlsx, csv, parquet, feather (sin valores = ninguna)")
+    ap.add_argument("--sin-graficas", action="store_true", help="No genera los HTML de gráficas")
+    ap.add_argument("--sin-cache", action="store_true", help="No usar la caché de parseo")
+    ap.add_argument("--historico", type=Path, default=None, help="Carga cada build en este histórico SQLite")
+    from logparser.generar_graficas import MODOS_PLOTLYJS
+    ap.add_argument("--plotlyjs", choices=MODOS_PLOTLYJS, default="incrustado",
+                    help="plotly.js dentro de cada HTML, en un fichero compartido por carpeta o desde CDN")
+    ap.add_argument("--panel", action="store_true", help="Mantiene al día el panel HTML de cada proyecto")
+    ap.add_argument("--una-vez", action="store_true", help="Procesa lo pendiente y termina")
+    args = ap.parse_args(argv)
+
+    if not args.logs.is_dir():
+        print(f"[ERROR] Carpeta de logs no válida: {args.logs}")
+        return 2
+    vigilar(args.logs, args.salida, intervalo=args.intervalo, jobs=max(1, args.jobs), una_vez=args.una_vez,
+            panel=args.panel, parser=args.parser, formatos=args.formato, graficas=not args.sin_graficas,
+            usar_cache=not args.sin_cache, historico=args.historico, plotlyjs=args.plotlyjs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
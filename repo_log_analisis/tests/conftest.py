@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
+
+
+@pytest.fixture(autouse=True)
+def cache_temporal(tmp_path, monkeypatch):
+    """Cada prueba con su propia caché de parseo (nunca la del usuario)."""
+    monkeypatch.setenv("LOGPARSER_CACHE", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def consola_promocion(tmp_path):
+    """Consola de promoción sintética pequeña (con errores)."""
+    from logparser.sintetico import generar_consola_promocion
+    ruta = tmp_path / "PROYECTO_1.html"
+    generar_consola_promocion(ruta, etiquetas=60, concurrencia=4, prob_error=0.2, procesos=5)
+    return ruta
+
+
+def ejecutar(modulo: str, *argumentos, cwd=None) -> subprocess.CompletedProcess:
+    """python -m <modulo> con src en el PYTHONPATH, como se lanza desde los .bat."""
+    entorno = dict(os.environ, PYTHONPATH=str(SRC), PYTHONIOENCODING="utf-8")
+    return subprocess.run([sys.executable, "-m", modulo, *map(str, argumentos)], cwd=cwd, env=entorno,
+                          capture_output=True, text=True, encoding="utf-8")
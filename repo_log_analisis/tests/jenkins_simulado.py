@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Jenkins simulado para probar logparser.jenkins sin red ni credenciales reales.
+
+Sirve las consolas de una carpeta con la parte de la API de Jenkins que usa
+el descargador:
+    <raiz>/<job>/<n>.html (o .html.gz...)  ->  /job/<job>/<n>/logText/progressiveHtml?start=B
+    (jobs en carpetas: <raiz>/a/b/<n>.html ->  /job/a/job/b/...)
+                                               /job/<job>/api/json?tree=builds[number]
+Como Jenkins, de cada consola solo se sirve el contenido del <pre>, por
+trozos (chunked) y comprimido con gzip si el cliente lo acepta, con las
+cabeceras X-Text-Size, X-More-Data y X-ConsoleAnnotator del protocolo
+progressiveHtml. Con pasos=N cada build se comporta como una build en curso:
+cada petición deja ver 1/N más de la consola (el corte cae en cualquier byte)
+y X-More-Data es true hasta que se ve entera. `retardo` añade a cada
+respuesta la latencia de un Jenkins remoto. Con prefijo="/jenkins" la API
+cuelga de esa ruta y el resto de peticiones se redirigen (302) a ella, como
+un Jenkins detrás de un proxy inverso.
+
+Uso:
+    python tests/jenkins_simulado.py CARPETA [--puerto 8080] [--pasos 3] [--retardo 0.05] [--usuario U --token T]
+                                     [--prefijo /jenkins]
+"""
+import argparse
+import base64
+import gzip
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from logparser.entradas import bloques, listar, ruta_logica  # noqa: E402
+
+_TROZO = 1 << 16
+_RUTA_RE = re.compile(r"^((?:/job/[^/]+)+)/(?:(\d+)/logText/progressiveHtml|api/json)$")
+
+
+def _contenido_pre(html: bytes) -> bytes:
+    inicio = html.find(b"<pre")
+    fin = html.rfind(b"</pre>")
+    if inicio < 0 or fin < 0:
+        return html
+    return html[html.index(b">", inicio) + 1:fin]
+
+
+class ServidorJenkins:
+    """Servidor HTTP/1.1 (conexiones persistentes) en un hilo; `url` una vez iniciado."""
+
+    def __init__(self, raiz, puerto: int = 0, pasos: int = 1, usuario: str = None, token: str = None,
+                 retardo: float = 0.0, prefijo: str = ""):
+        self.raiz = Path(raiz)
+        self.prefijo = prefijo.rstrip("/")
+        self.pasos = max(1, pasos)
+        self.retardo = retardo
+        self._credenciales = None
+        if usuario:
+            self._credenciales = "Basic " + base64.b64encode(f"{usuario}:{token or ''}".encode()).decode()
+        self._consolas = {}      # (job, n) -> bytes del <pre>
+        self._vistas = {}        # (job, n) -> peticiones atendidas (para pasos)
+        self._lock = threading.Lock()
+        self.peticiones = 0
+        self.conexiones = 0
+        self.bytes_enviados = 0
+        self._http = ThreadingHTTPServer(("127.0.0.1", puerto), self._manejador())
+        self._http.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def url(self) -> str:
+        host, puerto = self._http.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def _directorio_job(self, ruta_job: str) -> Path:
+        partes = [unquote(p) for p in ruta_job.split("/job/") if p]
+        return self.raiz.joinpath(*partes)
+
+    def _consola(self, ruta_job: str, numero: int):
+        clave = (ruta_job, numero)
+        with self._lock:
+            if clave not in self._consolas:
+                directorio = self._directorio_job(ruta_job)
+                candidatas = listar(directorio, f"{numero}.html") if directorio.is_dir() else []
+                self._consolas[clave] = (_contenido_pre(b"".join(bytes(b) for b in bloques(candidatas[0])))
+                                         if candidatas else None)
+            return self._consolas[clave]
+
+    def _visible(self, ruta_job: str, numero: int, total: int):
+        with self._lock:
+            vistas = self._vistas[(ruta_job, numero)] = self._vistas.get((ruta_job, numero), 0) + 1
+        tamano = min(total, -(-total * vistas // self.pasos))
+        return tamano, tamano < total
+
+    def _builds(self, ruta_job: str) -> list:
+        directorio = self._directorio_job(ruta_job)
+        if not directorio.is_dir():
+            return None
+        numeros = {ruta_logica(p).stem for p in directorio.iterdir()}
+        return sorted((int(n) for n in numeros if n.isdigit()), reverse=True)
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with servidor._lock:
+                    servidor.conexiones += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _responder(self, estado: int, cuerpo: bytes = b"", cabeceras=None, trozos: bool = False):
+                comprimir = "gzip" in self.headers.get("Accept-Encoding", "") and cuerpo
+                if comprimir:
+                    cuerpo = gzip.compress(cuerpo, compresslevel=1)
+                self.send_response(estado)
+                for clave, valor in (cabeceras or {}).items():
+                    self.send_header(clave, valor)
+                if comprimir:
+                    self.send_header("Content-Encoding", "gzip")
+                if trozos:
+                    self.send_header("Transfer-Encoding", "chunked")
+                else:
+                    self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                if trozos:
+                    for i in range(0, len(cuerpo), _TROZO):
+                        trozo = cuerpo[i:i + _TROZO]
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(trozo), trozo))
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    self.wfile.write(cuerpo)
+                with servidor._lock:
+                    servidor.peticiones += 1
+                    servidor.bytes_enviados += len(cuerpo)
+
+            def do_GET(self):
+                if servidor.retardo:
+                    time.sleep(servidor.retardo)
+                if servidor._credenciales and self.headers.get("Authorization") != servidor._credenciales:
+                    return self._responder(401, b"Unauthorized")
+                partes = urlsplit(self.path)
+                ruta = partes.path
+                if servidor.prefijo:
+                    if not ruta.startswith(servidor.prefijo + "/"):
+                        return self._responder(302, cabeceras={"Location": servidor.url + servidor.prefijo + self.path})
+                    ruta = ruta[len(servidor.prefijo):]
+                m = _RUTA_RE.match(ruta)
+                if not m:
+                    return self._responder(404, b"Not found")
+                ruta_job, numero = m.groups()
+                if numero is None:
+                    builds = servidor._builds(ruta_job)
+                    if builds is None:
+                        return self._responder(404, b"Not found")
+                    cuerpo = json.dumps({"builds": [{"number": n} for n in builds]}).encode()
+                    return self._responder(200, cuerpo, {"Content-Type": "application/json"})
+                consola = servidor._consola(ruta_job, int(numero))
+                if consola is None:
+                    return self._responder(404, b"Not found")
+                inicio = int(parse_qs(partes.query).get("start", ["0"])[0])
+                tamano, mas = servidor._visible(ruta_job, int(numero), len(consola))
+                cabeceras = {"Content-Type": "text/html;charset=UTF-8", "X-Text-Size": str(max(tamano, inicio)),
+                             "X-ConsoleAnnotator": f"anotador-{numero}-{tamano}"}
+                if mas:
+                    cabeceras["X-More-Data"] = "true"
+                self._responder(200, consola[inicio:tamano], cabeceras, trozos=True)
+
+        return Manejador
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Jenkins simulado que sirve las consolas de una carpeta.")
+    ap.add_argument("raiz", type=Path, help="Carpeta con <job>/<n>.html")
+    ap.add_argument("--puerto", type=int, default=8080)
+    ap.add_argument("--pasos", type=int, default=1, help="Peticiones hasta ver cada consola entera (build en curso)")
+    ap.add_argument("--retardo", type=float, default=0.0, help="Segundos de latencia por petición")
+    ap.add_argument("--usuario", default=None)
+    ap.add_argument("--token", default=None)
+    ap.add_argument("--prefijo", default="", help="Ruta bajo la que cuelga Jenkins (el resto se redirige a ella)")
+    args = ap.parse_args(argv)
+    if not args.raiz.is_dir():
+        print(f"[ERROR] Carpeta no válida: {args.raiz}")
+        return 2
+    servidor = ServidorJenkins(args.raiz, args.puerto, args.pasos, args.usuario, args.token, args.retardo,
+                                args.prefijo)
+    print(f"[OK] Jenkins simulado en {servidor.url} sirviendo {args.raiz.resolve()} (Ctrl+C para salir)")
+    try:
+        servidor._http.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[OK] Servidor detenido.")
+    finally:
+        servidor._http.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""calcular_metricas vectorizado frente al bucle por grupo anterior (benchmarks/bench_agregacion.py)."""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from logparser.generar_metricas import calcular_metricas, escanear_log, format_duration, formatear_duraciones
+from logparser.sintetico import generar_consola_promocion
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+from bench_agregacion import calcular_metricas_anterior, generar_eventos  # noqa: E402
+
+
+def _assert_como_anterior(df_eventos, errores):
+    nuevo = calcular_metricas(df_eventos, errores)
+    anterior = calcular_metricas_anterior(df_eventos.astype({c: object for c in ("evento", "etiqueta", "tecnologia",
+                                                                                 "fase")}), errores)
+    for hoja, df in anterior.items():
+        # Etiquetas gana las columnas de huella de error; el resto de columnas no cambia
+        pd.testing.assert_frame_equal(nuevo[hoja][df.columns.tolist()], df, check_dtype=False, obj=hoja)
+
+
+@pytest.mark.parametrize("eventos", [8, 1_000, 5_000])
+def test_igual_que_el_bucle_por_grupo(eventos):
+    df = generar_eventos(eventos)
+    _assert_como_anterior(df, {e: "error" for e in df["etiqueta"].unique()[::7]})
+
+
+def test_eventos_categoricos_del_escaner(tmp_path):
+    # El escáner entrega columnas categóricas (logparser.almacen) y fases sin cerrar
+    ruta = generar_consola_promocion(tmp_path / "consola.html", etiquetas=200, prob_error=0.2)
+    escaner = escanear_log(ruta)
+    df = escaner.df_eventos()
+    assert isinstance(df["etiqueta"].dtype, pd.CategoricalDtype)
+    _assert_como_anterior(df, escaner.errores)
+
+
+def test_sin_eventos():
+    vacio = pd.DataFrame({"fecha": pd.Series(dtype="datetime64[ns]"), "evento": [], "etiqueta": [],
+                          "tecnologia": [], "fase": []})
+    hojas = calcular_metricas(vacio, {})
+    assert all(df.empty for df in hojas.values())
+
+
+def test_formatear_duraciones():
+    ms = pd.Series([0, 999, 61_000, 3_600_000 * 30 + 5_000, None])
+    assert formatear_duraciones(ms).tolist() == [format_duration(v) for v in ms[:-1]] + [""]
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import pickle
+import random
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ejecutar
+from logparser.almacen import AlmacenEventos, cargar_proyecto
+from logparser.fechas import segundos
+
+ESQUEMA = {"etiqueta": "categoria", "tecnologia": "categoria", "inicio": "fecha", "duracion_ms": "entero"}
+
+
+def _filas(n, semilla=0):
+    rnd = random.Random(semilla)
+    return [(rnd.choice(["CR-2", "CR-10", "PF-1", None]), rnd.choice(["SQL", "JAVA", "ñandú"]),
+             None if rnd.random() < 0.1 else f"2024.01.0{rnd.randint(1, 9)} 1{rnd.randint(0, 9)}:00:00",
+             rnd.randint(0, 10 ** 12)) for _ in range(n)]
+
+
+def _esperado(filas):
+    df = pd.DataFrame(filas, columns=list(ESQUEMA))
+    df["inicio"] = pd.to_datetime(df["inicio"], format="%Y.%m.%d %H:%M:%S").astype("datetime64[us]")
+    for columna in ("etiqueta", "tecnologia"):
+        df[columna] = pd.Categorical(df[columna], categories=sorted(df[columna].dropna().unique()))
+    return df
+
+
+def test_ida_y_vuelta():
+    filas = _filas(2000)
+    almacen = AlmacenEventos(ESQUEMA)
+    for etiqueta, tecnologia, inicio, duracion in filas[:1000]:
+        almacen.agregar(etiqueta, tecnologia, None if inicio is None else segundos(inicio), duracion)
+    almacen.extender(_esperado(filas[1000:]).astype({"etiqueta": object, "tecnologia": object}))
+    df = almacen.a_dataframe()
+    pd.testing.assert_frame_equal(df, _esperado(filas))
+    objetos = df.astype({"etiqueta": object, "tecnologia": object})
+    assert len(almacen) == 2000 and almacen.memoria() < objetos.memory_usage(deep=True).sum()
+    # Mismo orden al agrupar que con columnas str
+    agrupado = df.groupby("etiqueta", observed=True)["duracion_ms"].sum()
+    referencia = _esperado(filas).astype({"etiqueta": object}).groupby("etiqueta")["duracion_ms"].sum()
+    assert agrupado.index.astype(object).tolist() == referencia.index.tolist()
+    assert agrupado.tolist() == referencia.tolist()
+
+
+def test_serializable_y_sigue_creciendo():
+    almacen = AlmacenEventos(ESQUEMA)
+    almacen.agregar("CR-1", "SQL", 0, 1)
+    copia = pickle.loads(pickle.dumps(almacen))
+    copia.agregar("CR-1", "JAVA", 60, 2)
+    copia.extender(pd.DataFrame({"etiqueta": ["CR-2"], "inicio": ["1970-01-01 00:02:00"], "duracion_ms": [3]}),
+                   tecnologia="SQL")
+    df = copia.a_dataframe()
+    assert df["tecnologia"].astype(str).tolist() == ["SQL", "JAVA", "SQL"]
+    assert df["inicio"].tolist() == list(pd.to_datetime([0, 60, 120], unit="s"))
+    assert len(almacen) == 1
+
+
+def test_esquema_invalido():
+    with pytest.raises(ValueError):
+        AlmacenEventos({"x": "texto"})
+
+
+def test_cargar_proyecto(tmp_path, consola_promocion):
+    metricas = tmp_path / "METRICAS"
+    # La build sale de los metadatos de la salida: la segunda consola es una copia de la primera
+    segunda = shutil.copy(consola_promocion, consola_promocion.with_name("PROYECTO_2.html"))
+    for consola in (consola_promocion, segunda):
+        assert ejecutar("logparser.generar_metricas", consola, "--salida", metricas).returncode == 0
+    df = cargar_proyecto(metricas).a_dataframe()
+    global_data = pd.read_excel(metricas / "PROYECTO_1.html_METRICAS.xlsx", sheet_name="GlobalData")
+    assert df["build"].astype(str).value_counts().to_dict() == {"PROYECTO_1": len(global_data),
+                                                                "PROYECTO_2": len(global_data)}
+    primera = df[df["build"] == "PROYECTO_1"].reset_index(drop=True)
+    assert primera["etiqueta"].astype(str).tolist() == global_data["etiqueta"].astype(str).tolist()
+    assert np.array_equal(primera["duracion_ms"], global_data["duracion_ms"])
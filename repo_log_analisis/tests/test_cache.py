@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import gzip
+import os
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from logparser import cache as modulo_cache
+from logparser.cache import CacheParseo, parsear_con_cache
+
+HACE_UNA_HORA = 3600 * 10 ** 9
+
+
+def _envejecer(ruta, ns=HACE_UNA_HORA):
+    mtime = os.stat(ruta).st_mtime_ns - ns
+    os.utime(ruta, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def lecturas(monkeypatch):
+    """Cuenta las veces que se lee un fichero entero para calcular su hash."""
+    leidas = []
+    original = modulo_cache.hash_fichero
+    monkeypatch.setattr(modulo_cache, "hash_fichero", lambda ruta: leidas.append(ruta) or original(ruta))
+    return leidas
+
+
+def test_guardar_y_obtener(tmp_path):
+    cache = CacheParseo(tmp_path / "c")
+    tablas = {"eventos": pd.DataFrame({"a": [1, 2], "b": pd.to_datetime(["2024-01-01", "2024-01-02"])})}
+    meta = {"log_start": datetime(2024, 1, 1, 6), "errores": {"CR-1": "x"}}
+    cache.guardar("metricas-1-abc", tablas, meta)
+    obtenidas, meta_leida = cache.obtener("metricas-1-abc")
+    pd.testing.assert_frame_equal(obtenidas["eventos"], tablas["eventos"])
+    assert meta_leida == meta
+    (cache.directorio / "metricas-1-abc" / "meta.json").write_text("{", encoding="utf-8")
+    assert cache.obtener("metricas-1-abc") is None and not cache.entradas()  # corrupta: se borra
+
+
+def test_expulsion_lru(tmp_path):
+    cache = CacheParseo(tmp_path / "c", tamano_maximo_mb=1)
+    grande = {"t": pd.DataFrame({"x": [os.urandom(200_000).hex()]})}
+    for i in range(4):
+        cache.guardar(f"p-1-{i}", grande, {})
+        os.utime(cache.directorio / f"p-1-{i}", (i, i))
+    assert sorted(e.name for e in cache.entradas())[-1] == "p-1-3"
+    assert cache.tamano_total() <= cache.tamano_maximo
+
+
+def test_consola_sin_cambios_no_se_relee(tmp_path, lecturas):
+    ruta = tmp_path / "consola.html"
+    ruta.write_bytes(b"[2024.01.01 10:00:00] linea\n" * 100)
+    _envejecer(ruta)
+    cache = CacheParseo()
+    clave = cache.clave(ruta, "metricas", "1")
+    assert cache.clave(ruta, "metricas", "1") == clave
+    assert CacheParseo().clave(ruta, "table_download", "3").endswith(clave.rsplit("-", 1)[1])
+    assert lecturas == [ruta]
+
+    # Reescrita con el mismo tamaño: cambia el mtime y se vuelve a leer
+    ruta.write_bytes(b"[2024.01.02 10:00:00] linea\n" * 100)
+    _envejecer(ruta, HACE_UNA_HORA // 2)
+    assert cache.clave(ruta, "metricas", "1") != clave
+    assert len(lecturas) == 2
+
+
+def test_consola_recien_modificada_no_entra_en_el_indice(tmp_path, lecturas):
+    # Podría volver a cambiar dentro del mismo tic de mtime: siempre se lee
+    ruta = tmp_path / "consola.html"
+    ruta.write_bytes(b"en curso\n")
+    cache = CacheParseo()
+    cache.clave(ruta, "metricas", "1")
+    cache.clave(ruta, "metricas", "1")
+    assert len(lecturas) == 2
+
+
+def test_misma_clave_comprimida_en_zip_y_movida(tmp_path):
+    contenido = b"[2024.01.01 10:00:00] linea\n" * 50
+    plano = tmp_path / "a.html"
+    plano.write_bytes(contenido)
+    (tmp_path / "b.html.gz").write_bytes(gzip.compress(contenido))
+    with zipfile.ZipFile(tmp_path / "consolas.zip", "w") as z:
+        z.writestr("dir/c.html", contenido)
+    cache = CacheParseo()
+    claves = {cache.clave(r, "metricas", "1")
+              for r in (plano, tmp_path / "b.html.gz", tmp_path / "consolas.zip" / "dir" / "c.html")}
+    assert len(claves) == 1
+
+
+def test_parsear_con_cache(tmp_path):
+    ruta = tmp_path / "consola.html"
+    ruta.write_bytes(b"x\n")
+    llamadas = []
+
+    def parseo(r):
+        llamadas.append(r)
+        return {"t": pd.DataFrame({"n": [len(llamadas)]})}, {"ok": True}
+
+    for _ in range(2):
+        tablas, meta = parsear_con_cache(ruta, "metricas", "1", parseo)
+    assert len(llamadas) == 1 and tablas["t"]["n"].tolist() == [1] and meta == {"ok": True}
+    parsear_con_cache(ruta, "metricas", "2", parseo)     # otra versión del parser
+    parsear_con_cache(ruta, "metricas", "2", parseo, usar_cache=False)
+    assert len(llamadas) == 3
+    assert CacheParseo().invalidar("metricas") == 2
+
+
+def test_desactivada(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOGPARSER_CACHE", "off")
+    ruta = tmp_path / "consola.html"
+    ruta.write_bytes(b"x\n")
+    _envejecer(ruta)
+    cache = CacheParseo(tmp_path / "c")
+    assert not cache.activa
+    cache.clave(ruta, "metricas", "1")
+    assert not cache.directorio_huellas.exists()
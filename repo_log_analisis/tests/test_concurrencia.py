@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from logparser import concurrencia
+
+
+def _intervalos(n, span):
+    inicio = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.linspace(0, span.value, n).astype("int64"))
+    return pd.DataFrame({"tecnologia": np.where(np.arange(n) % 2, "JAVA", "SQL"),
+                         "inicio": inicio, "fin": inicio + pd.Timedelta(minutes=30)})
+
+
+def test_barrido_intervalos_semiabiertos():
+    g, t, nivel, tramo = concurrencia.barrido(np.array([0, 0, 0]), np.array([0, 10, 5]), np.array([10, 20, 15]))
+    assert t.tolist() == [0, 5, 10, 15, 20]
+    assert nivel.tolist() == [1, 2, 2, 1, 0]
+    assert tramo.tolist() == [5, 5, 5, 5, 0]
+
+
+def test_hojas_concurrencia():
+    df = pd.DataFrame({"etiqueta": ["CR-1", "CR-2", "CR-3"], "tecnologia": ["JAVA", "JAVA", "SQL"],
+                       "fase": ["BUILD"] * 3,
+                       "inicio": pd.to_datetime(["2024-01-01 10:00", "2024-01-01 10:30", "2024-01-01 11:00"]),
+                       "fin": pd.to_datetime(["2024-01-01 11:00", "2024-01-01 11:30", "2024-01-01 12:00"])})
+    hojas = concurrencia.hojas_concurrencia(df)
+    total = hojas["Concurrencia"].set_index("tecnologia").loc[concurrencia.AMBITO_TOTAL]
+    assert total["union_ms"] == 2 * 3600 * 1000
+    assert total["suma_ms"] == 3 * 3600 * 1000
+    assert total["paralelismo_max"] == 2
+    assert hojas["Ruta Critica"]["etiqueta"].tolist() == ["CR-1", "CR-3"]
+
+
+def test_serie_reducida_con_varias_semanas():
+    # (t - t0) * max_puntos en ns desbordaba int64 con más de ~10 días entre el primer y el último punto
+    span = pd.Timedelta(weeks=6)
+    df = _intervalos(3 * concurrencia.MAX_PUNTOS_SERIE, span)
+    serie = concurrencia.serie_desde_intervalos(df)
+    assert set(serie["tecnologia"]) == {concurrencia.AMBITO_TOTAL, "JAVA", "SQL"}
+    for tecnologia, grupo in serie.groupby("tecnologia"):
+        propios = df if tecnologia == concurrencia.AMBITO_TOTAL else df[df["tecnologia"] == tecnologia]
+        assert len(grupo) <= concurrencia.MAX_PUNTOS_SERIE
+        assert grupo["instante"].is_monotonic_increasing
+        assert grupo["instante"].iloc[0] == propios["inicio"].min()
+        assert grupo["instante"].iloc[-1] - grupo["instante"].iloc[0] > span - pd.Timedelta(days=1)
+    assert serie["nivel"].min() >= 0
+
+
+def test_tecnologias_combinadas():
+    # CR-2 es de AS400 y ORACLE: cuenta en las dos y una sola vez en el total
+    df = pd.DataFrame({"etiqueta": ["CR-1", "CR-2", "CR-3"], "tecnologia": ["AS400", "AS400, ORACLE", "ORACLE"],
+                       "fase": ["BUILD"] * 3,
+                       "inicio": pd.to_datetime(["2024-01-01 10:00", "2024-01-01 10:30", "2024-01-01 12:00"]),
+                       "fin": pd.to_datetime(["2024-01-01 11:00", "2024-01-01 11:30", "2024-01-01 13:00"])})
+    hojas = concurrencia.hojas_concurrencia(df)
+    resumen = hojas["Concurrencia"].set_index("tecnologia")
+    assert sorted(resumen.index) == ["AS400", "ORACLE", concurrencia.AMBITO_TOTAL]
+    assert set(hojas["Serie Concurrencia"]["tecnologia"]) == set(resumen.index)
+    hora = 3600 * 1000
+    assert resumen.loc["AS400", ["intervalos", "union_ms", "paralelismo_max"]].tolist() == [2, 1.5 * hora, 2]
+    assert resumen.loc["ORACLE", ["intervalos", "union_ms", "suma_ms"]].tolist() == [2, 2 * hora, 2 * hora]
+    assert resumen.loc[concurrencia.AMBITO_TOTAL, ["intervalos", "suma_ms"]].tolist() == [3, 3 * hora]
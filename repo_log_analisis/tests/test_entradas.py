@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import bz2
+import gzip
+import lzma
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from logparser import entradas, pipeline
+
+
+@pytest.fixture
+def consolas(tmp_path, consola_promocion):
+    """La misma consola plana, comprimida de tres formas y dentro de un zip (también comprimida)."""
+    datos = consola_promocion.read_bytes()
+    (tmp_path / "PROYECTO_2.html.gz").write_bytes(gzip.compress(datos))
+    (tmp_path / "PROYECTO_3.html.bz2").write_bytes(bz2.compress(datos))
+    (tmp_path / "PROYECTO_4.html.xz").write_bytes(lzma.compress(datos))
+    with zipfile.ZipFile(tmp_path / "builds.zip", "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("sub/PROYECTO_5.html", datos)
+        z.writestr("PROYECTO_6.html.gz", gzip.compress(datos))
+        z.writestr("notas.txt", b"no es una consola")
+    return datos
+
+
+def _contenido(ruta, offset=0, tamano=1 << 20):
+    return b"".join(bytes(b) for b in entradas.bloques(ruta, offset, tamano))
+
+
+def test_listar_y_rutas_logicas(tmp_path, consolas):
+    (tmp_path / "PROYECTO_1.html.gz").write_bytes(gzip.compress(consolas))  # duplicada de la plana
+    listadas = entradas.listar(tmp_path)
+    assert [entradas.ruta_logica(p).relative_to(tmp_path).as_posix() for p in listadas] == [
+        "PROYECTO_1.html", "PROYECTO_2.html", "PROYECTO_3.html", "PROYECTO_4.html",
+        "PROYECTO_6.html", "sub/PROYECTO_5.html"]
+    assert listadas[0].suffix == ".html"  # de "x.html" y "x.html.gz" se queda la plana
+    assert entradas.miembro_zip(tmp_path / "builds.zip" / "sub" / "PROYECTO_5.html") == \
+        (tmp_path / "builds.zip", "sub/PROYECTO_5.html")
+    assert entradas.existe(tmp_path / "builds.zip" / "PROYECTO_6.html.gz")
+    assert not entradas.existe(tmp_path / "builds.zip" / "otra.html")
+    assert entradas.listar(tmp_path, "*_2.html") == [tmp_path / "PROYECTO_2.html.gz"]
+
+
+def test_mismo_contenido_en_todos_los_formatos(tmp_path, consolas, monkeypatch):
+    for ruta in entradas.listar(tmp_path):
+        assert _contenido(ruta, tamano=4096) == consolas, ruta
+        assert _contenido(ruta, offset=1000) == consolas[1000:], ruta
+        assert entradas.es_plano(ruta) == (ruta.suffix == ".html" and "builds.zip" not in ruta.parts)
+    # Ficheros planos grandes: bloques memoryview sobre un mmap
+    monkeypatch.setattr(entradas, "_UMBRAL_MMAP", 0)
+    plano = tmp_path / "PROYECTO_1.html"
+    assert isinstance(next(entradas.bloques(plano)), memoryview)
+    assert _contenido(plano, offset=7, tamano=333) == consolas[7:]
+
+
+def test_mismas_hojas_que_la_consola_plana(tmp_path, consolas):
+    referencia = pipeline._hojas_metricas(tmp_path / "PROYECTO_1.html", usar_cache=False)
+    for ruta in (tmp_path / "PROYECTO_2.html.gz", tmp_path / "builds.zip" / "PROYECTO_6.html.gz"):
+        hojas = pipeline._hojas_metricas(ruta, usar_cache=True)
+        for hoja in referencia:
+            pd.testing.assert_frame_equal(hojas[hoja], referencia[hoja], check_dtype=False, obj=hoja)
+
+
+def test_decodificador():
+    decodificador = entradas.nuevo_decodificador()
+    texto = "".join(decodificador.decode(bytes([b])) for b in "a\r\nñ\r€\n".encode("utf-8") + b"\xff")
+    texto += decodificador.decode(b"", final=True)
+    assert texto == "a\nñ\n€\n�"
+
+
+def test_fin_de_consola():
+    assert entradas.fin_de_consola("[2024.01.01 10:00:00] fin\nFinished: SUCCESS\n")
+    assert entradas.fin_de_consola('<span class="x">Finished: FAILURE</span>')
+    # Solo como línea propia, no citada en mitad de otra
+    assert not entradas.fin_de_consola("[exec] echo Finished: SUCCESS")
+    assert not entradas.fin_de_consola("Finished: pending")
+
+
+def test_zst_sin_soporte(tmp_path, monkeypatch):
+    import builtins
+    importar = builtins.__import__
+
+    def sin_zstd(nombre, *args, **kwargs):
+        if nombre in ("compression", "zstandard"):
+            raise ImportError(nombre)
+        return importar(nombre, *args, **kwargs)
+
+    ruta = tmp_path / "x.html.zst"
+    ruta.write_bytes(b"")
+    monkeypatch.setattr(builtins, "__import__", sin_zstd)
+    with pytest.raises(ImportError, match="zstandard"):
+        _contenido(ruta)
+    assert entradas.ruta_logica(Path("P/x.html.zst")) == Path("P/x.html")
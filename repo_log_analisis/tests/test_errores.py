@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from logparser import errores, historico, pipeline
+from logparser.generar_metricas import MARCA_ERROR, EscanerPromocion
+
+
+def _bloque(ruta, linea, mensaje):
+    return f"{MARCA_ERROR}\n{ruta}/build.xml:{linea}: {MARCA_ERROR}\n\"{mensaje}\""
+
+
+def test_normalizar_partes_volatiles():
+    texto = ('  "[2024.01.01 10:00:00] D:\\jenkins\\workspace\\CR-1234\\build.xml:621: Compile failed '
+             'in PF-77 id 3fa9c1b2d04e 123e4567-e89b-12d3-a456-426614174000  after 35 s"  ')
+    assert errores.normalizar(texto) == "<fecha> <ruta>/build.xml:<n>: Compile failed in <etiqueta> id <hex> <uuid> after <n> s"
+    # Palabras en hexadecimal sin dígitos no son hashes
+    assert errores.normalizar("deadbeef faced") == "deadbeef faced"
+    assert errores.normalizar("\n\n  \n") == ""
+
+
+def test_huella_igual_entre_rutas_builds_y_etiquetas():
+    a = _bloque("/opt/build/RQ-1068", 621, "Compile failed")
+    b = _bloque("D:/jenkins/workspace/CR-12", 3, "Compile failed")
+    c = _bloque("D:/jenkins/workspace/CR-12", 3, "Test failed")
+    assert errores.huella(a) == errores.huella(b) != errores.huella(c)
+    assert len(errores.huella(a)) == 12
+    assert errores.mensaje(a) == "Compile failed"
+
+
+def test_tabla_errores_y_ultima_por_etiqueta():
+    bloques = [("CR-1", _bloque("/a/CR-1", 1, "Compile failed")), ("CR-2", _bloque("/b/CR-2", 9, "Compile failed")),
+               ("CR-1", _bloque("/a/CR-1", 5, "Test failed"))]
+    df = errores.tabla_errores(bloques)
+    assert df.columns.tolist() == errores.COLUMNAS_ERRORES
+    assert df["frecuencia"].tolist() == [2, 2, 1]
+    ultima = errores.huellas_por_etiqueta(df)
+    assert ultima.loc["CR-1", "huella"] == errores.huella(bloques[2][1])
+    # Releída de un Excel la huella podría llegar como número: se recalcula del bloque
+    releida = df.assign(huella=0)
+    assert [f[1] for f in errores.filas_indice({"Errores": releida})] == df["huella"].tolist()
+    assert errores.filas_indice({}) == []
+
+
+def test_bloques_encadenados_y_etiqueta_del_escaner():
+    lineas = ["[2024.01.01 10:00:00] [JAVA] [promote] [PF-7] The BUILD phase has started",
+              "[2024.01.01 10:00:05] [JAVA] [PF-7] BUILD FAILED", MARCA_ERROR,
+              "/w/PF-7/build.xml:10: " + MARCA_ERROR, '"/w/PF-7/sub.xml:3: Compile failed"', "ruido"]
+    escaner = EscanerPromocion().procesar_lineas(lineas)
+    assert escaner.errores == {"PF-7": "/w/PF-7/sub.xml:3: Compile failed"}
+    [(etiqueta, bloque)] = escaner.bloques_error
+    assert etiqueta == "PF-7" and bloque.count("\n") == 2
+
+
+def test_indice_entre_builds(tmp_path, consola_promocion):
+    db = tmp_path / "historico.sqlite"
+    resultado = pipeline.analizar(consola_promocion, formatos=(), graficas=False, historico=db)
+    copia = consola_promocion.with_name("PROYECTO_2.html")
+    copia.write_bytes(consola_promocion.read_bytes())
+    segundo = pipeline.analizar(copia, formatos=(), graficas=False, historico=db)
+    hojas = segundo.hojas
+    assert not hojas["Errores"].empty
+    assert (hojas["Errores"]["builds_historico"] == 2).all()
+    assert (resultado.hojas["Errores"]["builds_historico"] == 1).all()
+    con_error = hojas["Etiquetas"]["huella"] != ""
+    assert con_error.any()
+    assert hojas["Etiquetas"]["builds_historico"].tolist() == [2 if e else 0 for e in con_error]
+
+    con = historico.conectar(db)
+    try:
+        repetidas = errores.recurrentes(con, consola_promocion.parent.name, minimo=2)
+        huella = repetidas["huella"].iloc[0]
+        apariciones = errores.apariciones(con, huella)
+    finally:
+        con.close()
+    assert set(repetidas["huella"]) == set(hojas["Errores"]["huella"])
+    assert (repetidas["builds"] == 2).all()
+    assert set(apariciones["build"]) == {"PROYECTO_1", "PROYECTO_2"}
+    assert pd.api.types.is_string_dtype(repetidas["patron"])
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from logparser import fechas
+
+EPOCA = datetime(1970, 1, 1)
+
+
+def _strptime(texto):
+    return int((datetime.strptime(texto, fechas.FORMATO) - EPOCA).total_seconds())
+
+
+def test_igual_que_strptime():
+    rnd = random.Random(0)
+    decodificador = fechas.DecodificadorFechas()
+    instantes = [EPOCA + timedelta(seconds=rnd.randrange(0, 4_102_444_800)) for _ in range(20_000)]
+    # Bisiestos, cambios de día/año y segundos repetidos seguidos (memoria del último valor)
+    instantes += [datetime(2024, 2, 29, 23, 59, 59), datetime(2000, 2, 29), datetime(1999, 12, 31, 23, 59, 59)] * 2
+    for instante in instantes:
+        texto = instante.strftime(fechas.FORMATO)
+        assert decodificador.segundos(texto) == _strptime(texto) == fechas.segundos(texto), texto
+        assert fechas.a_datetime(decodificador.segundos(texto)) == instante
+
+
+def test_muchos_dias_no_crece_sin_limite():
+    decodificador = fechas.DecodificadorFechas()
+    inicio = datetime(2000, 1, 1, 12)
+    for dia in range(fechas._MAX_DIAS + 10):
+        texto = (inicio + timedelta(days=dia)).strftime(fechas.FORMATO)
+        assert decodificador.segundos(texto) == _strptime(texto)
+    assert len(decodificador._dias) <= fechas._MAX_DIAS
+
+
+@pytest.mark.parametrize("texto", ["2024.02.30 10:00:00", "2023.02.29 10:00:00", "2024.13.01 10:00:00",
+                                   "2024.01.01 24:00:00", "2024.01.01 10:60:00", "2024.01.01 10:00:60",
+                                   "2024-01-01 10:00:00", "2024.01.01 10:00", "2024.01.01 10:00:000"])
+def test_fuera_de_rango_como_strptime(texto):
+    with pytest.raises(ValueError):
+        datetime.strptime(texto, fechas.FORMATO)
+    with pytest.raises(ValueError):
+        fechas.DecodificadorFechas().segundos(texto)
+
+
+def test_a_datetime64():
+    textos = ["2024.01.01 06:00:00", "1999.12.31 23:59:59", "2038.01.19 03:14:08"]
+    columna = fechas.a_datetime64([fechas.segundos(t) for t in textos])
+    assert columna.dtype == np.dtype("datetime64[us]")
+    esperado = pd.to_datetime(textos, format=fechas.FORMATO).to_numpy().astype("datetime64[us]")
+    assert (columna == esperado).all()
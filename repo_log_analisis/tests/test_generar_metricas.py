@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import pickle
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from conftest import ejecutar
+from logparser import generar_metricas as gm
+from logparser.sintetico import generar_consola_promocion
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+from bench_agregacion import calcular_metricas_anterior  # noqa: E402
+
+
+def _eventos_linea_a_linea(ruta):
+    """Como el parser original: todas las líneas del fichero, un evento por coincidencia."""
+    eventos = []
+    for linea in ruta.read_text(encoding="utf-8").splitlines():
+        m = gm._EVENTO_RE.search(linea)
+        if m:
+            fecha, tecnologia, tipo, numero, fase, evento = m.groups()
+            eventos.append({"fecha": datetime.strptime(fecha, gm.FORMATO), "evento": evento.upper(),
+                            "etiqueta": f"{tipo}-{numero}", "tecnologia": tecnologia, "fase": fase.upper()})
+    return pd.DataFrame(eventos)
+
+
+def _procesos_linea_a_linea(ruta):
+    filas = []
+    for linea in ruta.read_text(encoding="utf-8").splitlines():
+        m = gm._PROCESO_RE.search(linea)
+        if m:
+            fecha, nombre, tipo, descripcion, fase, duracion = m.groups()
+            if nombre in gm.VALID_NOMBRES and not any(t in descripcion for t in gm.EXCLUDE_TAGS) and int(duracion):
+                filas.append((nombre, tipo, descripcion, fase.upper(), "", fecha, int(duracion),
+                              gm.format_duration(int(duracion))))
+    return pd.DataFrame(filas, columns=gm.COLUMNAS_PROCESOS)
+
+
+def test_escaner_de_una_pasada_igual_que_linea_a_linea(tmp_path):
+    ruta = generar_consola_promocion(tmp_path / "consola.html", etiquetas=150, procesos=30, prob_error=0.1)
+    escaner = gm.escanear_log(ruta)
+    # La tabla de eventos reducida da las mismas hojas que todos los eventos del log
+    anterior = calcular_metricas_anterior(_eventos_linea_a_linea(ruta), {})
+    nuevo = gm.calcular_metricas(escaner.df_eventos(), {})
+    for hoja, df in anterior.items():
+        pd.testing.assert_frame_equal(nuevo[hoja][df.columns.tolist()], df, check_dtype=False, obj=hoja)
+    procesos = escaner.df_procesos().astype({c: object for c in ("Nombre", "Tipo", "Descripcion", "Fase")})
+    pd.testing.assert_frame_equal(procesos, _procesos_linea_a_linea(ruta), check_dtype=False)
+
+
+def test_estado_serializable_a_mitad(tmp_path):
+    datos = generar_consola_promocion(tmp_path / "consola.html", etiquetas=80, prob_error=0.3).read_bytes()
+    completo = gm.EscanerPromocion()
+    completo.alimentar(datos)
+    mitad = gm.EscanerPromocion()
+    mitad.alimentar(datos[:len(datos) // 2 + 1])
+    reanudado = pickle.loads(pickle.dumps(mitad))
+    reanudado.alimentar(datos[len(datos) // 2 + 1:])
+    (tablas_a, meta_a), (tablas_b, meta_b) = completo.resultado(), reanudado.resultado()
+    assert meta_a == meta_b
+    for nombre in tablas_a:
+        pd.testing.assert_frame_equal(tablas_a[nombre], tablas_b[nombre])
+
+
+def test_cli_genera_el_excel(tmp_path, consola_promocion):
+    proceso = ejecutar("logparser.generar_metricas", consola_promocion)
+    assert proceso.returncode == 0, proceso.stdout + proceso.stderr
+    xlsx = gm.ruta_salida(consola_promocion)
+    assert xlsx.name == "PROYECTO_1.html_METRICAS.xlsx" and "Excel generado" in proceso.stdout
+    hojas = pd.read_excel(xlsx, sheet_name=None)
+    assert {"GlobalData", "Tiempos", "Etiquetas", "Medias Tecnologia", "Errores", "Procesos",
+            "Concurrencia", "Serie Concurrencia", "Ruta Critica"} <= set(hojas)
+    assert hojas["Etiquetas"]["etiqueta"].nunique() == 60
+    assert ejecutar("logparser.generar_metricas").returncode == 2
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from logparser import generar_graficas as gg
+from logparser import panel
+from logparser.pipeline import analizar
+from logparser.sintetico import generar_consola_promocion
+
+
+def _etiquetas(n):
+    inicio = pd.Timestamp("2024-03-01 10:00:00") + pd.to_timedelta(np.arange(n) * 7, unit="s")
+    return pd.DataFrame({"etiqueta": [f"CR-{i}" for i in range(n)],
+                         "tecnologia": np.where(np.arange(n) % 3, "JAVA", "SQL"),
+                         "inicio": inicio, "fin": inicio + pd.Timedelta(minutes=2)})
+
+
+@pytest.mark.parametrize("n, tipo", [(5, "bar"), (12, "scattergl"), (40, "scattergl")])
+def test_timeline_segun_filas(monkeypatch, n, tipo):
+    monkeypatch.setattr(gg, "MAX_FILAS_SVG", 10)
+    monkeypatch.setattr(gg, "MAX_FILAS_WEBGL", 30)
+    fig = gg.figura_etiquetas(_etiquetas(n))
+    assert {t.type for t in fig.data} == {tipo}
+    if n > 30:
+        # Agregada: nivel de concurrencia por tecnología (y el total), sin una fila por etiqueta
+        assert "agregada" in fig.layout.title.text
+        assert {"JAVA", "SQL"} <= {t.name for t in fig.data}
+        assert max(max(t.y) for t in fig.data) <= n
+    elif n > 10:
+        assert fig.layout.yaxis.showticklabels is False
+        # Cada etiqueta es un segmento inicio-fin separado por None
+        assert sum(len(t.x) for t in fig.data) == 3 * n
+
+
+def test_modos_plotlyjs(tmp_path):
+    assert gg.incluir_plotlyjs(tmp_path, "incrustado") is True
+    assert gg.incluir_plotlyjs(tmp_path, "cdn") == "cdn"
+    nombre = gg.incluir_plotlyjs(tmp_path / "a", "compartido")
+    asset = tmp_path / "a" / nombre
+    assert nombre.startswith("plotly-") and asset.stat().st_size > 1_000_000
+    mtime = asset.stat().st_mtime_ns
+    assert gg.asset_plotlyjs(tmp_path / "a") == asset and asset.stat().st_mtime_ns == mtime
+    with pytest.raises(ValueError, match="plotly.js desconocido"):
+        gg.incluir_plotlyjs(tmp_path, "otro")
+
+
+def test_guardar_graficas_compartido(tmp_path):
+    hojas = {"Tiempos": pd.DataFrame({"Tecnología": ["JAVA"], "Inicio": ["2024-03-01 10:00:00"],
+                                      "Fin": ["2024-03-01 10:30:00"], "Duración (ms)": [1_800_000]}),
+             "Etiquetas": _etiquetas(0)}
+    generadas = gg.guardar_graficas(hojas, tmp_path / "B_1", "compartido")
+    assert generadas == [tmp_path / "B_1_tiempos.html"]  # sin etiquetas no hay segunda gráfica
+    texto = generadas[0].read_text(encoding="utf-8")
+    asset = next(tmp_path.glob("plotly-*.min.js"))
+    assert f'src="{asset.name}"' in texto and len(texto) < 100_000
+
+
+@pytest.fixture
+def metricas(tmp_path):
+    salida = tmp_path / "METRICAS" / "PROYECTO"
+    for n in range(1, 4):
+        log = generar_consola_promocion(tmp_path / f"PROYECTO_{n}.html", etiquetas=15, semilla=n)
+        analizar(log, salida_dir=salida, formatos=("xlsx",) if n < 3 else ("parquet",), graficas=False)
+    return salida
+
+
+def test_panel(metricas):
+    assert [p.name for p in panel.salidas_metricas(metricas)] == [
+        "PROYECTO_1.html_METRICAS.xlsx", "PROYECTO_2.html_METRICAS.xlsx", "PROYECTO_3.html_METRICAS"]
+    tiempos, resumen = panel.datos_panel(metricas)
+    assert len(resumen) == 3 and resumen["union_ms"].notna().all()
+    assert (resumen["union_ms"] <= resumen["suma_ms"]).all()
+    assert set(tiempos["build"]) == set(resumen["build"])
+
+    ruta = panel.generar_panel(metricas, plotlyjs="compartido")
+    assert ruta == metricas / "PROYECTO_PANEL.html"
+    texto = ruta.read_text(encoding="utf-8")
+    assert "Panel PROYECTO: 3 builds" in texto
+    asset, = metricas.glob("plotly-*.min.js")
+    assert texto.count(f'src="{asset.name}"') == 1 and "cdn.plot.ly" not in texto
+    assert len(panel.figuras_panel(tiempos, resumen)) == 3
+
+    _, ultimos = panel.datos_panel(metricas, ultimos=2)
+    assert ultimos["build"].tolist() == resumen["build"].tolist()[-2:]
+
+
+def test_panel_con_excel_danado(metricas, capsys):
+    (metricas / "ROTO_9.html_METRICAS.xlsx").write_bytes(b"no es un xlsx")
+    _, resumen = panel.datos_panel(metricas)
+    assert len(resumen) == 3 and "[WARN] ROTO_9.html_METRICAS.xlsx" in capsys.readouterr().out
+
+
+def test_panel_cli(tmp_path):
+    assert panel.main([str(tmp_path / "no_existe")]) == 2
+    assert panel.main([str(tmp_path)]) == 1
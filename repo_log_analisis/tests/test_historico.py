@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from conftest import ejecutar
+from logparser import historico, pipeline
+from logparser.sintetico import generar_consola_promocion
+
+
+def _hojas(dia: int, duracion_ms: int) -> dict:
+    inicio = pd.Timestamp(2024, 1, dia, 10)
+    fin = inicio + pd.Timedelta(milliseconds=duracion_ms)
+    global_data = pd.DataFrame({"etiqueta": ["CR-1", "CR-2"], "tecnologia": ["JAVA", "SQL"],
+                                "fase": ["BUILD", "BUILD"], "inicio": [inicio, inicio], "fin": [fin, fin],
+                                "duracion_ms": [duracion_ms, 1000]})
+    tiempos = pd.DataFrame({"tecnologia": ["JAVA"], "inicio": [inicio], "fin": [fin], "duracion_ms": [duracion_ms]})
+    return {"GlobalData": global_data, "Tiempos": tiempos}
+
+
+def test_nombre_build():
+    for ruta in ("X.html", "X.html_METRICAS.xlsx", "X_METRICAS", "X_METRICAS.xlsx", "dir/X_METRICAS/"):
+        assert historico.nombre_build(ruta) == "X"
+
+
+def test_ingesta_idempotente_y_regresion(tmp_path):
+    db = tmp_path / "historico.sqlite"
+    for dia in range(1, 8):
+        assert historico.ingestar_hojas(db, f"B{dia}", "P", "metricas", _hojas(dia, 10_000))
+    assert not historico.ingestar_hojas(db, "B7", "P", "metricas", _hojas(7, 10_000))
+    assert historico.ingestar_hojas(db, "B7", "P", "metricas", _hojas(7, 20_000))  # reemplaza
+
+    con = historico.conectar(db)
+    try:
+        assert con.execute("SELECT COUNT(*) FROM builds").fetchone()[0] == 7
+        valores = historico.valores_por_build(con, "fases", proyecto="P", grupo="JAVA")
+        assert len(historico.valores_por_build(con, "fases", ultimos=3, grupo="JAVA")) == 3
+    finally:
+        con.close()
+    assert valores["build"].tolist() == [f"B{d}" for d in range(1, 8)]
+    serie = historico.serie_tendencia(valores, ventana=5, umbral=0.2)
+    assert serie["regresion"].tolist() == [False] * 6 + [True]
+    resumen = historico.resumen_tendencia(serie).iloc[0]
+    assert (resumen["builds"], resumen["max"], resumen["regresiones"]) == (7, 20_000, 1)
+
+
+def test_consolas_con_el_mismo_prefijo_no_se_pisan(tmp_path):
+    # El Excel se nombra con los 45 primeros caracteres; el histórico, con el nombre completo
+    proyecto = tmp_path / "PROYECTO"
+    proyecto.mkdir()
+    base = "promocion_" + "x" * 40
+    db = tmp_path / "historico.sqlite"
+    for sufijo in ("_build_1", "_build_2"):
+        ruta = proyecto / f"{base}{sufijo}.html"
+        generar_consola_promocion(ruta, etiquetas=10)
+        pipeline.analizar(ruta, formatos=(), graficas=False, historico=db)
+    con = historico.conectar(db)
+    try:
+        builds = [b for b, in con.execute("SELECT build FROM builds WHERE proyecto = 'PROYECTO' ORDER BY build")]
+    finally:
+        con.close()
+    assert builds == [f"{base}_build_1", f"{base}_build_2"]
+
+
+def test_ingestar_directorio_y_cli(tmp_path, consola_promocion):
+    metricas = tmp_path / "METRICAS" / "PROYECTO"
+    assert ejecutar("logparser.generar_metricas", consola_promocion, "--salida", metricas).returncode == 0
+    db = tmp_path / "historico.sqlite"
+    assert historico.ingestar_directorio(db, tmp_path / "METRICAS") == (1, 0, 0)
+    assert historico.ingestar_directorio(db, tmp_path / "METRICAS") == (0, 1, 0)
+    proceso = ejecutar("logparser.historico", "--db", db, "builds")
+    assert proceso.returncode == 0 and "PROYECTO_1" in proceso.stdout
+    proceso = ejecutar("logparser.historico", "--db", db, "consultar", "--origen", "procesos", "--serie")
+    assert proceso.returncode == 0
+
+
+def test_misma_build_por_pipeline_y_por_ingesta(tmp_path):
+    # Nombre largo, con espacios y "#": el Excel lo recorta y cambia, la clave de la build no
+    logs = tmp_path / "logs" / "PROYECTO"
+    logs.mkdir(parents=True)
+    consola = logs / ("promocion #12 " + "x" * 40 + ".html")
+    generar_consola_promocion(consola, etiquetas=10)
+    db = tmp_path / "historico.sqlite"
+    salida = tmp_path / "METRICAS" / "otra_carpeta"
+    resultado = pipeline.analizar(consola, salida_dir=salida, formatos=("xlsx", "csv"), graficas=False, historico=db)
+    assert resultado.salidas[0].name != consola.name + "_METRICAS.xlsx"
+    assert historico.build_de_salida(resultado.salidas[0]) == consola.stem
+    # Excel y directorio columnar son una sola salida; la ingesta reemplaza la fila del pipeline
+    assert historico.ingestar_directorio(db, tmp_path / "METRICAS") == (1, 0, 0)
+    con = historico.conectar(db)
+    try:
+        filas = con.execute("SELECT proyecto, build FROM builds").fetchall()
+    finally:
+        con.close()
+    assert filas == [("PROYECTO", consola.stem)]
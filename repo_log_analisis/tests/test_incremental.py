@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from logparser import entradas, generar_metricas, incremental, parser_table_download, pipeline
+from logparser.cache import CacheParseo
+from logparser.incremental import Checkpoints
+from logparser.sintetico import generar_consola_promocion, generar_consola_table_download
+
+MULTIBYTE = "ñ€".encode("utf-8")
+VERSIONES = {"metricas": generar_metricas.VERSION_PARSER, "table_download": parser_table_download.VERSION_PARSER}
+
+
+def _consola(tmp_path, parser):
+    # Más de 128 KiB: la huella del checkpoint solo muestrea el principio y el final
+    if parser == "metricas":
+        ruta = generar_consola_promocion(tmp_path / "origen.html", etiquetas=300, concurrencia=6, prob_error=0.1)
+    else:
+        ruta = generar_consola_table_download(tmp_path / "origen.html", tablas=1500)
+    datos = ruta.read_bytes()
+    assert len(datos) > 3 * (1 << 16)
+    # Caracteres multibyte en mitad de las líneas y, en la segunda mitad, finales de línea Windows
+    for palabra in (b" step ", b" bytes "):
+        datos = datos.replace(palabra, b" " + MULTIBYTE + palabra)
+    medio = datos.index(b"\n", len(datos) // 2)
+    return datos[:medio] + datos[medio:].replace(b"\n", b"\r\n")
+
+
+def _hojas(ruta, parser, usar_cache):
+    if parser == "metricas":
+        return pipeline._hojas_metricas(ruta, usar_cache)
+    return pipeline._hojas_table_download(ruta, usar_cache)
+
+
+def _assert_mismas_hojas(a, b):
+    assert a.keys() == b.keys()
+    for hoja in a:
+        pd.testing.assert_frame_equal(a[hoja].reset_index(drop=True), b[hoja].reset_index(drop=True),
+                                      check_dtype=False, obj=hoja)
+
+
+@pytest.mark.parametrize("parser", ["metricas", "table_download"])
+def test_crecimiento_por_trozos(tmp_path, parser):
+    datos = _consola(tmp_path, parser)
+    multibyte = datos.index(MULTIBYTE, len(datos) // 3)
+    # Un corte parte un carácter multibyte y otro un \r\n; el resto, al azar
+    cortes = sorted({multibyte + 1, datos.index(b"\r\n", len(datos) // 2) + 1,
+                     *random.Random(3).sample(range(1, len(datos)), 8), len(datos)})
+    ruta = tmp_path / "crece.html"
+    ruta.write_bytes(b"")
+    anterior = 0
+    for corte in cortes:
+        with open(ruta, "ab") as f:
+            f.write(datos[anterior:corte])
+        anterior = corte
+        _assert_mismas_hojas(_hojas(ruta, parser, True), _hojas(ruta, parser, False))
+    assert Checkpoints().entradas()
+
+
+@pytest.mark.parametrize("parser", ["metricas", "table_download"])
+def test_reescritura_con_el_mismo_tamano(tmp_path, parser):
+    datos = _consola(tmp_path, parser)
+    ruta = tmp_path / "consola.html"
+    ruta.write_bytes(datos)
+    antes = _hojas(ruta, parser, True)
+
+    # Un cambio en medio, lejos de las muestras de la huella, sin cambiar el tamaño:
+    # el día del fin de una fase (o de una descarga)
+    fin = b"phase has ended\r\n" if parser == "metricas" else b"Downloaded ftp file"
+    marca = datos.rindex(b"[2024.01.0", 0, datos.index(fin, len(datos) // 2)) + len(b"[2024.01.0")
+    ruta.write_bytes(datos[:marca] + b"9" + datos[marca + 1:])
+    st = os.stat(ruta)
+    os.utime(ruta, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    despues = _hojas(ruta, parser, True)
+    _assert_mismas_hojas(despues, _hojas(ruta, parser, False))
+    assert not all(antes[h].equals(despues[h]) for h in antes)
+
+
+@pytest.fixture
+def lecturas(monkeypatch):
+    """Cuenta las lecturas completas de un fichero (para escanearlo o para calcular su hash)."""
+    leidas = []
+    original = entradas.bloques
+
+    def contar(ruta, offset=0, *args, **kwargs):
+        if offset == 0:
+            leidas.append(ruta)
+        return original(ruta, offset, *args, **kwargs)
+
+    monkeypatch.setattr(entradas, "bloques", contar)
+    monkeypatch.setattr(incremental, "bloques", contar)
+    return leidas
+
+
+@pytest.mark.parametrize("parser", ["metricas", "table_download"])
+def test_consola_terminada_en_una_lectura_y_sin_checkpoint(tmp_path, parser, lecturas):
+    ruta = tmp_path / "consola.html"
+    ruta.write_bytes(_consola(tmp_path, parser))
+    mtime = os.stat(ruta).st_mtime_ns - 3600 * 10 ** 9
+    os.utime(ruta, ns=(mtime, mtime))
+    hojas = _hojas(ruta, parser, True)
+    # Escaneo y hash de la caché en la misma pasada; termina en "Finished: SUCCESS": sin checkpoint
+    assert lecturas == [ruta]
+    assert not Checkpoints().entradas()
+    assert len(CacheParseo().entradas()) == 1
+    # La segunda vez sale de la caché por el índice de hashes, sin leer el fichero
+    _assert_mismas_hojas(_hojas(ruta, parser, True), hojas)
+    assert lecturas == [ruta]
+    _assert_mismas_hojas(hojas, _hojas(ruta, parser, False))
+
+
+@pytest.mark.parametrize("parser", ["metricas", "table_download"])
+def test_checkpoint_terminado_al_retomar(tmp_path, parser):
+    datos = _consola(tmp_path, parser)
+    fin = datos.rindex(b"Finished: SUCCESS")
+    ruta = tmp_path / "consola.html"
+    ruta.write_bytes(datos[:fin])
+    _hojas(ruta, parser, True)
+    assert not Checkpoints().cargar(ruta, parser, VERSIONES[parser])["terminada"]
+
+    with open(ruta, "ab") as f:
+        f.write(datos[fin:])
+    _assert_mismas_hojas(_hojas(ruta, parser, True), _hojas(ruta, parser, False))
+    assert Checkpoints().cargar(ruta, parser, VERSIONES[parser])["terminada"]
+
+    # Nada crece tras la línea final: si el fichero cambia, se parsea desde cero y ya no deja checkpoint
+    with open(ruta, "ab") as f:
+        f.write(datos[:fin])
+    _assert_mismas_hojas(_hojas(ruta, parser, True), _hojas(ruta, parser, False))
+    assert not Checkpoints().entradas()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from jenkins_simulado import ServidorJenkins, _contenido_pre
+from logparser import jenkins
+from logparser.generar_metricas import EscanerPromocion
+from logparser.sintetico import generar_consola_promocion
+
+JOB = "PROYECTO"
+
+
+@pytest.fixture
+def raiz(tmp_path):
+    raiz = tmp_path / "raiz"
+    (raiz / JOB).mkdir(parents=True)
+    for n in (1, 2):
+        generar_consola_promocion(raiz / JOB / f"{n}.html", etiquetas=40, concurrencia=4, prob_error=0.2)
+    return raiz
+
+
+def _descargar(url, salida, builds=(1,), **opciones):
+    opciones.setdefault("graficas", False)
+    resultados, _ = asyncio.run(jenkins.descargar(url, JOB, list(builds), salida_dir=salida, **opciones))
+    return resultados
+
+
+def _hojas(ruta):
+    return pd.read_excel(ruta, sheet_name=None, engine="openpyxl")
+
+
+def _assert_mismas_hojas(a, b):
+    hojas_a, hojas_b = _hojas(a), _hojas(b)
+    assert hojas_a.keys() == hojas_b.keys()
+    for hoja in hojas_a:
+        pd.testing.assert_frame_equal(hojas_a[hoja], hojas_b[hoja], check_dtype=False, obj=hoja)
+
+
+def test_rutas_y_rangos():
+    assert jenkins.ruta_job("carpeta/PRO YECTO/") == "/job/carpeta/job/PRO%20YECTO"
+    assert jenkins.parsear_builds(["3-5", "1,9"]) == [1, 3, 4, 5, 9]
+
+
+def test_reanudacion_igual_a_descarga_completa(raiz, tmp_path):
+    total = len(_contenido_pre((raiz / JOB / "1.html").read_bytes()))
+    with ServidorJenkins(raiz) as servidor:
+        [completa] = _descargar(servidor.url, tmp_path / "completa", usar_cache=False)
+    assert (completa.estado, completa.bytes_nuevos) == ("terminada", total)
+
+    # Cada petición deja ver un tercio más: el corte cae en mitad de una línea
+    estados, nuevos = [], 0
+    with ServidorJenkins(raiz, pasos=3) as servidor:
+        for _ in range(4):
+            [r] = _descargar(servidor.url, tmp_path / "reanudada")
+            estados.append(r.estado)
+            nuevos += r.bytes_nuevos
+            if r.salida:
+                salida = r.salida
+        peticiones = servidor.peticiones
+    assert estados == ["en curso", "en curso", "terminada", "sin cambios"]
+    assert nuevos == total and peticiones == 3
+    _assert_mismas_hojas(salida, completa.salida)
+
+
+def test_seguir_hasta_que_no_hay_mas_datos(raiz, tmp_path):
+    with ServidorJenkins(raiz, pasos=4) as servidor:
+        [r] = _descargar(servidor.url, tmp_path / "salida", seguir=True, intervalo=0, formatos=())
+        assert (r.estado, servidor.peticiones) == ("terminada", 4)
+
+
+def test_build_inexistente_y_ultimas(raiz, tmp_path, capsys):
+    with ServidorJenkins(raiz) as servidor:
+        resultados = _descargar(servidor.url, tmp_path / "salida", builds=(1, 99), formatos=())
+        assert [(r.build, r.ok, r.estado) for r in resultados] == [(1, True, "terminada"), (99, True, "no existe")]
+        assert jenkins.main([servidor.url, "--job", JOB, "--ultimos", "1", "--formato", "--sin-graficas",
+                             "--salida", str(tmp_path / "cli")]) == 0
+    assert "[OK   ] #2 (terminada" in capsys.readouterr().out
+
+
+def test_credenciales(raiz, tmp_path, monkeypatch):
+    with ServidorJenkins(raiz, usuario="u", token="t") as servidor:
+        [r] = _descargar(servidor.url, tmp_path / "salida", formatos=())
+        assert (r.ok, r.estado) == (False, "error") and "401" in r.error
+        monkeypatch.setenv("JENKINS_TOKEN", "t")
+        assert jenkins.main([servidor.url, "--job", JOB, "--builds", "1", "--usuario", "u", "--formato",
+                             "--sin-graficas", "--salida", str(tmp_path / "cli")]) == 0
+
+
+class _Cortado(BaseHTTPRequestHandler):
+    """Anuncia más bytes de los que envía y cierra: respuesta truncada."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "100000")
+        self.send_header("X-Text-Size", "100000")
+        self.end_headers()
+        self.wfile.write(b"[2024.01.01 10:00:00] [JAVA] ")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def test_respuesta_truncada_no_deja_checkpoint(raiz, tmp_path):
+    http = ThreadingHTTPServer(("127.0.0.1", 0), _Cortado)
+    puerto = http.server_address[1]
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    try:
+        [r] = _descargar(f"http://127.0.0.1:{puerto}", tmp_path / "salida", formatos=())
+    finally:
+        http.shutdown()
+        http.server_close()
+    assert (r.ok, r.estado) == (False, "error") and "IncompleteRead" in r.error
+
+    # Misma URL (el checkpoint se guarda por URL): la build se descarga entera,
+    # sin arrastrar nada del intento truncado
+    with ServidorJenkins(raiz, puerto=puerto) as servidor:
+        [r] = _descargar(servidor.url, tmp_path / "salida", formatos=())
+    assert (r.estado, r.bytes_nuevos) == ("terminada", len(_contenido_pre((raiz / JOB / "1.html").read_bytes())))
+
+
+def test_redirecciones_del_mismo_servidor(raiz, tmp_path):
+    with ServidorJenkins(raiz) as servidor:
+        [directa] = _descargar(servidor.url, tmp_path / "directa", usar_cache=False)
+    # Detrás de un proxy: cada petición a la URL sin prefijo se redirige
+    with ServidorJenkins(raiz, prefijo="/jenkins") as servidor:
+        [r] = _descargar(servidor.url, tmp_path / "redirigida", usar_cache=False)
+        assert jenkins.main([servidor.url, "--job", JOB, "--ultimos", "1", "--formato", "--sin-graficas",
+                             "--sin-cache", "--salida", str(tmp_path / "cli")]) == 0
+    assert (r.ok, r.bytes_nuevos) == (True, directa.bytes_nuevos)
+    _assert_mismas_hojas(r.salida, directa.salida)
+
+
+class _AOtroServidor(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(301)
+        self.send_header("Location", "https://jenkins.ejemplo" + self.path)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def test_redireccion_a_otro_servidor(tmp_path):
+    http = ThreadingHTTPServer(("127.0.0.1", 0), _AOtroServidor)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    try:
+        [r] = _descargar(f"http://127.0.0.1:{http.server_address[1]}", tmp_path / "salida", formatos=())
+    finally:
+        http.shutdown()
+        http.server_close()
+    assert (r.ok, r.estado) == (False, "error") and "https://jenkins.ejemplo/job/PROYECTO/1/" in r.error
+
+
+def test_escaneo_fuera_del_bucle(raiz, tmp_path, monkeypatch):
+    hilos = set()
+
+    class Escaner(EscanerPromocion):
+        def alimentar(self, bloque):
+            if bloque != jenkins.PREFIJO_CONSOLA:  # el prefijo se añade al crear el estado
+                hilos.add(threading.get_ident())
+            super().alimentar(bloque)
+
+    monkeypatch.setattr(jenkins, "_escaner", lambda parser: ("test", Escaner))
+    bucle = []
+
+    async def descargar(url):
+        bucle.append(threading.get_ident())
+        cliente = jenkins.ClienteHTTP(url)
+        try:
+            return await asyncio.gather(*(jenkins.descargar_build(cliente, JOB, n, "metricas") for n in (1, 2)))
+        finally:
+            await cliente.cerrar()
+
+    with ServidorJenkins(raiz) as servidor:
+        resultados = asyncio.run(descargar(servidor.url))
+    assert all(r[0]["eventos"].shape[0] > 0 for r in resultados)
+    assert hilos and not hilos & set(bucle)
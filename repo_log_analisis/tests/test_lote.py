@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from conftest import ejecutar
+from logparser import lote
+from logparser.sintetico import generar_consola_promocion, generar_consola_table_download
+
+
+@pytest.fixture
+def consolas(tmp_path):
+    d = tmp_path / "consolas"
+    d.mkdir()
+    for n in range(1, 4):
+        generar_consola_promocion(d / f"PROYECTO_{n}.html", etiquetas=20, semilla=n)
+    (d / "ROTO_9.html.gz").write_bytes(b"esto no es gzip")
+    (d / "notas.txt").write_text("no es una consola", encoding="utf-8")
+    return d
+
+
+def test_expandir_entradas_sin_duplicados(consolas):
+    rutas = lote.expandir_entradas([consolas, consolas / "PROYECTO_2.html", str(consolas / "PROYECTO_*.html")])
+    assert [r.name for r in rutas] == ["PROYECTO_1.html", "PROYECTO_2.html", "PROYECTO_3.html", "ROTO_9.html.gz"]
+    assert lote.expandir_entradas([consolas / "no_existe_*.html"]) == []
+
+
+def test_procesar_lote_en_orden_y_con_errores(tmp_path, consolas):
+    rutas = lote.expandir_entradas([consolas])
+    resultados = lote.procesar_lote(rutas, "metricas", jobs=2, salida_dir=tmp_path / "salida")
+    assert [r.ruta for r in resultados] == rutas
+    assert [r.ok for r in resultados] == [True, True, True, False]
+    assert all(r.salida.exists() and r.salida.parent == tmp_path / "salida" for r in resultados[:3])
+    assert resultados[3].error and resultados[3].salida is None
+
+
+def test_tarea_desconocida():
+    with pytest.raises(ValueError, match="Tarea desconocida"):
+        lote.procesar_lote([], "otra")
+
+
+def test_cli(tmp_path, consolas):
+    proceso = ejecutar("logparser.lote", str(consolas), "--jobs", "2", "--salida", str(tmp_path / "salida"))
+    assert proceso.returncode == 1, proceso.stdout + proceso.stderr
+    assert "correctos: 3 | con error: 1" in proceso.stdout
+    assert "[ERROR] ROTO_9.html.gz" in proceso.stdout
+    assert sorted(p.name for p in (tmp_path / "salida").iterdir()) == [
+        f"PROYECTO_{n}.html_METRICAS.xlsx" for n in range(1, 4)]
+
+
+def test_cli_table_download(tmp_path):
+    generar_consola_table_download(tmp_path / "TD_1.html", tablas=20)
+    proceso = ejecutar("logparser.lote", str(tmp_path / "*.html"), "--parser", "table_download", "--jobs", "1")
+    assert proceso.returncode == 0, proceso.stdout + proceso.stderr
+    assert (tmp_path / "TD_1_METRICAS.xlsx").exists()
+    assert ejecutar("logparser.lote", str(tmp_path / "vacio_*.html")).returncode == 0
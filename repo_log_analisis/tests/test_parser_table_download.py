@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import pickle
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from logparser import parser_table_download as td
+from logparser.sintetico import generar_consola_table_download
+
+
+def _referencia_dom(html_text):
+    """El parser original: texto del <pre> con BeautifulSoup y los patrones línea a línea."""
+    bs4 = pytest.importorskip("bs4")
+    soup = bs4.BeautifulSoup(html_text, "html.parser")
+    pre = soup.find("pre") or soup.select_one("#main-panel pre, #main-panel #out")
+    texto = pre.get_text("\n") if pre else soup.get_text("\n")
+    events, marcas = {}, []
+    for line in texto.splitlines():
+        m_ts = td._TS_RE.search(line)
+        if m_ts:
+            ts = datetime.strptime(m_ts.group(1), "%Y.%m.%d %H:%M:%S")
+            marcas.append(ts)
+            for m in (td._TO_PATH_RE.search(line), td._DL_ECHO_RE.search(line)):
+                if m:
+                    inicio, fin = events.get(m.group(1), (ts, ts))
+                    events[m.group(1)] = (min(inicio, ts), max(fin, ts))
+    return events, min(marcas, default=None), max(marcas, default=None)
+
+
+def _como_dict(df):
+    return {e: (i.to_pydatetime(), f.to_pydatetime()) for e, i, f in zip(df["etiqueta"], df["inicio"], df["fin"])}
+
+
+@pytest.fixture
+def consola_td(tmp_path):
+    return generar_consola_table_download(tmp_path / "TD_1.html", tablas=300, concurrencia=6)
+
+
+def test_streaming_igual_que_dom(consola_td):
+    events, inicio, fin = _referencia_dom(consola_td.read_text(encoding="utf-8"))
+    df, log_start, log_end = td.parse_file(consola_td, usar_cache=False)
+    assert len(df) == 300
+    assert _como_dict(df) == events
+    assert (log_start, log_end) == (inicio, fin)
+    assert (df["duracion_ms"] == (df["fin"] - df["inicio"]).dt.total_seconds() * 1000).all()
+
+
+def test_bloques_arbitrarios(consola_td):
+    # Cortes en mitad de etiquetas, entidades y caracteres multibyte
+    datos = consola_td.read_bytes()
+    escaner = td.EscanerTableDownload()
+    for i in range(0, len(datos), 997):
+        escaner.alimentar(datos[i:i + 997])
+    (tablas, meta) = escaner.resultado()
+    df, log_start, log_end = td.parse_file(consola_td, usar_cache=False)
+    pd.testing.assert_frame_equal(tablas["eventos"], df)
+    assert (meta["log_start"], meta["log_end"]) == (log_start, log_end)
+
+
+def test_html_sin_pre_y_con_script():
+    html = ("<html><script>var x = '[2024.01.01 00:00:00] to D:/x/FALSA';</script><body>"
+            "<div id='out'>[2024.01.02 10:00:00] [echo] Downloaded ftp file TABLA_A<br>"
+            "[2024.01.02 10:00:05] copiando <b>a</b> D:/x/y<br>[2024.01.02 10:01:00] to D:/dir/TABLA_A\n"
+            "</div></body></html>")
+    df, log_start, log_end = td.parse_table_download_console(html)
+    assert df["etiqueta"].tolist() == ["TABLA_A"]
+    assert df["duracion_ms"].tolist() == [60_000] and df["duracion_hms"].tolist() == ["00:01:00"]
+    assert log_start == datetime(2024, 1, 2, 10, 0) and log_end == datetime(2024, 1, 2, 10, 1)
+    assert _como_dict(df) == _referencia_dom(html)[0]
+
+
+def test_process_file(tmp_path, consola_td):
+    salida = td.process_file(consola_td, salida_dir=tmp_path / "out", usar_cache=False)
+    assert salida == tmp_path / "out" / "TD_1_METRICAS.xlsx"
+    hojas = pd.read_excel(salida, sheet_name=None)
+    assert {"GlobalData", "Tiempos", "Etiquetas", "Medias Tecnologia", "Concurrencia"} <= set(hojas)
+    assert len(hojas["Etiquetas"]) == 300
+    assert hojas["Medias Tecnologia"]["Número de etiquetas"].tolist() == [300]
+
+
+def test_consola_vacia():
+    df, log_start, log_end = td.parse_table_download_console("<html><pre></pre></html>")
+    assert df.empty and list(df.columns) == ["etiqueta", "tecnologia", "fase", "inicio", "fin",
+                                             "duracion_ms", "duracion_hms"]
+    assert log_start is None and log_end is None
+    assert td._build_sheets(df, None, None)["Tiempos"].empty
+
+
+def test_estado_en_arrays_serializable(consola_td):
+    datos = consola_td.read_bytes()
+    mitad = td.EscanerTableDownload()
+    mitad.alimentar(datos[:len(datos) // 2])
+    assert mitad.inicio.typecode == mitad.fin.typecode == "q" and len(mitad.inicio) == len(mitad.tablas)
+    reanudado = pickle.loads(pickle.dumps(mitad))
+    copia = mitad.cerrado()  # no comparte arrays con el escáner que sigue creciendo
+    reanudado.alimentar(datos[len(datos) // 2:])
+    mitad.alimentar(datos[len(datos) // 2:])
+    assert len(copia.tablas) < len(mitad.tablas) == 300
+    assert reanudado.events == mitad.events
+    pd.testing.assert_frame_equal(reanudado.resultado()[0]["eventos"], td.parse_file(consola_td, usar_cache=False)[0])
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import json
+import sys
+from pathlib import Path
+
+from conftest import ejecutar
+from logparser import perfil
+
+
+def test_etapas_y_contadores(tmp_path):
+    destino = tmp_path / "perfil.jsonl"
+    with perfil.perfilar("consola.html", destino=destino, memoria=True):
+        with perfil.etapa("lectura"):
+            perfil.contar(lineas=10)
+            perfil.contar(lineas=5)
+            with perfil.etapa("interna"):
+                bytearray(1 << 20)
+    registro = json.loads(destino.read_text(encoding="utf-8"))
+    assert registro["archivo"] == "consola.html" and registro["ok"]
+    etapas = {e["etapa"]: e for e in registro["etapas"]}
+    assert etapas["lectura"]["lineas"] == 15
+    assert etapas["lectura"]["pico_mb"] >= etapas["interna"]["pico_mb"] >= 1
+
+
+def test_sin_perfil_activo_es_noop():
+    perfil.contar(lineas=1)
+    with perfil.etapa("x") as registro:
+        assert registro == {}
+    assert perfil.medido("y")(lambda a: a + 1)(1) == 2
+
+
+def test_sin_fichero_va_al_stderr_real(capfd, monkeypatch, tmp_path):
+    # Aunque sys.stderr esté redirigido a un log, el registro llega a la consola
+    with open(tmp_path / "log.txt", "w", encoding="utf-8") as log:
+        monkeypatch.setattr(sys, "stderr", log)
+        with perfil.perfilar("consola.html", destino="-"):
+            pass
+    assert (tmp_path / "log.txt").read_text(encoding="utf-8") == ""
+    assert json.loads(capfd.readouterr().err)["archivo"] == "consola.html"
+
+
+def test_graficas_por_consola_y_log_opcional(tmp_path, consola_promocion):
+    assert ejecutar("logparser.generar_metricas", consola_promocion).returncode == 0
+    xlsx = consola_promocion.with_name(consola_promocion.name + "_METRICAS.xlsx")
+    proceso = ejecutar("logparser.generar_graficas", xlsx, "--perfil")
+    assert proceso.returncode == 0 and "Gráfica de tiempos generada" in proceso.stdout
+    registro = json.loads(proceso.stderr.strip().splitlines()[-1])
+    assert {e["etapa"] for e in registro["etapas"]} >= {"graficas.lectura", "graficas.render"}
+    assert not list(xlsx.parent.glob("*log*.txt"))
+    assert not (Path(perfil.__file__).parent / "generar_graficas_log.txt").exists()
+
+    # Con --log los mensajes van al fichero y el registro de --perfil sigue en la consola
+    proceso = ejecutar("logparser.generar_graficas", xlsx, "--perfil", "--log", tmp_path / "graficas.txt")
+    assert proceso.returncode == 0 and "Gráfica" not in proceso.stdout
+    assert json.loads(proceso.stderr.strip().splitlines()[-1])["archivo"] == str(xlsx)
+    assert "Gráfica de tiempos generada" in (tmp_path / "graficas.txt").read_text(encoding="utf-8")
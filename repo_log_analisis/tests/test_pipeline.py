@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import gzip
+
+import pandas as pd
+import pytest
+
+from logparser import pipeline
+from logparser.generar_metricas import generar_metricas
+from logparser.parser_table_download import process_file
+from logparser.sintetico import generar_consola_table_download
+
+
+def _leer(xlsx):
+    return pd.read_excel(xlsx, sheet_name=None)
+
+
+def _iguales(a, b, check_dtype=True):
+    assert list(a) == list(b)
+    for hoja in a:
+        pd.testing.assert_frame_equal(a[hoja], b[hoja], check_dtype=check_dtype, obj=hoja)
+
+
+def test_mismas_hojas_que_generar_metricas(tmp_path, consola_promocion):
+    resultado = pipeline.analizar(consola_promocion, salida_dir=tmp_path / "pipeline", plotlyjs="cdn")
+    referencia = generar_metricas(consola_promocion, salida_dir=tmp_path / "separado")
+    assert [p.name for p in resultado.salidas] == [referencia.name]
+    _iguales(_leer(resultado.salidas[0]), _leer(referencia))
+    assert "Procesos" in resultado.hojas and len(resultado.hojas["Etiquetas"]) == 60
+    assert sorted(p.name for p in resultado.graficas) == ["PROYECTO_1.html_etiquetas.html",
+                                                          "PROYECTO_1.html_tiempos.html"]
+    assert all("cdn.plot.ly" in p.read_text(encoding="utf-8") for p in resultado.graficas)
+
+
+def test_table_download_igual_que_process_file(tmp_path):
+    consola = generar_consola_table_download(tmp_path / "TD_1.html", tablas=50)
+    resultado = pipeline.analizar(consola, "table_download", salida_dir=tmp_path / "pipeline", graficas=False)
+    referencia = process_file(consola, salida_dir=tmp_path / "separado")
+    assert resultado.salidas[0].name == referencia.name == "TD_1_METRICAS.xlsx"
+    _iguales(_leer(resultado.salidas[0]), _leer(referencia))
+    assert resultado.graficas == []
+
+
+def test_sin_tablas_ni_graficas(tmp_path, consola_promocion):
+    resultado = pipeline.analizar(consola_promocion, formatos=(), graficas=False)
+    assert resultado.salidas == [] and resultado.graficas == []
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["PROYECTO_1.html"]
+    assert len(resultado.hojas["GlobalData"]) > 0
+
+
+def test_comprimido_y_formatos_columnares(tmp_path, consola_promocion):
+    comprimido = tmp_path / "comprimidos" / "PROYECTO_1.html.gz"
+    comprimido.parent.mkdir()
+    comprimido.write_bytes(gzip.compress(consola_promocion.read_bytes()))
+    resultado = pipeline.analizar(comprimido, formatos=("xlsx", "parquet"), graficas=False)
+    assert [p.name for p in resultado.salidas] == ["PROYECTO_1.html_METRICAS.xlsx", "PROYECTO_1.html_METRICAS"]
+    assert all(p.parent == comprimido.parent for p in resultado.salidas)
+    # Mismo contenido: la segunda lectura sale de la caché (columnas de texto como str, no object)
+    plano = pipeline.analizar(consola_promocion, formatos=(), graficas=False)
+    _iguales(resultado.hojas, plano.hojas, check_dtype=False)
+
+
+def test_parser_desconocido(consola_promocion):
+    with pytest.raises(ValueError, match="Parser desconocido"):
+        pipeline.analizar(consola_promocion, "otro")
+
+
+def test_cli_varios_logs(tmp_path, consola_promocion):
+    otro = tmp_path / "PROYECTO_2.html"
+    otro.write_bytes(consola_promocion.read_bytes())
+    salida = tmp_path / "salida"
+    assert pipeline.main([str(tmp_path / "*.html"), "--jobs", "1", "--salida", str(salida),
+                          "--formato", "csv", "--plotlyjs", "compartido"]) == 0
+    nombres = sorted(p.name for p in salida.iterdir())
+    assert nombres[:2] == ["PROYECTO_1.html_METRICAS", "PROYECTO_1.html_etiquetas.html"]
+    assert len([n for n in nombres if n.startswith("plotly-")]) == 1
+    assert (salida / "PROYECTO_2.html_METRICAS" / "GlobalData.csv").exists()
+    assert pipeline.main([str(tmp_path / "nada_*.html")]) == 0
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""El prefiltro de literales no cambia el resultado: se compara con aplicar
+todas las expresiones de todas las reglas a todas las líneas."""
+import random
+from datetime import datetime
+
+import pytest
+
+from logparser import parser_table_download as td
+from logparser import reglas
+from logparser.fechas import a_datetime
+from logparser.generar_metricas import MARCA_ERROR, EscanerPromocion
+
+VOCABULARIO = {
+    "metricas": [
+        "[2024.01.01 06:00:0{s}] [JAVA] [promote] [CR-{n}] The BUILD phase has started",
+        "[2024.01.01 06:00:0{s}] [SQL] [promote] [PF-{n}] The deploy PHASE HAS ended",
+        "[2024.01.01 06:00:0{s}] [Orchestrator] [PROCESS] [Release step] La fase X ha finalizado in 5{n}ms",
+        "[2024.01.01 06:00:0{s}] [-] [PROCESS] [x] The ORCH phase has ended in 1{n}ms",
+        MARCA_ERROR, "[RQ-{n}] " + MARCA_ERROR,
+        '  "msg {n}"  ', "", "ruido {n} CR-{n}", "[x] [CR-{n}] BUILD FAILED", "nada",
+        "ñandú ✔ {n}", "Straße ﬁn phase has", "[2024.01.01 06:00:0{s}] [NET] [RQ-{n}] The TEST Phase Has Started",
+    ],
+    "table_download": [
+        "[2024.0{m}.0{d} 0{h}:00:00] get x to D:/data/T{n}",
+        "[2024.0{m}.0{d} 0{h}:00:00]   [echo] Downloaded ftp file T{n}",
+        "x [2024.0{m}.0{d} 0{h}:00:00] y [2023.01.01 00:00:00]", "ruido T{n} to d:/a/b/T{n}", "",
+        "[echo] Downloaded ftp file T{n}", "[2024.0{m}.0{d} 0{h}:00:00] to c:/x/T{n} ",
+        "ñ ✔ :/ [2024.0{m}.0{d} 0{h}:00:0x]", "[2024.0{m}.0{d} 0{h}:00:00] Straße to E:/ß/T{n}",
+    ],
+}
+
+
+def _lineas(rnd, formato, maximo=60):
+    return [rnd.choice(VOCABULARIO[formato]).format(s=rnd.randint(0, 9), n=rnd.randint(0, 99), m=rnd.randint(1, 9),
+                                                    d=rnd.randint(1, 9), h=rnd.randint(0, 9))
+            for _ in range(rnd.randint(0, maximo))]
+
+
+@pytest.mark.parametrize("formatos", [("metricas",), ("table_download",), ("metricas", "table_download")])
+def test_motor_no_pierde_coincidencias(formatos):
+    motor = reglas.motor(*formatos)
+    for semilla in range(300):
+        rnd = random.Random(semilla)
+        lineas = [linea for formato in formatos for linea in _lineas(rnd, formato)]
+        rnd.shuffle(lineas)
+        texto = "\n".join(lineas)
+        candidatas = motor.candidatas(texto)
+        todas = [(l, sorted(motor.coincidencias(l))) for l in lineas if motor.coincidencias(l)]
+        filtradas = [(l, sorted(motor.coincidencias(l))) for l in candidatas if motor.coincidencias(l)]
+        assert filtradas == todas, semilla
+        # Las candidatas son líneas del texto, en orden y sin repetir
+        restantes = iter(lineas)
+        assert all(any(c == l for l in restantes) for c in candidatas)
+        # La línea que sigue a una marca de error llega siempre
+        for i, linea in enumerate(lineas[:-1]):
+            if MARCA_ERROR in linea:
+                assert lineas[i + 1] in candidatas
+
+
+def _firma_promocion(escaner):
+    e = escaner.cerrado()
+    return (e.inicios, e.fines, e.tecnologias, e.df_procesos().to_dict("records"), e.errores, e.bloques_error)
+
+
+def test_escaner_promocion_igual_que_sin_prefiltro():
+    for semilla in range(500):
+        rnd = random.Random(semilla)
+        salto = rnd.choice(["\n", "\r\n"])
+        texto = salto.join(_lineas(rnd, "metricas", 40)) + rnd.choice(["", salto])
+        referencia = EscanerPromocion()
+        for linea in texto.replace("\r\n", "\n").split("\n"):
+            referencia.procesar(linea)  # todas las reglas en todas las líneas
+        datos = texto.encode("utf-8")
+        escaner = EscanerPromocion()
+        i = 0
+        while i < len(datos):  # bloques de bytes arbitrarios (cortan caracteres multibyte)
+            j = i + rnd.randint(1, 30)
+            escaner.alimentar(datos[i:j])
+            i = j
+        assert _firma_promocion(escaner) == _firma_promocion(referencia), semilla
+
+
+def _referencia_table_download(lineas):
+    eventos, inicio, fin = {}, None, None
+    for linea in lineas:
+        m_ts = td._TS_RE.search(linea)
+        if m_ts:
+            ts = datetime.strptime(m_ts.group(1), "%Y.%m.%d %H:%M:%S")
+            inicio = ts if inicio is None or ts < inicio else inicio
+            fin = ts if fin is None or ts > fin else fin
+            for m in (td._TO_PATH_RE.search(linea), td._DL_ECHO_RE.search(linea)):
+                if m:
+                    e = eventos.get(m.group(1))
+                    eventos[m.group(1)] = (ts, ts) if e is None else (min(e[0], ts), max(e[1], ts))
+    return eventos, inicio, fin
+
+
+def test_escaner_table_download_igual_que_sin_prefiltro(monkeypatch):
+    monkeypatch.setattr(td, "_LINEAS_POR_LOTE", 7)  # varios lotes por consola
+    for semilla in range(500):
+        lineas = _lineas(random.Random(semilla), "table_download")
+        escaner = td.EscanerTableDownload().procesar_lineas(lineas)
+        eventos = {t: (a_datetime(i), a_datetime(f)) for t, (i, f) in escaner.events.items()}
+        obtenido = (eventos, td._a_datetime(escaner.log_start), td._a_datetime(escaner.log_end))
+        assert obtenido == _referencia_table_download(lineas), semilla
+        assert escaner.lineas == len(lineas)
+
+
+def test_escanear_varios_formatos_en_una_lectura(tmp_path):
+    from logparser.sintetico import generar_consola_promocion
+    ruta = generar_consola_promocion(tmp_path / "consola.html", etiquetas=30, prob_error=0.3)
+    escaner = reglas.escanear(ruta, "metricas", "table_download")
+    motor = reglas.motor("metricas", "table_download")
+    esperadas = {}
+    for linea in ruta.read_text(encoding="utf-8").split("\n"):
+        for nombre, m in motor.coincidencias(linea).items():
+            esperadas.setdefault(nombre, []).append(m.groups())
+    assert escaner.coincidencias == esperadas
+    assert len(escaner.coincidencias["metricas.evento"]) == 30 * 2 * 2
+
+
+def test_regla_sin_literales():
+    with pytest.raises(ValueError):
+        reglas.registrar("prueba", reglas.Regla("vacia", reglas.re.compile("x"), ()))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import openpyxl
+import pandas as pd
+import pytest
+
+from logparser import salidas
+
+
+@pytest.fixture
+def hojas():
+    global_data = pd.DataFrame({
+        "etiqueta": ["CR-1", "CR-2", "PF-3"],
+        "inicio": pd.to_datetime(["2024-03-01 10:00:00", "2024-03-01 10:05:30", "2024-03-01 11:00:00"]),
+        "duracion_ms": [1000, 330_000, 0],
+        "comentarios": ["", "Compile failed", ""],
+    })
+    medias = pd.DataFrame({"Tecnología": ["JAVA"], "Media (ms)": [110_333.5]})
+    return {"GlobalData": global_data, "Medias Tecnologia": medias}
+
+
+@pytest.mark.parametrize("formato", ["parquet", "feather"])
+def test_columnar_ida_y_vuelta(tmp_path, hojas, formato):
+    xlsx = tmp_path / "X_METRICAS.xlsx"
+    rutas = salidas.escribir_hojas(xlsx, hojas, [formato])
+    assert rutas == [tmp_path / "X_METRICAS"] and not xlsx.exists()
+    assert (tmp_path / "X_METRICAS" / f"Medias_Tecnologia.{formato}").exists()
+    for nombre, df in hojas.items():
+        # leer_hoja acepta la ruta del Excel aunque solo exista el directorio
+        pd.testing.assert_frame_equal(salidas.leer_hoja(xlsx, nombre), df, check_dtype=False)
+
+
+def test_csv_ida_y_vuelta(tmp_path, hojas):
+    directorio = salidas.escribir_hojas(tmp_path / "X_METRICAS.xlsx", hojas, ["csv"])[0]
+    leido = salidas.leer_hoja(directorio, "GlobalData")
+    leido["inicio"] = pd.to_datetime(leido["inicio"])
+    esperado = hojas["GlobalData"].assign(comentarios=[float("nan"), "Compile failed", float("nan")])
+    pd.testing.assert_frame_equal(leido, esperado, check_dtype=False)
+
+
+def test_xlsx_ida_y_vuelta(tmp_path, hojas):
+    xlsx = tmp_path / "X_METRICAS.xlsx"
+    portada = [("B2", "Resumen"), ("A1", "Proyecto")]
+    assert salidas.escribir_hojas(xlsx, hojas, ["xlsx", "xlsx"], portada=portada) == [xlsx]
+    wb = openpyxl.load_workbook(xlsx)
+    assert wb.sheetnames == ["Portada", "GlobalData", "Medias Tecnologia"]
+    assert (wb["Portada"]["A1"].value, wb["Portada"]["B2"].value) == ("Proyecto", "Resumen")
+    ws = wb["GlobalData"]
+    assert ws["B2"].number_format == salidas.FORMATO_FECHA
+    assert ws["D3"].fill.fgColor.rgb.endswith(salidas.COLOR_ERROR.lstrip("#")) and ws["D2"].value is None
+
+    leido = salidas.leer_hoja(xlsx, "GlobalData")
+    esperado = hojas["GlobalData"].assign(comentarios=[float("nan"), "Compile failed", float("nan")])
+    pd.testing.assert_frame_equal(leido, esperado, check_dtype=False)
+    pd.testing.assert_frame_equal(salidas.leer_hoja(xlsx, "Medias Tecnologia"), hojas["Medias Tecnologia"])
+
+
+def test_hoja_vacia(tmp_path):
+    vacia = {"Errores": pd.DataFrame(columns=["etiqueta", "huella"])}
+    xlsx = salidas.escribir_hojas(tmp_path / "V_METRICAS.xlsx", vacia, ["xlsx", "parquet"])[0]
+    assert list(salidas.leer_hoja(xlsx, "Errores").columns) == ["etiqueta", "huella"]
+    assert salidas.leer_hoja(tmp_path / "V_METRICAS", "Errores").empty
+
+
+def test_errores(tmp_path, hojas):
+    with pytest.raises(ValueError, match="Formato desconocido"):
+        salidas.escribir_hojas(tmp_path / "X_METRICAS.xlsx", hojas, ["json"])
+    with pytest.raises(FileNotFoundError, match="Procesos"):
+        salidas.leer_hoja(tmp_path / "X_METRICAS.xlsx", "Procesos")
+    assert salidas.comprobar_formatos(["csv", "xlsx", "csv"]) == ["csv", "xlsx"]
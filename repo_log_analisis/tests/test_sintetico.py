@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from conftest import ejecutar
+from logparser import parser_table_download as td
+from logparser.generar_metricas import escanear_log
+from logparser.sintetico import generar_consola_promocion, generar_consola_table_download
+
+
+def test_determinista_por_semilla(tmp_path):
+    a = generar_consola_promocion(tmp_path / "a.html", etiquetas=50, semilla=1).read_bytes()
+    b = generar_consola_promocion(tmp_path / "b.html", etiquetas=50, semilla=1).read_bytes()
+    c = generar_consola_promocion(tmp_path / "c.html", etiquetas=50, semilla=2).read_bytes()
+    assert a == b != c
+
+
+def test_consolas_que_entienden_los_parsers(tmp_path):
+    promocion = generar_consola_promocion(tmp_path / "p.html", etiquetas=40, prob_error=1.0, procesos=7)
+    escaner = escanear_log(promocion)
+    assert len({etiqueta for etiqueta, _ in escaner.inicios}) == 40
+    assert len(escaner.errores) == 40 and len(escaner.df_procesos()) == 7
+
+    descarga = generar_consola_table_download(tmp_path / "t.html", tablas=120)
+    eventos, inicio, fin = td.parse_file(descarga, usar_cache=False)
+    assert len(eventos) == 120 and inicio < fin
+
+
+def test_cli_semilla(tmp_path):
+    for nombre in ("a.html", "b.html"):
+        proceso = ejecutar("logparser.sintetico", "table_download", tmp_path / nombre, "--tablas", 30, "--semilla", 5)
+        assert proceso.returncode == 0
+    assert (tmp_path / "a.html").read_bytes() == (tmp_path / "b.html").read_bytes()
+    referencia = generar_consola_table_download(tmp_path / "c.html", tablas=30, semilla=5)
+    assert referencia.read_bytes() == (tmp_path / "a.html").read_bytes()
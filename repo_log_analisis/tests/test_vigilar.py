@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import os
+import zipfile
+
+import pytest
+
+from logparser import vigilar
+from logparser.sintetico import generar_consola_promocion
+
+
+@pytest.fixture
+def logs(tmp_path, consola_promocion):
+    raiz = tmp_path / "logs"
+    (raiz / "PROYECTO").mkdir(parents=True)
+    os.replace(consola_promocion, raiz / "PROYECTO" / "PROYECTO_1.html")
+    return raiz
+
+
+def test_indice_espera_a_que_la_copia_termine(tmp_path, logs):
+    (logs / "PROYECTO" / "notas.txt").write_text("x", encoding="utf-8")
+    with zipfile.ZipFile(logs / "consolas.zip", "w") as zf:
+        zf.writestr("OTRO_1.html", "<pre></pre>")
+    indice = vigilar.IndiceCarpeta(logs, tmp_path / "indice.json")
+    assert indice.cambios() == []  # primer sondeo: aún no se sabe si están completos
+    assert indice.cambios() == ["PROYECTO/PROYECTO_1.html", "consolas.zip"]
+
+    # Un fichero que crece entre sondeos no se procesa hasta que deja de cambiar
+    creciendo = logs / "PROYECTO" / "PROYECTO_2.html.gz"
+    creciendo.write_bytes(b"a")
+    indice.cambios()
+    creciendo.write_bytes(b"ab")
+    assert "PROYECTO/PROYECTO_2.html.gz" not in indice.cambios()
+    assert "PROYECTO/PROYECTO_2.html.gz" in indice.cambios()
+
+    for rel in ("PROYECTO/PROYECTO_1.html", "consolas.zip", "PROYECTO/PROYECTO_2.html.gz"):
+        indice.marcar(rel)
+    indice.guardar()
+    # Tras reiniciar solo cuenta lo que cambió mientras estaba parado
+    (logs / "PROYECTO" / "PROYECTO_1.html").write_bytes(b"<pre>nuevo</pre>")
+    reiniciado = vigilar.IndiceCarpeta(logs, tmp_path / "indice.json")
+    reiniciado.cambios()
+    assert reiniciado.cambios() == ["PROYECTO/PROYECTO_1.html"]
+
+
+def test_indice_ilegible(tmp_path, logs, capsys):
+    (tmp_path / "indice.json").write_text("{roto", encoding="utf-8")
+    indice = vigilar.IndiceCarpeta(logs, tmp_path / "indice.json")
+    assert indice.procesados == {} and "[WARN]" in capsys.readouterr().out
+
+
+def test_una_vez(tmp_path, logs, capsys):
+    salida = tmp_path / "METRICAS"
+    (logs / "PROYECTO" / "ROTO_2.html.gz").write_bytes(b"no es gzip")
+    opciones = dict(formatos=["xlsx"], graficas=False, usar_cache=False)
+    vigilar.vigilar(logs, salida, una_vez=True, **opciones)
+    salida_texto = capsys.readouterr().out
+    assert "[OK] PROYECTO/PROYECTO_1.html" in salida_texto
+    assert "[ERROR] PROYECTO/ROTO_2.html.gz" in salida_texto
+    assert (salida / "PROYECTO" / "PROYECTO_1.html_METRICAS.xlsx").exists()
+    assert (salida / vigilar.FICHERO_INDICE).exists()
+
+    # Ni lo correcto ni lo fallido se repite mientras no cambie
+    vigilar.vigilar(logs, salida, una_vez=True, **opciones)
+    assert "PROYECTO/" not in capsys.readouterr().out
+
+    generar_consola_promocion(logs / "PROYECTO" / "PROYECTO_3.html", etiquetas=10)
+    vigilar.vigilar(logs, salida, una_vez=True, **opciones)
+    salida_texto = capsys.readouterr().out
+    assert "[OK] PROYECTO/PROYECTO_3.html" in salida_texto and "PROYECTO_1" not in salida_texto
+
+
+def test_carpeta_no_valida(tmp_path, capsys):
+    assert vigilar.main([str(tmp_path / "no_existe"), "--salida", str(tmp_path / "M")]) == 2
+    assert "[ERROR]" in capsys.readouterr().out
+
+
+def test_salida_dentro_de_la_carpeta_vigilada(logs, capsys):
+    salida = logs / "METRICAS"
+    opciones = dict(formatos=["xlsx"], graficas=True, usar_cache=False, plotlyjs="cdn")
+    vigilar.vigilar(logs, salida, una_vez=True, **opciones)
+    assert (salida / "PROYECTO" / "PROYECTO_1.html_tiempos.html").exists()
+    capsys.readouterr()
+    # Las gráficas generadas (*.html) no se toman por consolas nuevas
+    indice = vigilar.IndiceCarpeta(logs, excluir=[salida])
+    indice.cambios()
+    assert indice.cambios() == ["PROYECTO/PROYECTO_1.html"]
+    vigilar.vigilar(logs, salida, una_vez=True, **opciones)
+    assert "METRICAS/" not in capsys.readouterr().out
+
+
+def test_opciones_de_la_cli(monkeypatch):
+    import argparse
+    from logparser.generar_graficas import MODOS_PLOTLYJS
+    from logparser.pipeline import PARSERS
+    original = argparse.ArgumentParser.add_argument
+    opciones = {}
+
+    def add_argument(self, *args, **kwargs):
+        opciones[args[0]] = kwargs.get("choices")
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(argparse.ArgumentParser, "add_argument", add_argument)
+    with pytest.raises(SystemExit):
+        vigilar.main(["--help"])
+    assert opciones["--parser"] == PARSERS and opciones["--plotlyjs"] == MODOS_PLOTLYJS